@@ -0,0 +1,24 @@
+"""Middleware scoping the per-worker hydrated model cache to the request.
+
+Graphs checked out of ``hydrated_model_cache`` during a request go back to the cache when the request
+succeeds, and are dropped when it raises or returns an error status: a failed edit may have left its
+graph half-mutated, so the next request must re-hydrate from the stored payload.
+"""
+from model_builder.adapters.repositories.hydrated_model_cache import hydrated_model_cache
+
+
+class HydratedModelCacheMiddleware:
+    """Opens a checkout scope around each request. Place it AFTER SessionMiddleware."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = hydrated_model_cache.begin_request()
+        succeeded = False
+        try:
+            response = self.get_response(request)
+            succeeded = response.status_code < 400
+            return response
+        finally:
+            hydrated_model_cache.end_request(token, succeeded)
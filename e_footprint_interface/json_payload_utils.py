@@ -1,13 +1,17 @@
-"""Utilities for JSON payload size computation with timing.
+"""Utilities for JSON payload encoding and size computation with timing.
 
 This module provides functions to compute JSON payload sizes with performance measurement,
-used by both the session repository (for size limit enforcement) and the performance middleware.
+used by both the session repository (for size limit enforcement) and the performance middleware,
+and the compact JSON codec the repositories store payloads with, so a payload is encoded once for
+both its size check and its storage.
 """
+import hashlib
 import json
 import sys
 import time
+from contextlib import contextmanager
 from dataclasses import dataclass
-from typing import Any, Dict
+from typing import Any, Dict, Iterable, Optional, Tuple
 
 import orjson
 
@@ -39,7 +43,7 @@ def compute_json_size(data: Dict[str, Any]) -> JsonSizeResult:
         JsonSizeResult containing size in bytes, size in MB, and computation time in milliseconds.
     """
     start = time.perf_counter()
-    size_bytes = _serialized_size_bytes(data)
+    size_bytes = serialized_size_bytes(data)
     computation_time_ms = (time.perf_counter() - start) * 1000
 
     return JsonSizeResult(
@@ -49,7 +53,89 @@ def compute_json_size(data: Dict[str, Any]) -> JsonSizeResult:
     )
 
 
-def _serialized_size_bytes(data: Dict[str, Any]) -> int:
+def encode_json_payload(
+    data: Dict[str, Any], encoded_data: Optional[bytes] = None, added_keys: Iterable[str] = ()
+) -> Tuple[bytes, JsonSizeResult]:
+    """Encode a JSON payload once and measure it from that encoding.
+
+    Args:
+        data: The dictionary to encode.
+        encoded_data: Optional compact encoding of ``data`` made before ``added_keys`` were set on it
+            (e.g. by ``ModelWeb.serialize``); only the added keys are then encoded and spliced in.
+        added_keys: Keys set on ``data`` after ``encoded_data`` was made; none of them may have been
+            in ``data`` at that time.
+
+    Returns:
+        The compact JSON bytes of ``data`` and the JsonSizeResult measured on them.
+    """
+    start = time.perf_counter()
+    if encoded_data is None:
+        encoded_data = encode_json(data)
+    else:
+        added_entries = {key: data[key] for key in added_keys if key in data}
+        if added_entries:
+            encoded_added_entries = encode_json(added_entries)
+            if encoded_data == b"{}":
+                encoded_data = encoded_added_entries
+            else:
+                # Concatenating two compact JSON objects: drop one closing and one opening brace, add a comma.
+                encoded_data = encoded_data[:-1] + b"," + encoded_added_entries[1:]
+    computation_time_ms = (time.perf_counter() - start) * 1000
+
+    return encoded_data, JsonSizeResult(
+        size_bytes=len(encoded_data),
+        size_mb=len(encoded_data) / (1024 * 1024),
+        computation_time_ms=computation_time_ms
+    )
+
+
+def json_object_bytes(encoded_entries: Iterable[Tuple[str, bytes]]) -> bytes:
+    """Assemble the compact JSON object whose entries are ``(key, encoded value)`` pairs."""
+    return b"{" + b",".join(orjson.dumps(key) + b":" + encoded_value for key, encoded_value in encoded_entries) + b"}"
+
+
+def encode_json(data: Any) -> bytes:
+    """Return the compact JSON encoding of ``data``.
+
+    orjson, with the same stdlib fallback as ``serialized_size_bytes`` for payloads nested beyond its
+    254-level ceiling (the stdlib encoder is configured to emit the same compact output).
+    """
+    try:
+        return orjson.dumps(data)
+    except TypeError as orjson_error:
+        if "recursion limit" not in str(orjson_error).lower():
+            raise
+        with _deep_payload_recursion_limit():
+            return json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def json_digest(encoded_data: bytes) -> str:
+    """Return the SHA-256 hex digest of a compact JSON encoding, which addresses stored payload fragments."""
+    return hashlib.sha256(encoded_data).hexdigest()
+
+
+def decode_json(encoded_data: bytes) -> Any:
+    """Decode JSON bytes with orjson, falling back to the stdlib decoder past orjson's nesting ceiling."""
+    try:
+        return orjson.loads(encoded_data)
+    except orjson.JSONDecodeError as orjson_error:
+        if "recursion" not in str(orjson_error).lower():
+            raise
+        with _deep_payload_recursion_limit():
+            return json.loads(encoded_data)
+
+
+@contextmanager
+def _deep_payload_recursion_limit():
+    previous_limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(max(previous_limit, _DEEP_PAYLOAD_RECURSION_LIMIT))
+    try:
+        yield
+    finally:
+        sys.setrecursionlimit(previous_limit)
+
+
+def serialized_size_bytes(data: Dict[str, Any]) -> int:
     """Return the byte length of the JSON serialization of ``data``.
 
     Uses orjson for speed, but orjson hard-caps nesting at 254 levels and raises
@@ -65,9 +151,5 @@ def _serialized_size_bytes(data: Dict[str, Any]) -> int:
     except TypeError as orjson_error:
         if "recursion limit" not in str(orjson_error).lower():
             raise
-        previous_limit = sys.getrecursionlimit()
-        sys.setrecursionlimit(max(previous_limit, _DEEP_PAYLOAD_RECURSION_LIMIT))
-        try:
+        with _deep_payload_recursion_limit():
             return len(json.dumps(data).encode("utf-8"))
-        finally:
-            sys.setrecursionlimit(previous_limit)
@@ -59,6 +59,7 @@ MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "e_footprint_interface.session_performance_middleware.SessionPerformanceMiddleware",
+    "e_footprint_interface.hydrated_model_cache_middleware.HydratedModelCacheMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
@@ -162,11 +163,25 @@ CACHES = {
         "LOCATION": redis_location,
     },
     "postgres": {
+        "BACKEND": "model_builder.adapters.repositories.payload_table_cache.PayloadTableCache",
+        "OPTIONS": {"LEGACY_ALIAS": "postgres_legacy"},
+    },
+    # Previous Postgres tier, still read until its entries expire (see PayloadTableCache).
+    "postgres_legacy": {
         "BACKEND": "django.core.cache.backends.db.DatabaseCache",
         "LOCATION": "django_cache",
     },
 }
 
+# ============================================================================
+# MODEL FILE UPLOADS
+# ============================================================================
+
+# Uploaded .e-f.json files are read in chunks and rejected as soon as they go past these limits
+# (see JsonUploadParser). A file cannot be larger than the payload budget it has to fit in.
+MAX_UPLOAD_SIZE_MB = float(os.getenv("MAX_UPLOAD_SIZE_MB", os.getenv("MAX_PAYLOAD_SIZE_MB", "30")))
+MAX_UPLOAD_JSON_OBJECTS = int(os.getenv("MAX_UPLOAD_JSON_OBJECTS", "1000000"))
+
 # ============================================================================
 # DJANGO BROWSER RELOAD
 # ============================================================================
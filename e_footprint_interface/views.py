@@ -24,10 +24,8 @@ def _design_sample_model():
     """
     if "model_web" not in _DESIGN_SAMPLE_MODEL:
         from model_builder.adapters.repositories import InMemorySystemRepository
-        from model_builder.adapters.views.views import load_system_into_session
-        from model_builder.domain.services import get_template_system_data
-        _DESIGN_SAMPLE_MODEL["model_web"] = load_system_into_session(
-            InMemorySystemRepository(), get_template_system_data("ecommerce"))
+        from model_builder.adapters.views.views import load_template_into_session
+        _DESIGN_SAMPLE_MODEL["model_web"] = load_template_into_session(InMemorySystemRepository(), "ecommerce")
     return _DESIGN_SAMPLE_MODEL["model_web"]
 
 
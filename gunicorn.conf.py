@@ -16,3 +16,16 @@ def post_request(worker, req, environ, resp):
     memory_mb = psutil.Process(os.getpid()).memory_info().rss / 1024 / 1024
     if memory_mb > MEMORY_LIMIT_MB:
         worker.alive = False
+
+
+def worker_exit(server, worker):
+    """Flush the Postgres write-behind queue before the worker goes away."""
+    from model_builder.adapters.repositories.postgres_write_behind import postgres_write_behind
+    postgres_write_behind.close()
+
+
+def when_ready(server):
+    """Precompute the template payloads in the master, so that every forked worker starts with them."""
+    if os.environ.get("TEMPLATE_PAYLOADS_WARM_AT_STARTUP", "1") == "1":
+        from model_builder.adapters.views.views import template_payload_store
+        template_payload_store.warm()
@@ -1,12 +1,9 @@
 const {
     cumulativeSumFromArray,
-    generateTimeIndexLabels,
     sumDailyValuesByDisplayGranularity
 } = require('../theme/static/scripts/timeseries_utils.js');
 const { DateTime, Duration } = require("luxon");
 global.luxon = { DateTime, Duration };
-const {join} = require("node:path");
-const {readFileSync} = require("node:fs");
 const exp = require("node:constants");
 const {computeUsageJourneyVolume} = require("../theme/static/scripts/usage_pattern_timeseries");
 
@@ -26,44 +23,6 @@ test('Yearly displayed data has right length', () => {
     expect(Object.keys(aggregatedData).length).toBe(2);
 })
 
-test(
-    'Check generateTimeIndexLabels return an Array with the right number of elements and check' +
-    ' each elements of the list with Month parameter' +
-    ' ', () => {
-        let startDate = "2025-06-01";
-        let granularity = "month";
-        let nbValues = 24;
-
-        let csvPath = join(__dirname, "timeseries_files_test/list_month.csv");
-        let csvContent = readFileSync(csvPath, "utf8");
-        let lines = csvContent.trim().split("\n");
-        let expectedData = lines.slice(1);
-
-        let result = generateTimeIndexLabels(startDate, granularity, nbValues);
-        expect(result.length).toBe(24);
-        expect(result).toEqual(expectedData);
-    }
-)
-
-test(
-    'Check generateTimeIndexLabels return an Array with the right number of elements and check' +
-    ' each elements of the list with Year parameter' +
-    ' ', () => {
-        let startDate = "2025-06-01";
-        let granularity = "year";
-        let nbValues = 20;
-
-        let csvPath = join(__dirname, "timeseries_files_test/list_year.csv");
-        let csvContent = readFileSync(csvPath, "utf8");
-        let lines = csvContent.trim().split("\n");
-        let expectedData = lines.slice(1);
-
-        let result = generateTimeIndexLabels(startDate, granularity, nbValues)
-        expect(result.length).toBe(20);
-        expect(result).toEqual(expectedData);
-    }
-)
-
 test(
     'Check cumulativeSumFromArray return an Dict with the right number of' +
     ' elements and check index', () => {
@@ -63,7 +63,7 @@ class HtmxPresenter:
     def _recomputation_html(self) -> str:
         """HTML for re-rendering the result panel as an OOB innerHTML swap."""
         refresh_content = render_to_string(
-            "model_builder/result/result_panel.html", context={"model_web": self.model_web})
+            "model_builder/result/result_panel.html", context={"system_emissions": self.model_web.system_emissions})
         return (f"<div id='result-block' hx-swap-oob='innerHTML:#result-block'>"
                 f"{refresh_content}</div>")
 
@@ -1,11 +1,117 @@
-"""Shared cache backend helper for Redis/Postgres-backed repositories."""
+"""Shared cache backend helper for Redis/Postgres-backed repositories.
+
+JSON documents (dicts and lists) are stored as compact JSON bytes rather than pickled by the Django caches:
+unpickling a large nested dict is far slower than ``orjson.loads``, and callers that already hold the
+encoding (``SessionSystemRepository.save_data``) pass the bytes in directly, so one encoding serves the size
+check, Redis and Postgres. Pickling a bytes value is a plain copy. Bytes read back are decoded as JSON;
+values written before this codec (pickled dicts) are still returned as they are.
+
+Encoded payloads of at least ``CACHE_COMPRESSION_MIN_BYTES`` are then compressed with the stdlib codec named by
+``CACHE_COMPRESSION_CODEC`` (``zlib``, ``lzma`` or ``none``) at ``CACHE_COMPRESSION_LEVEL``. A compressed value
+starts with a header naming its codec; JSON text never starts with a NUL byte, so values without a header
+(uncompressed or written before compression existed) read back as before, whatever the current setting.
+
+**Per-worker L1.** Values read from or written to Redis are also kept, as the stored bytes, in a per-worker LRU
+bounded by ``CACHE_L1_MAX_MB`` (0 disables it). Every Redis write stores a fresh version stamp under
+``cache_version:<key>`` in the same pipeline as the value, and a delete drops both; a worker serves its L1 copy
+only while the stamp it was read at is still the one in Redis, so a hit costs a GET of a few bytes instead of
+the payload. Stamps are random rather than incremented, so a stamp that expired and was rewritten can never
+validate an older copy. Values are decoded on every hit: callers may mutate what they get back.
+
+Postgres writes go through the per-worker write-behind queue (see ``postgres_write_behind``) when it accepts
+them, and are written inline otherwise.
+
+``acquire_lock`` / ``release_lock`` provide short-lived cross-worker locks on the Redis tier (``add`` is an atomic
+SET NX with expiry, the release a compare-and-delete script), for the few read-compare-write sequences that must
+not interleave between workers, and ``add_to_counters`` atomic counters (one script adding every delta, which
+can also delete a Redis key along with the counter that drops to zero). Scripts run on
+the redis-py client behind Django's ``RedisCache``; other backends (the LocMem cache of tests) run the same
+steps under a per-process lock, which is atomic for them since they are per-process too.
+"""
+import lzma
 import os
-from time import perf_counter
-from typing import Optional
+import threading
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from time import monotonic, perf_counter, sleep
+from typing import Any, Dict, Iterable, Optional, Tuple
+from uuid import uuid4
 
 from django.core.cache import caches
 from efootprint.logger import logger
 
+from e_footprint_interface.json_payload_utils import decode_json, encode_json
+from model_builder.adapters.repositories.postgres_write_behind import postgres_write_behind
+
+
+class LockHeldError(Exception):
+    """Raised by ``acquire_lock(..., raise_if_held=True)`` when another holder kept the lock past the wait."""
+
+
+@dataclass
+class _L1Entry:
+    version: str
+    value: bytes
+
+
+class L1Cache:
+    """Thread-safe LRU of stored Redis values bounded by their summed size, tagged with their version stamp."""
+
+    MAX_MB = float(os.environ.get("CACHE_L1_MAX_MB", "64"))
+
+    def __init__(self, max_mb: Optional[float] = None):
+        self.max_bytes = int((self.MAX_MB if max_mb is None else max_mb) * 1024 * 1024)
+        self._entries: "OrderedDict[str, _L1Entry]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[_L1Entry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: str, version: str, value: bytes) -> None:
+        with self._lock:
+            self._pop(key)
+            if not self.enabled or len(value) > self.max_bytes:
+                return
+            self._entries[key] = _L1Entry(version, value)
+            self._total_bytes += len(value)
+            while self._total_bytes > self.max_bytes:
+                self._pop(next(iter(self._entries)))
+
+    def evict(self, key: str) -> None:
+        with self._lock:
+            self._pop(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def _pop(self, key: str) -> Optional[_L1Entry]:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._total_bytes -= len(entry.value)
+        return entry
+
+
+l1_cache = L1Cache()
+
 
 class CacheBackend:
     """Cache backend wrapper with timing and Redis/Postgres fallback."""
@@ -20,6 +126,50 @@ class CacheBackend:
     )
     REDIS_CACHE_TIMEOUT_SECONDS = int(os.environ.get("CACHE_REDIS_TTL_SECONDS", "600"))
     POSTGRES_CACHE_TIMEOUT_SECONDS = int(os.environ.get("CACHE_POSTGRES_TTL_SECONDS", "43200"))
+    COMPRESSION_CODEC = os.environ.get("CACHE_COMPRESSION_CODEC", "zlib")
+    COMPRESSION_LEVEL = int(os.environ.get("CACHE_COMPRESSION_LEVEL", "1"))
+    COMPRESSION_MIN_BYTES = int(os.environ.get("CACHE_COMPRESSION_MIN_BYTES", str(64 * 1024)))
+
+    # Headers of compressed values, by codec name: a NUL byte, the codec tag and a format version.
+    COMPRESSION_HEADERS = {"zlib": b"\x00ZL1", "lzma": b"\x00XZ1"}
+
+    LOCK_POLL_SECONDS = 0.05
+
+    # Deletes the lock only while it still holds the caller's token; the token is compared in its stored form.
+    RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+    # KEYS: per counter, the counter and the two Redis keys deleted with it at zero (value and version stamp).
+    # ARGV: the expiry of created counters, then one delta per counter. Returns the new counts, false for a
+    # missing counter that was not incremented (it is left missing).
+    ADD_TO_COUNTERS_SCRIPT = """
+local counts = {}
+for index = 2, #ARGV do
+    local counter_key = KEYS[3 * index - 5]
+    local delta = tonumber(ARGV[index])
+    if delta > 0 or redis.call('exists', counter_key) == 1 then
+        local count = redis.call('incrby', counter_key, delta)
+        if delta > 0 and redis.call('ttl', counter_key) < 0 then
+            redis.call('expire', counter_key, ARGV[1])
+        end
+        if count <= 0 then
+            redis.call('del', counter_key, KEYS[3 * index - 4], KEYS[3 * index - 3])
+            count = 0
+        end
+        counts[index - 1] = count
+    else
+        counts[index - 1] = false
+    end
+end
+return counts
+"""
+
+    # Serializes the script fallbacks of backends without scripting (per-process caches).
+    _script_fallback_lock = threading.Lock()
 
     @staticmethod
     def _get_cache(alias: str):
@@ -42,20 +192,151 @@ class CacheBackend:
         logger.info(f"{cache_name} cache {action} took {elapsed_ms:.1f} ms")
         return result
 
+    @staticmethod
+    def _compress(codec: str, level: int, data: bytes) -> bytes:
+        if codec == "zlib":
+            return zlib.compress(data, level)
+        return lzma.compress(data, preset=level)
+
+    @staticmethod
+    def _decompress(codec: str, data: memoryview) -> bytes:
+        if codec == "zlib":
+            return zlib.decompress(data)
+        return lzma.decompress(data)
+
+    @classmethod
+    def _encode(cls, value):
+        if isinstance(value, (dict, list)):
+            value = encode_json(value)
+        codec = cls.COMPRESSION_CODEC
+        if (codec not in cls.COMPRESSION_HEADERS or not isinstance(value, (bytes, bytearray))
+                or len(value) < cls.COMPRESSION_MIN_BYTES):
+            return value
+
+        start = perf_counter()
+        compressed_value = cls.COMPRESSION_HEADERS[codec] + cls._compress(codec, cls.COMPRESSION_LEVEL, value)
+        elapsed_ms = (perf_counter() - start) * 1000
+        logger.info(
+            f"{codec} compression of {len(value) / (1024 * 1024):.2f} MB took {elapsed_ms:.1f} ms "
+            f"(ratio {len(value) / len(compressed_value):.1f}x)")
+        if len(compressed_value) >= len(value):
+            return value
+        return compressed_value
+
+    @classmethod
+    def _decode(cls, value):
+        if not isinstance(value, (bytes, bytearray, memoryview)):
+            return value
+        for codec, header in cls.COMPRESSION_HEADERS.items():
+            if value[:len(header)] == header:
+                start = perf_counter()
+                value = cls._decompress(codec, memoryview(value)[len(header):])
+                elapsed_ms = (perf_counter() - start) * 1000
+                logger.info(f"{codec} decompression to {len(value) / (1024 * 1024):.2f} MB took {elapsed_ms:.1f} ms")
+                break
+        return decode_json(value)
+
+    @staticmethod
+    def _redis_client(redis_cache):
+        """The redis-py client behind Django's ``RedisCache``, or None for backends without scripting."""
+        cache_client = getattr(redis_cache, "_cache", None)
+        if not hasattr(cache_client, "get_client"):
+            return None
+        return cache_client
+
+    def _run_script(self, redis_cache, script: str, keys: list, args: list, fallback):
+        """Run the Lua ``script`` over ``keys`` atomically, or ``fallback()`` under a per-process lock.
+
+        ``args`` are serialized as the cache stores values (Django's ``RedisSerializer``: ints raw, the rest
+        pickled), so a script can compare them with stored values or add them to counters.
+        """
+        cache_client = self._redis_client(redis_cache)
+        if cache_client is None:
+            with self._script_fallback_lock:
+                return fallback()
+        redis_keys = [redis_cache.make_and_validate_key(key) for key in keys]
+        client = cache_client.get_client(redis_keys[0] if redis_keys else None, write=True)
+        return client.register_script(script)(
+            keys=redis_keys, args=[cache_client._serializer.dumps(arg) for arg in args])
+
+    @staticmethod
+    def _version_key(cache_key: str) -> str:
+        return f"cache_version:{cache_key}"
+
+    def _get_through_l1(self, redis_cache, cache_key: str):
+        if not l1_cache.enabled:
+            return self._decode(redis_cache.get(cache_key))
+
+        version_key = self._version_key(cache_key)
+        entry = l1_cache.get(cache_key)
+        if entry is not None:
+            if redis_cache.get(version_key) == entry.version:
+                logger.info(f"L1 cache hit for {cache_key} ({len(entry.value) / (1024 * 1024):.2f} MB)")
+                return self._decode(entry.value)
+            l1_cache.evict(cache_key)
+
+        stored = redis_cache.get_many([cache_key, version_key])
+        value, version = stored.get(cache_key), stored.get(version_key)
+        if isinstance(value, bytes) and version is not None:
+            l1_cache.put(cache_key, version, value)
+        return self._decode(value)
+
+    def _get_many_through_l1(self, redis_cache, cache_keys: list) -> Dict[str, Any]:
+        if not l1_cache.enabled:
+            return {key: self._decode(value) for key, value in redis_cache.get_many(cache_keys).items()}
+
+        entries = {key: l1_cache.get(key) for key in cache_keys}
+        entries = {key: entry for key, entry in entries.items() if entry is not None}
+        stored = redis_cache.get_many(
+            [self._version_key(key) for key in cache_keys] + [key for key in cache_keys if key not in entries])
+        stale_keys = [key for key, entry in entries.items() if stored.get(self._version_key(key)) != entry.version]
+        if stale_keys:
+            for key in stale_keys:
+                l1_cache.evict(key)
+                del entries[key]
+            stored.update(redis_cache.get_many(stale_keys + [self._version_key(key) for key in stale_keys]))
+
+        values = {}
+        for key in cache_keys:
+            if key in entries:
+                logger.info(f"L1 cache hit for {key} ({len(entries[key].value) / (1024 * 1024):.2f} MB)")
+                values[key] = self._decode(entries[key].value)
+                continue
+            value, version = stored.get(key), stored.get(self._version_key(key))
+            if isinstance(value, bytes) and version is not None:
+                l1_cache.put(key, version, value)
+            if value is not None:
+                values[key] = self._decode(value)
+        return values
+
+    @staticmethod
+    def _get_postgres(postgres_cache, cache_key: str):
+        pending_value = postgres_write_behind.pending_value(cache_key)
+        return postgres_cache.get(cache_key) if pending_value is None else pending_value
+
+    @staticmethod
+    def _get_many_postgres(postgres_cache, cache_keys: list) -> Dict[str, Any]:
+        values = {key: postgres_write_behind.pending_value(key) for key in cache_keys}
+        values = {key: value for key, value in values.items() if value is not None}
+        unqueued_keys = [key for key in cache_keys if key not in values]
+        if unqueued_keys:
+            values.update(postgres_cache.get_many(unqueued_keys))
+        return values
+
     def get(self, cache_key: str):
         redis_cache = self._get_cache(self.REDIS_CACHE_ALIAS)
         postgres_cache = self._get_cache(self.POSTGRES_CACHE_ALIAS)
 
         if redis_cache is not None:
             cached_data = self._time_cache_call(
-                "get", self.REDIS_CACHE_ALIAS, lambda: redis_cache.get(cache_key)
+                "get", self.REDIS_CACHE_ALIAS, lambda: self._get_through_l1(redis_cache, cache_key)
             )
             if cached_data is not None:
                 return cached_data
 
         if postgres_cache is not None:
             cached_data = self._time_cache_call(
-                "get", self.POSTGRES_CACHE_ALIAS, lambda: postgres_cache.get(cache_key)
+                "get", self.POSTGRES_CACHE_ALIAS, lambda: self._decode(self._get_postgres(postgres_cache, cache_key))
             )
             if cached_data is not None:
                 return cached_data
@@ -68,20 +349,53 @@ class CacheBackend:
 
         if redis_cache is not None:
             cached_data = self._time_cache_call(
-                "get", self.REDIS_CACHE_ALIAS, lambda: redis_cache.get(cache_key)
+                "get", self.REDIS_CACHE_ALIAS, lambda: self._get_through_l1(redis_cache, cache_key)
             )
             if cached_data is not None:
                 return cached_data, "redis"
 
         if postgres_cache is not None:
             cached_data = self._time_cache_call(
-                "get", self.POSTGRES_CACHE_ALIAS, lambda: postgres_cache.get(cache_key)
+                "get", self.POSTGRES_CACHE_ALIAS, lambda: self._decode(self._get_postgres(postgres_cache, cache_key))
             )
             if cached_data is not None:
                 return cached_data, "postgres"
 
         return None, None
 
+    def get_many_with_source(self, cache_keys: Iterable[str]) -> Dict[str, Tuple[Any, Optional[str]]]:
+        """Like ``get_with_source`` for several keys, in one round trip per cache tier.
+
+        Returns ``(value, source)`` for every requested key, ``(None, None)`` for keys found in neither tier.
+        """
+        cache_keys = list(cache_keys)
+        redis_cache = self._get_cache(self.REDIS_CACHE_ALIAS)
+        postgres_cache = self._get_cache(self.POSTGRES_CACHE_ALIAS)
+        results = {key: (None, None) for key in cache_keys}
+
+        if redis_cache is not None and cache_keys:
+            cached_data = self._time_cache_call(
+                "get_many", self.REDIS_CACHE_ALIAS, lambda: self._get_many_through_l1(redis_cache, cache_keys),
+                default={}
+            )
+            results.update({key: (value, "redis") for key, value in cached_data.items()})
+
+        missing_keys = [key for key, (value, _source) in results.items() if value is None]
+        if postgres_cache is not None and missing_keys:
+            cached_data = self._time_cache_call(
+                "get_many", self.POSTGRES_CACHE_ALIAS,
+                lambda: {key: self._decode(value) for key, value in self._get_many_postgres(
+                    postgres_cache, missing_keys).items()},
+                default={}
+            )
+            results.update({key: (value, "postgres") for key, value in cached_data.items() if value is not None})
+
+        return results
+
+    def get_many(self, cache_keys: Iterable[str]) -> Dict[str, Any]:
+        """Like ``get`` for several keys, in one round trip per cache tier; missing keys map to None."""
+        return {key: value for key, (value, _source) in self.get_many_with_source(cache_keys).items()}
+
     def set(
         self,
         cache_key: str,
@@ -93,39 +407,254 @@ class CacheBackend:
     ) -> None:
         redis_cache = self._get_cache(self.REDIS_CACHE_ALIAS)
         postgres_cache = self._get_cache(self.POSTGRES_CACHE_ALIAS)
+        value = self._encode(value)
 
         if write_redis and redis_cache is not None:
-            self._time_cache_call(
+            # Evicted first: if the write fails, this worker must not keep serving the value it replaces.
+            l1_cache.evict(cache_key)
+            version = uuid4().hex
+            failed_keys = self._time_cache_call(
                 "set", self.REDIS_CACHE_ALIAS,
-                lambda: redis_cache.set(
-                    cache_key,
-                    value,
+                lambda: redis_cache.set_many(
+                    {cache_key: value, self._version_key(cache_key): version},
                     timeout=redis_timeout_seconds or self.REDIS_CACHE_TIMEOUT_SECONDS,
                 ),
             )
+            if failed_keys == [] and isinstance(value, bytes):
+                l1_cache.put(cache_key, version, value)
         if write_postgres and postgres_cache is not None:
-            set_result = self._time_cache_call(
-                "set", self.POSTGRES_CACHE_ALIAS,
-                lambda: postgres_cache.set(
-                    cache_key,
-                    value,
-                    timeout=postgres_timeout_seconds or self.POSTGRES_CACHE_TIMEOUT_SECONDS,
+            timeout = postgres_timeout_seconds or self.POSTGRES_CACHE_TIMEOUT_SECONDS
+            if not postgres_write_behind.submit(cache_key, value, timeout):
+                self.set_postgres(cache_key, value, timeout)
+
+    def set_postgres(self, cache_key: str, value, timeout: int) -> None:
+        """Write an encoded value to the Postgres tier now (the write-behind queue's flush)."""
+        postgres_cache = self._get_cache(self.POSTGRES_CACHE_ALIAS)
+        set_result = self._time_cache_call(
+            "set", self.POSTGRES_CACHE_ALIAS, lambda: postgres_cache.set(cache_key, value, timeout=timeout))
+        # DatabaseCache.set returns False when it silently drops a write under DB-lock contention
+        # ("allowed to fail silently to be threadsafe"). Surface it so lost writes aren't invisible.
+        if set_result is False:
+            logger.warning(f"{self.POSTGRES_CACHE_ALIAS} cache set for key {cache_key} was dropped (write lost)")
+
+    def set_many(
+        self,
+        values: Dict[str, Any],
+        redis_timeout_seconds: Optional[int] = None,
+        postgres_timeout_seconds: Optional[int] = None,
+        write_redis: bool = True,
+        write_postgres: bool = True,
+    ) -> None:
+        """Like ``set`` for several keys, in one round trip per cache tier."""
+        redis_cache = self._get_cache(self.REDIS_CACHE_ALIAS)
+        postgres_cache = self._get_cache(self.POSTGRES_CACHE_ALIAS)
+        values = {key: self._encode(value) for key, value in values.items()}
+
+        if write_redis and redis_cache is not None:
+            versions = {key: uuid4().hex for key in values}
+            for key in values:
+                l1_cache.evict(key)
+            failed_keys = self._time_cache_call(
+                "set_many", self.REDIS_CACHE_ALIAS,
+                lambda: redis_cache.set_many(
+                    {**values, **{self._version_key(key): version for key, version in versions.items()}},
+                    timeout=redis_timeout_seconds or self.REDIS_CACHE_TIMEOUT_SECONDS,
                 ),
             )
-            # DatabaseCache.set returns False when it silently drops a write under DB-lock contention
-            # ("allowed to fail silently to be threadsafe"). Surface it so lost writes aren't invisible.
-            if set_result is False:
-                logger.warning(f"{self.POSTGRES_CACHE_ALIAS} cache set for key {cache_key} was dropped (write lost)")
+            if failed_keys == []:
+                for key, value in values.items():
+                    if isinstance(value, bytes):
+                        l1_cache.put(key, versions[key], value)
+        if write_postgres and postgres_cache is not None:
+            timeout = postgres_timeout_seconds or self.POSTGRES_CACHE_TIMEOUT_SECONDS
+            values = {key: value for key, value in values.items()
+                      if not postgres_write_behind.submit(key, value, timeout)}
+            if not values:
+                return
+            failed_keys = self._time_cache_call(
+                "set_many", self.POSTGRES_CACHE_ALIAS, lambda: postgres_cache.set_many(values, timeout=timeout))
+            if failed_keys:
+                logger.warning(f"{self.POSTGRES_CACHE_ALIAS} cache set_many dropped keys {failed_keys} (writes lost)")
 
     def delete(self, cache_key: str) -> None:
         redis_cache = self._get_cache(self.REDIS_CACHE_ALIAS)
         postgres_cache = self._get_cache(self.POSTGRES_CACHE_ALIAS)
 
         if redis_cache is not None:
+            l1_cache.evict(cache_key)
             self._time_cache_call(
-                "delete", self.REDIS_CACHE_ALIAS, lambda: redis_cache.delete(cache_key)
+                "delete", self.REDIS_CACHE_ALIAS,
+                lambda: redis_cache.delete_many([cache_key, self._version_key(cache_key)])
             )
         if postgres_cache is not None:
+            postgres_write_behind.discard(cache_key)
             self._time_cache_call(
                 "delete", self.POSTGRES_CACHE_ALIAS, lambda: postgres_cache.delete(cache_key)
             )
+
+    def delete_many(self, cache_keys: Iterable[str]) -> None:
+        """Like ``delete`` for several keys, in one round trip per cache tier."""
+        cache_keys = list(cache_keys)
+        redis_cache = self._get_cache(self.REDIS_CACHE_ALIAS)
+        postgres_cache = self._get_cache(self.POSTGRES_CACHE_ALIAS)
+        if not cache_keys:
+            return
+
+        if redis_cache is not None:
+            for key in cache_keys:
+                l1_cache.evict(key)
+            self._time_cache_call(
+                "delete_many", self.REDIS_CACHE_ALIAS,
+                lambda: redis_cache.delete_many(cache_keys + [self._version_key(key) for key in cache_keys])
+            )
+        if postgres_cache is not None:
+            for key in cache_keys:
+                postgres_write_behind.discard(key)
+            self._time_cache_call(
+                "delete_many", self.POSTGRES_CACHE_ALIAS, lambda: postgres_cache.delete_many(cache_keys)
+            )
+
+    def touch_many(
+        self,
+        cache_keys: Iterable[str],
+        redis_timeout_seconds: Optional[int] = None,
+        postgres_timeout_seconds: Optional[int] = None,
+        touch_redis: bool = True,
+        touch_postgres: bool = True,
+    ) -> None:
+        """Reset the expiry of several stored keys without rewriting their values; missing keys are skipped.
+
+        In Redis the version stamps of the keys are touched with them, all in one pipelined round trip, so a
+        touched value never outlives its stamp (which would make the L1 cache refetch it on every read).
+        """
+        cache_keys = list(cache_keys)
+        redis_cache = self._get_cache(self.REDIS_CACHE_ALIAS)
+        postgres_cache = self._get_cache(self.POSTGRES_CACHE_ALIAS)
+        if not cache_keys:
+            return
+
+        if touch_redis and redis_cache is not None:
+            timeout = redis_timeout_seconds or self.REDIS_CACHE_TIMEOUT_SECONDS
+            redis_keys = cache_keys + [self._version_key(key) for key in cache_keys]
+            self._time_cache_call(
+                "touch_many", self.REDIS_CACHE_ALIAS, lambda: self._touch_redis(redis_cache, redis_keys, timeout))
+        if touch_postgres and postgres_cache is not None:
+            timeout = postgres_timeout_seconds or self.POSTGRES_CACHE_TIMEOUT_SECONDS
+            touch_many = getattr(postgres_cache, "touch_many", None)
+            self._time_cache_call(
+                "touch_many", self.POSTGRES_CACHE_ALIAS,
+                lambda: touch_many(cache_keys, timeout) if touch_many is not None
+                else [postgres_cache.touch(key, timeout) for key in cache_keys]
+            )
+
+    def _touch_redis(self, redis_cache, cache_keys: list, timeout: int) -> None:
+        cache_client = self._redis_client(redis_cache)
+        if cache_client is None:
+            for key in cache_keys:
+                redis_cache.touch(key, timeout)
+            return
+        pipeline = cache_client.get_client(write=True).pipeline(transaction=False)
+        backend_timeout = redis_cache.get_backend_timeout(timeout)
+        for key in cache_keys:
+            pipeline.expire(redis_cache.make_and_validate_key(key), backend_timeout)
+        pipeline.execute()
+
+    def add_to_counters(
+        self,
+        deltas: Dict[str, int],
+        timeout_seconds: int,
+        delete_at_zero: Optional[Dict[str, str]] = None,
+    ) -> Dict[str, Optional[int]]:
+        """Atomically add ``deltas`` to integer counters in the Redis tier and return their new values.
+
+        A counter incremented while missing starts from 0 and expires after ``timeout_seconds``; a missing
+        counter is never decremented (its new value is None). A counter that drops to zero is deleted, together
+        with the Redis copy of the key ``delete_at_zero`` maps it to, in the same atomic step, so no other
+        update can interleave between the count and the delete. Postgres is never touched: counters only know
+        about Redis, and may have restarted from zero after an eviction. Counters are best effort, like locks:
+        an unreachable Redis returns no values.
+        """
+        redis_cache = self._get_cache(self.REDIS_CACHE_ALIAS)
+        if redis_cache is None or not deltas:
+            return {}
+        delete_at_zero = delete_at_zero or {}
+        counter_keys = list(deltas)
+        deleted_keys = {key: delete_at_zero.get(key) for key in counter_keys}
+
+        def add_in_process():
+            counts = []
+            for key in counter_keys:
+                delta = deltas[key]
+                if delta > 0:
+                    redis_cache.add(key, 0, timeout_seconds)
+                try:
+                    count = redis_cache.incr(key, delta)
+                except ValueError:
+                    counts.append(None)
+                    continue
+                if count <= 0:
+                    redis_cache.delete_many([key] + ([deleted_keys[key], self._version_key(deleted_keys[key])]
+                                                     if deleted_keys[key] else []))
+                    count = 0
+                counts.append(count)
+            return counts
+
+        def add():
+            script_keys = []
+            for key in counter_keys:
+                # A counter without a key to delete names itself instead: deleting it twice is harmless.
+                deleted_key = deleted_keys[key] or key
+                script_keys += [key, deleted_key, self._version_key(deleted_key)]
+            counts = dict(zip(counter_keys, self._run_script(
+                redis_cache, self.ADD_TO_COUNTERS_SCRIPT, script_keys,
+                [timeout_seconds, *(deltas[key] for key in counter_keys)], add_in_process)))
+            for key, count in counts.items():
+                if count == 0 and deleted_keys[key]:
+                    l1_cache.evict(deleted_keys[key])
+            return counts
+
+        return self._time_cache_call("add_to_counters", self.REDIS_CACHE_ALIAS, add, default={})
+
+    def acquire_lock(
+        self, name: str, ttl_seconds: int, wait_seconds: float, raise_if_held: bool = False) -> Optional[str]:
+        """Take the lock ``name`` in the Redis tier, waiting up to ``wait_seconds`` while another holder has it.
+
+        Returns the token to release it with, or None when Redis is unreachable: locks are best effort, and
+        callers proceed without one. A lock that stayed held also returns None, unless ``raise_if_held`` asks
+        for a ``LockHeldError`` so that a caller that must not proceed concurrently can tell the two apart.
+        """
+        redis_cache = self._get_cache(self.REDIS_CACHE_ALIAS)
+        lock_key, token = f"lock:{name}", uuid4().hex
+        deadline = monotonic() + wait_seconds
+        try:
+            while not redis_cache.add(lock_key, token, ttl_seconds):
+                if monotonic() >= deadline:
+                    logger.warning(f"Lock {name} still held after {wait_seconds} s")
+                    if raise_if_held:
+                        raise LockHeldError(name)
+                    return None
+                sleep(self.LOCK_POLL_SECONDS)
+        except LockHeldError:
+            raise
+        except Exception as exc:  # noqa: BLE001
+            logger.warning(f"Lock {name} unavailable: {exc}")
+            return None
+        return token
+
+    def release_lock(self, name: str, token: str) -> None:
+        """Release the lock ``name`` if ``token`` still holds it (it may have expired and been retaken).
+
+        The comparison and the delete run as one script, so a lock that expired and was taken by another
+        holder in between is never deleted.
+        """
+        redis_cache = self._get_cache(self.REDIS_CACHE_ALIAS)
+        lock_key = f"lock:{name}"
+
+        def compare_and_delete():
+            if redis_cache.get(lock_key) == token:
+                redis_cache.delete(lock_key)
+
+        try:
+            self._run_script(redis_cache, self.RELEASE_LOCK_SCRIPT, [lock_key], [token], compare_and_delete)
+        except Exception as exc:  # noqa: BLE001
+            logger.warning(f"Could not release lock {name}: {exc}")
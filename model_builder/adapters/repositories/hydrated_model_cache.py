@@ -0,0 +1,262 @@
+"""Per-worker LRU cache of hydrated e-footprint object graphs.
+
+Hydrating a ``ModelWeb`` (``json_to_system`` over the whole payload) dominates request latency on large
+models, yet most HTMX requests are reads against a model that did not change since the previous click.
+This cache keeps the hydrated graph of recently used slots in process memory, keyed by
+``(session key, slot)`` and tagged with the slot's payload version stamp (see ``WorkspaceIndex``): a
+lookup only hits when the stamp it asks for is the one the graph was cached under, so any
+``save_data`` — which mints a new stamp — invalidates the previous graph without having to reach it.
+
+**Checkout, not share.** Views mutate the efootprint objects in place, and a mutation that fails half-way
+must never leak into the next request. A lookup therefore *removes* the graph from the cache, and a graph
+only comes back when the request using it ends successfully (``end_request``): under the freshly saved stamp
+when ``ModelWeb.persist_to_cache`` handed it in (``put``, the graph then is exactly the stored state), under
+the stamp it was checked out at otherwise. A graph hydrated from the stored payload on a miss is recorded as
+a checkout of the request too (``hold``), so reads warm the cache after an eviction, a worker restart or a
+new login, not only the next save. No two requests ever hold the same graph. A failed request drops its
+checkouts (``discard_request_checkouts``), so the next one re-hydrates from the stored payload. Outside a
+request scope (tests, management commands) checkouts are simply not returned, and ``put`` caches at once.
+
+**Single flight.** HTMX fires several requests at once against the same model (result chart, sankey
+cards, one sankey diagram per card). Inside a request scope, a miss that the caller will hydrate holds the
+key's *flight* until the hydration is over (``end_hydration``) or the refreshed graph is handed in (``put``),
+whichever comes first; concurrent requests of the worker asking for the same key wait for it
+(``HYDRATION_SINGLE_FLIGHT_WAIT_SECONDS``) and then hydrate from the payload the first request refreshed.
+They never take the first request's graph, which it is still rendering from. What the flight saves is the
+expensive part of a hydration, recomputing stale calculated attributes (or those of a payload only Postgres
+kept) once; ``ModelWeb`` ends the flight as soon as it knows the stored payload needs no refresh, so
+requests for a payload that can be trusted as is hydrate side by side. A hit holds no flight. Across workers,
+the hydrating request also holds a short-lived lock in the Redis cache alias (``RedisHydrationLock``) over
+the same span, so other workers wait for it and then read that payload instead of recomputing the same stale
+calculated attributes. The in-worker flight only matters with threaded workers (gunicorn ``gthread``, e.g.
+``GUNICORN_CMD_ARGS="--threads 4"``) and the lock with several workers; the shipped ``gunicorn.conf.py``
+runs a single sync worker, where neither ever waits.
+
+The memory ceiling is expressed on the slot's with-calculated-attributes JSON size, the weight the
+workspace index already records for the payload budget; it is a stable proxy for the graph footprint.
+"""
+import os
+import threading
+from collections import OrderedDict
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from time import monotonic
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from efootprint.logger import logger
+
+
+@dataclass
+class _CacheEntry:
+    version: str
+    value: Any
+    weight_bytes: int
+
+
+@dataclass
+class _RequestScope:
+    checkouts: Dict[Hashable, _CacheEntry] = field(default_factory=dict)
+    # Keys whose flight the request holds, with the (version, token) of the cross-worker lock it took, if any.
+    flights: Dict[Hashable, Optional[Tuple[str, Optional[str]]]] = field(default_factory=dict)
+
+
+_request_scope: ContextVar[Optional[_RequestScope]] = ContextVar("hydrated_model_request_scope", default=None)
+
+
+class RedisHydrationLock:
+    """Cross-worker half of the single-flight guard: a short-lived lock in the Redis cache alias."""
+
+    TTL_SECONDS = int(os.environ.get("HYDRATION_LOCK_TTL_SECONDS", "30"))
+
+    @staticmethod
+    def _lock_name(key: Hashable, version: str) -> str:
+        parts = key if isinstance(key, tuple) else (key,)
+        return ":".join(["hydration", *map(str, parts), version])
+
+    def acquire(self, key: Hashable, version: str, wait_seconds: float) -> Optional[str]:
+        """Take the lock of ``key`` at ``version``, waiting up to ``wait_seconds`` for another worker's."""
+        from model_builder.adapters.repositories.cache_backend import CacheBackend
+
+        return CacheBackend().acquire_lock(self._lock_name(key, version), self.TTL_SECONDS, wait_seconds)
+
+    def release(self, key: Hashable, version: str, token: str) -> None:
+        from model_builder.adapters.repositories.cache_backend import CacheBackend
+
+        CacheBackend().release_lock(self._lock_name(key, version), token)
+
+
+class HydratedModelCache:
+    """Thread-safe LRU of hydrated graphs bounded by entry count and summed weight."""
+
+    MAX_MB = float(os.environ.get("HYDRATED_MODEL_CACHE_MAX_MB", "256"))
+    MAX_ENTRIES = int(os.environ.get("HYDRATED_MODEL_CACHE_MAX_ENTRIES", "32"))
+    SINGLE_FLIGHT_WAIT_SECONDS = float(os.environ.get("HYDRATION_SINGLE_FLIGHT_WAIT_SECONDS", "30"))
+
+    def __init__(self, max_mb: Optional[float] = None, max_entries: Optional[int] = None,
+                 single_flight_wait_seconds: Optional[float] = None,
+                 distributed_lock: Optional[RedisHydrationLock] = None):
+        self.max_bytes = int((self.MAX_MB if max_mb is None else max_mb) * 1024 * 1024)
+        self.max_entries = self.MAX_ENTRIES if max_entries is None else max_entries
+        self.single_flight_wait_seconds = (
+            self.SINGLE_FLIGHT_WAIT_SECONDS if single_flight_wait_seconds is None else single_flight_wait_seconds)
+        self.distributed_lock = distributed_lock
+        self._entries: "OrderedDict[Hashable, _CacheEntry]" = OrderedDict()
+        self._total_bytes = 0
+        self._flights: Dict[Hashable, threading.Event] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0 and self.max_entries > 0
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def take(self, key: Hashable, version: str) -> Optional[Any]:
+        """Check out the graph cached for ``key`` at ``version``; a graph cached at another version is dropped.
+
+        Inside a request scope, waits for the graph another request of the worker is hydrating, and on a miss
+        holds the key's flight (and cross-worker lock) until the caller calls ``end_hydration``.
+        """
+        scope = _request_scope.get()
+        entry = self._checkout(key, scope)
+        if entry is None or entry.version != version:
+            logger.info(f"Hydrated model cache miss for {key}")
+            if self.distributed_lock is not None and scope is not None and key in scope.flights \
+                    and scope.flights[key] is None:
+                scope.flights[key] = (
+                    version, self.distributed_lock.acquire(key, version, self.single_flight_wait_seconds))
+            return None
+        if scope is not None:
+            scope.checkouts[key] = entry
+            self._release_flight(key, scope)
+        logger.info(f"Hydrated model cache hit for {key} ({entry.weight_bytes / (1024 * 1024):.2f} MB)")
+        return entry.value
+
+    def _checkout(self, key: Hashable, scope: Optional[_RequestScope]) -> Optional[_CacheEntry]:
+        deadline = monotonic() + self.single_flight_wait_seconds
+        while True:
+            with self._lock:
+                flight = self._flights.get(key)
+                if scope is None or key in scope.flights:
+                    return self._pop(key)
+                if flight is None:
+                    self._flights[key] = threading.Event()
+                    scope.flights[key] = None
+                    return self._pop(key)
+                if monotonic() >= deadline:
+                    logger.warning(f"Gave up waiting for the in-flight hydration of {key}")
+                    return self._pop(key)
+            logger.info(f"Waiting for the in-flight hydration of {key}")
+            flight.wait(max(0.0, deadline - monotonic()))
+
+    def hold(self, key: Hashable, version: str, value: Any, weight_bytes: int) -> None:
+        """Record ``value``, just hydrated from the payload at ``version``, as checked out by the current request.
+
+        It joins the cache when the request succeeds, like a graph taken from it; outside a request scope it is
+        dropped.
+        """
+        scope = _request_scope.get()
+        if scope is not None:
+            scope.checkouts[key] = _CacheEntry(version, value, weight_bytes)
+
+    def end_hydration(self, key: Hashable) -> None:
+        """Release the flight (and cross-worker lock) the current request took to hydrate ``key``, if any."""
+        scope = _request_scope.get()
+        if scope is not None:
+            self._release_flight(key, scope)
+
+    def _release_flight(self, key: Hashable, scope: _RequestScope) -> None:
+        if key not in scope.flights:
+            return
+        held_lock = scope.flights.pop(key)
+        with self._lock:
+            flight = self._flights.pop(key, None)
+        if flight is not None:
+            flight.set()
+        if held_lock is not None and held_lock[1] is not None:
+            version, token = held_lock
+            self.distributed_lock.release(key, version, token)
+
+    def contains(self, key: Hashable, version: str) -> bool:
+        """Whether a ``take`` of ``key`` at ``version`` would hit, without checking the graph out."""
+        with self._lock:
+            entry = self._entries.get(key)
+        return entry is not None and entry.version == version
+
+    def put(self, key: Hashable, version: str, value: Any, weight_bytes: int) -> None:
+        """Cache ``value`` as the graph of ``key`` at ``version``, evicting least recently used graphs.
+
+        Inside a request scope the request still renders from the graph: it replaces the request's checkout
+        (which must not come back under its stale stamp) and joins the cache when the request succeeds.
+        """
+        scope = _request_scope.get()
+        if scope is None:
+            self._insert(key, version, value, weight_bytes)
+            return
+        self.hold(key, version, value, weight_bytes)
+        self._release_flight(key, scope)
+
+    def _insert(self, key: Hashable, version: str, value: Any, weight_bytes: int) -> None:
+        if not self.enabled or weight_bytes > self.max_bytes:
+            return
+        with self._lock:
+            self._pop(key)
+            self._entries[key] = _CacheEntry(version, value, weight_bytes)
+            self._total_bytes += weight_bytes
+            while len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes:
+                evicted_key = next(iter(self._entries))
+                self._pop(evicted_key)
+                logger.info(f"Hydrated model cache evicted {evicted_key}")
+
+    def evict(self, key: Hashable) -> None:
+        scope = _request_scope.get()
+        if scope is not None:
+            scope.checkouts.pop(key, None)
+        with self._lock:
+            self._pop(key)
+        if scope is not None:
+            self._release_flight(key, scope)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def _pop(self, key: Hashable) -> Optional[_CacheEntry]:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._total_bytes -= entry.weight_bytes
+        return entry
+
+    def begin_request(self):
+        """Open a request scope in which checkouts are tracked; returns the token for ``end_request``."""
+        return _request_scope.set(_RequestScope())
+
+    def discard_request_checkouts(self) -> None:
+        """Forget the graphs checked out by the current request: they may hold a half-applied mutation."""
+        scope = _request_scope.get()
+        if scope is not None:
+            scope.checkouts.clear()
+
+    def end_request(self, token, succeeded: bool) -> None:
+        """Close the request scope, returning its still-checked-out graphs to the cache if it succeeded.
+
+        Flights still held (a hydration that raised) are released either way, once the graphs are back.
+        """
+        scope = _request_scope.get() or _RequestScope()
+        _request_scope.reset(token)
+        try:
+            if succeeded:
+                for key, entry in scope.checkouts.items():
+                    self._insert(key, entry.version, entry.value, entry.weight_bytes)
+        finally:
+            for key in list(scope.flights):
+                self._release_flight(key, scope)
+
+
+hydrated_model_cache = HydratedModelCache(distributed_lock=RedisHydrationLock())
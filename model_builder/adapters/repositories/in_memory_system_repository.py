@@ -8,9 +8,9 @@ from copy import deepcopy
 from typing import Dict, Any, List, Optional, Tuple
 
 from e_footprint_interface import __version__ as interface_version
-from e_footprint_interface.json_payload_utils import compute_json_size
+from e_footprint_interface.json_payload_utils import compute_json_size, encode_json_payload
 from model_builder.domain.exceptions import PayloadSizeLimitExceeded
-from model_builder.domain.interfaces import ISystemRepository
+from model_builder.domain.interfaces import EncodedObject, ISystemRepository
 from model_builder.adapters.repositories.workspace_base import WorkspaceRepositoryBase
 
 
@@ -49,6 +49,7 @@ class InMemorySystemRepository(ISystemRepository):
             if initial_data and "interface_config" in initial_data
             else None
         )
+        self._system_emissions: Optional[Dict[str, Any]] = None
 
     def get_system_data(self) -> Optional[Dict[str, Any]]:
         """Retrieve the current system data from memory.
@@ -62,6 +63,13 @@ class InMemorySystemRepository(ISystemRepository):
         """Retrieve the current system data with a source label."""
         return self._data, "memory" if self._data is not None else None
 
+    def get_system_emissions(self) -> Optional[Dict[str, Any]]:
+        return self._system_emissions
+
+    def save_system_emissions(self, system_emissions: Dict[str, Any]) -> None:
+        if self._data is not None:
+            self._system_emissions = system_emissions
+
     @property
     def interface_config(self) -> dict:
         if self._interface_config is None and self._data and "interface_config" in self._data:
@@ -75,7 +83,12 @@ class InMemorySystemRepository(ISystemRepository):
     def save_data(
         self,
         data: Dict[str, Any],
-        data_without_calculated_attributes: Optional[Dict[str, Any]] = None
+        data_without_calculated_attributes: Optional[Dict[str, Any]] = None,
+        encoded_data: Optional[bytes] = None,
+        encoded_data_without_calculated_attributes: Optional[bytes] = None,
+        system_emissions: Optional[Dict[str, Any]] = None,
+        encoded_objects: Optional[Dict[str, EncodedObject]] = None,
+        encoded_objects_without_calculated_attributes: Optional[Dict[str, EncodedObject]] = None,
     ) -> None:
         """Store the system data in memory.
 
@@ -83,22 +96,40 @@ class InMemorySystemRepository(ISystemRepository):
             data: The system data dictionary to save.
             data_without_calculated_attributes: Optional version without calculated attributes.
                 Ignored for the in-memory repository.
+            encoded_data: Optional compact JSON encoding of ``data`` as passed, reused for the size check.
+            encoded_data_without_calculated_attributes: Ignored for the in-memory repository.
+            system_emissions: Optional daily emissions of ``data``, kept until the next save.
+            encoded_objects: Ignored for the in-memory repository.
+            encoded_objects_without_calculated_attributes: Ignored for the in-memory repository.
 
         Raises:
             PayloadSizeLimitExceeded: If max_payload_size_mb is set and data exceeds the limit.
         """
-        if self._interface_config is not None:
-            for payload in (data, data_without_calculated_attributes):
-                if payload is not None:
-                    payload["interface_config"] = deepcopy(self._interface_config)
-                    payload["efootprint_interface_version"] = interface_version
+        # A pre-encoded payload stays usable when stamping only adds keys to it: they are spliced in.
+        stamped_keys = ("interface_config", "efootprint_interface_version")
+        if any(key in data for key in stamped_keys):
+            encoded_data = None
+        for payload in (data, data_without_calculated_attributes):
+            if payload is None:
+                continue
+            if self._interface_config is not None:
+                payload["interface_config"] = deepcopy(self._interface_config)
+                payload["efootprint_interface_version"] = interface_version
+            else:
+                # Stamp payloads without config too: ModelWeb only trusts stored calculated attributes
+                # written by the running interface version.
+                payload.setdefault("efootprint_interface_version", interface_version)
 
         if self._max_payload_size_mb is not None:
-            size_result = compute_json_size(data)
+            if encoded_data is None:
+                size_result = compute_json_size(data)
+            else:
+                _, size_result = encode_json_payload(data, encoded_data, stamped_keys)
             if size_result.size_mb > self._max_payload_size_mb:
                 raise PayloadSizeLimitExceeded(size_result.size_mb, self._max_payload_size_mb)
 
         self._data = data
+        self._system_emissions = system_emissions
 
     def has_system_data(self) -> bool:
         """Check if system data exists.
@@ -112,6 +143,7 @@ class InMemorySystemRepository(ISystemRepository):
         """Clear system data from memory."""
         self._data = None
         self._interface_config = None
+        self._system_emissions = None
 
 
 class InMemoryWorkspaceRepository(WorkspaceRepositoryBase):
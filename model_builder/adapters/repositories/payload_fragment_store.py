@@ -0,0 +1,235 @@
+"""Content-addressed storage of slot payloads, shared across sessions.
+
+Many sessions load the same template and never edit most of it, yet each stored its own multi-megabyte copy of
+the payload in both cache tiers. With fragment storage on (``SYSTEM_DATA_FRAGMENT_STORAGE``, on by default), a
+slot's cache key holds a small **manifest** instead: the payload documents with every efootprint object replaced
+by the digest (SHA-256) of its compact JSON encoding. Each object's JSON is stored once, under
+``payload_fragment:<digest>``, and shared by every slot whose object serializes to the same bytes; an edited object
+serializes differently and gets a fragment of its own.
+
+The manifest keeps both documents a save writes: the one with calculated attributes, whose fragments go to Redis,
+and the one without, whose fragments go to Postgres (the same split as whole payloads). It is itself written to
+both tiers. A manifest read from Redis whose fragments Redis no longer fully holds is served from the Postgres
+document instead, which hydration then recomputes, as for any payload only Postgres still holds.
+
+Lifetime:
+
+  - a save writes only the fragments its slot did not reference yet; the fragments it carries over are kept
+    alive with a ``touch`` once they are older than the tier's TTL. Fragments are written and touched for twice
+    the tier's TTL, so they always outlive the manifests referencing them;
+  - ``payload_fragment_refs:<digest>`` counts the manifests referencing a fragment in Redis; a save or a clear
+    that drops the last reference deletes the fragment's Redis copy. The decrement and the delete are one atomic
+    script per counter, and a save that starts referencing the fragment increments before writing it, so a
+    fragment is never deleted while another save starts referencing it. Counters only ever decide Redis
+    deletions: an evicted or restarted counter counts from zero again, so it could release a fragment other
+    manifests still reference, which then read from Postgres. Postgres fragments are never deleted on a count;
+    they expire with their TTL once no save touches them any more.
+
+Payloads stored whole (before fragment storage, or with it turned off) are still read as they are.
+"""
+import os
+from time import time
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+from efootprint.logger import logger
+
+from e_footprint_interface.json_payload_utils import encode_json, json_digest
+from model_builder.adapters.repositories.cache_backend import CacheBackend
+from model_builder.domain.interfaces import EncodedObject
+
+REDIS_TIER = "redis"
+POSTGRES_TIER = "postgres"
+
+
+class PayloadFragmentStore:
+    """Splits slot payloads into shared per-object fragments and assembles them back."""
+
+    ENABLED = os.environ.get("SYSTEM_DATA_FRAGMENT_STORAGE", "1") == "1"
+
+    FRAGMENT_KEY = "payload_fragment"
+    REFS_KEY = "payload_fragment_refs"
+    MANIFEST_VERSION_KEY = "payload_fragments_version"
+    MANIFEST_VERSION = 1
+    WITH_CALCULATED_ATTRIBUTES = "with_calculated_attributes"
+    WITHOUT_CALCULATED_ATTRIBUTES = "without_calculated_attributes"
+    # Top-level payload entries that are not blocks of efootprint objects; they stay in the manifest.
+    DOCUMENT_METADATA_KEYS = ("efootprint_version", "efootprint_interface_version", "Sources", "interface_config")
+
+    def __init__(self, cache_backend: CacheBackend, redis_timeout_seconds: int, postgres_timeout_seconds: int,
+                 enabled: Optional[bool] = None):
+        self._cache_backend = cache_backend
+        self._timeouts = {REDIS_TIER: redis_timeout_seconds, POSTGRES_TIER: postgres_timeout_seconds}
+        self.enabled = self.ENABLED if enabled is None else enabled
+
+    @classmethod
+    def is_manifest(cls, value: Any) -> bool:
+        return isinstance(value, dict) and cls.MANIFEST_VERSION_KEY in value
+
+    @classmethod
+    def fragment_key(cls, digest: str) -> str:
+        return f"{cls.FRAGMENT_KEY}:{digest}"
+
+    @classmethod
+    def refs_key(cls, digest: str) -> str:
+        return f"{cls.REFS_KEY}:{digest}"
+
+    @classmethod
+    def _object_blocks(cls, document: Dict[str, Any]):
+        for class_key, class_block in document.items():
+            if class_key not in cls.DOCUMENT_METADATA_KEYS and isinstance(class_block, dict):
+                yield class_key, class_block
+
+    @classmethod
+    def split(cls, document: Dict[str, Any], encoded_objects: Optional[Dict[str, EncodedObject]] = None
+              ) -> Tuple[Dict[str, Any], Dict[str, bytes]]:
+        """The document with each object replaced by its digest, and the encoded objects by digest.
+
+        Objects found in ``encoded_objects`` (by id, for the very JSON placed in ``document``) keep the encoding
+        and digest the serializer computed; only the others are encoded and hashed here.
+        """
+        manifest_document, fragments = dict(document), {}
+        encoded_objects = encoded_objects or {}
+        for class_key, class_block in cls._object_blocks(document):
+            digests = {}
+            for object_id, object_json in class_block.items():
+                known_encoding = encoded_objects.get(object_id)
+                if known_encoding is not None and known_encoding.object_json is object_json:
+                    encoded_object, digest = known_encoding.encoded, known_encoding.digest
+                else:
+                    encoded_object = encode_json(object_json)
+                    digest = json_digest(encoded_object)
+                fragments[digest] = encoded_object
+                digests[object_id] = digest
+            manifest_document[class_key] = digests
+        return manifest_document, fragments
+
+    @classmethod
+    def digests_of(cls, manifest: Any) -> Dict[str, Set[str]]:
+        """Digests a manifest references, by the tier holding their fragments; none for a whole payload."""
+        if not cls.is_manifest(manifest):
+            return {REDIS_TIER: set(), POSTGRES_TIER: set()}
+        return {
+            tier: {digest for _class_key, digests in cls._object_blocks(manifest[document_key])
+                   for digest in digests.values()}
+            for tier, document_key in ((REDIS_TIER, cls.WITH_CALCULATED_ATTRIBUTES),
+                                       (POSTGRES_TIER, cls.WITHOUT_CALCULATED_ATTRIBUTES))
+        }
+
+    def save(self, data: Dict[str, Any], data_without_calculated_attributes: Optional[Dict[str, Any]],
+             previous_manifest: Any, encoded_objects: Optional[Dict[str, EncodedObject]] = None,
+             encoded_objects_without_calculated_attributes: Optional[Dict[str, EncodedObject]] = None
+             ) -> Dict[str, Any]:
+        """Store the fragments of a slot's new payload and return its manifest, to be written under the slot key.
+
+        Args:
+            data: The payload with calculated attributes (Redis tier).
+            data_without_calculated_attributes: The payload without them (Postgres tier); ``data`` when None.
+            previous_manifest: What the slot key held before this save (a manifest, a whole payload or None).
+            encoded_objects: Optional per-object encodings of ``data``, reused instead of encoding and hashing
+                its objects again (see ``split``).
+            encoded_objects_without_calculated_attributes: Same for ``data_without_calculated_attributes``.
+        """
+        with_document, with_fragments = self.split(data, encoded_objects)
+        if data_without_calculated_attributes is None:
+            without_document, without_fragments = with_document, with_fragments
+        else:
+            without_document, without_fragments = self.split(
+                data_without_calculated_attributes, encoded_objects_without_calculated_attributes)
+        fragments_by_tier = {REDIS_TIER: with_fragments, POSTGRES_TIER: without_fragments}
+        previous_digests = self.digests_of(previous_manifest)
+        previous_refreshed_at = previous_manifest.get("refreshed_at", {}) if self.is_manifest(previous_manifest) \
+            else {}
+
+        self._update_references(
+            set(with_fragments) | set(without_fragments),
+            previous_digests[REDIS_TIER] | previous_digests[POSTGRES_TIER])
+
+        now, refreshed_at = time(), {}
+        for tier, fragments in fragments_by_tier.items():
+            new_fragments = {self.fragment_key(digest): encoded_object for digest, encoded_object in fragments.items()
+                             if digest not in previous_digests[tier]}
+            if new_fragments:
+                self._cache_backend.set_many(new_fragments, **self._write_kwargs(tier))
+            carried_digests = [digest for digest in fragments if digest in previous_digests[tier]]
+            refreshed_at[tier] = now
+            if carried_digests:
+                tier_refreshed_at = previous_refreshed_at.get(tier, 0)
+                if now - tier_refreshed_at > self._timeouts[tier]:
+                    self._touch(tier, carried_digests)
+                else:
+                    refreshed_at[tier] = tier_refreshed_at
+            logger.info(
+                f"Stored {len(new_fragments)} new payload fragments in {tier}, {len(carried_digests)} carried over")
+
+        return {
+            self.MANIFEST_VERSION_KEY: self.MANIFEST_VERSION,
+            "refreshed_at": refreshed_at,
+            self.WITH_CALCULATED_ATTRIBUTES: with_document,
+            self.WITHOUT_CALCULATED_ATTRIBUTES: without_document,
+        }
+
+    def release(self, manifest: Any) -> None:
+        """Drop the references of a manifest that is being deleted."""
+        digests = self.digests_of(manifest)
+        self._update_references(set(), digests[REDIS_TIER] | digests[POSTGRES_TIER])
+
+    def assemble(
+            self, manifest: Dict[str, Any], source: Optional[str]) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """The payload a manifest read from ``source`` stands for, and the tier it effectively comes from."""
+        if source == REDIS_TIER:
+            document = self._assemble_document(manifest[self.WITH_CALCULATED_ATTRIBUTES])
+            if document is not None:
+                return document, REDIS_TIER
+            logger.info("Payload fragments missing in Redis; falling back to the Postgres document.")
+        document = self._assemble_document(manifest[self.WITHOUT_CALCULATED_ATTRIBUTES])
+        if document is None:
+            logger.warning("Payload fragments missing in every cache tier; the payload is lost.")
+            return None, None
+        return document, POSTGRES_TIER
+
+    def _assemble_document(self, manifest_document: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        object_blocks = dict(self._object_blocks(manifest_document))
+        fragment_keys = {self.fragment_key(digest) for digests in object_blocks.values() for digest in digests.values()}
+        fetched = self._cache_backend.get_many(fragment_keys)
+        if any(fetched.get(key) is None for key in fragment_keys):
+            return None
+        document = dict(manifest_document)
+        for class_key, digests in object_blocks.items():
+            document[class_key] = {
+                object_id: fetched[self.fragment_key(digest)] for object_id, digest in digests.items()}
+        return document
+
+    def _write_kwargs(self, tier: str) -> Dict[str, Any]:
+        if tier == REDIS_TIER:
+            return {"redis_timeout_seconds": 2 * self._timeouts[REDIS_TIER], "write_postgres": False}
+        return {"postgres_timeout_seconds": 2 * self._timeouts[POSTGRES_TIER], "write_redis": False}
+
+    def _touch(self, tier: str, digests: Iterable[str]) -> None:
+        fragment_keys = [self.fragment_key(digest) for digest in digests]
+        if tier == REDIS_TIER:
+            self._cache_backend.touch_many(
+                fragment_keys, redis_timeout_seconds=2 * self._timeouts[REDIS_TIER], touch_postgres=False)
+        else:
+            self._cache_backend.touch_many(
+                fragment_keys, postgres_timeout_seconds=2 * self._timeouts[POSTGRES_TIER], touch_redis=False)
+            # Counters live in Redis but last as long as the longest-lived fragments.
+            self._cache_backend.touch_many(
+                [self.refs_key(digest) for digest in digests],
+                redis_timeout_seconds=self._refs_timeout_seconds, touch_postgres=False)
+
+    @property
+    def _refs_timeout_seconds(self) -> int:
+        return 2 * max(self._timeouts.values())
+
+    def _update_references(self, digests: Set[str], previous_digests: Set[str]) -> None:
+        released_digests = previous_digests - digests
+        deltas = {self.refs_key(digest): 1 for digest in digests - previous_digests}
+        deltas.update({self.refs_key(digest): -1 for digest in released_digests})
+        if not deltas:
+            return
+        counts = self._cache_backend.add_to_counters(
+            deltas, self._refs_timeout_seconds,
+            delete_at_zero={self.refs_key(digest): self.fragment_key(digest) for digest in released_digests})
+        nb_unreferenced = sum(1 for digest in released_digests if counts.get(self.refs_key(digest)) == 0)
+        if nb_unreferenced:
+            logger.info(f"Deleted the Redis copy of {nb_unreferenced} unreferenced payload fragments")
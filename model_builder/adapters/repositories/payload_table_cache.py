@@ -0,0 +1,157 @@
+"""Django cache backend storing the Postgres cache tier in a dedicated payload table.
+
+Django's ``DatabaseCache`` was a poor fit for multi-megabyte session payloads: it pickles every value, culls
+with a table-wide ``DELETE`` under lock whenever the table is over ``MAX_ENTRIES``, and lets writes "fail
+silently" under contention. ``PayloadTableCache`` keeps the same cache API over the ``CachedPayload`` model:
+
+  - writes are single-statement upserts (``INSERT ... ON CONFLICT DO UPDATE``) of the bytes ``CacheBackend``
+    already encoded, stored as they are (bytea); only non-bytes values are pickled;
+  - nothing is culled: expired rows are deleted by a batched sweeper on the indexed ``expires_at`` column,
+    run at most every ``PAYLOAD_CACHE_SWEEP_INTERVAL_SECONDS`` after a write (so from the write-behind thread
+    when it is on) and by the ``sweep_payload_cache`` management command.
+
+Entries written by the previous ``DatabaseCache`` are still read, and deleted, through the cache alias given as
+``OPTIONS["LEGACY_ALIAS"]`` until they expire. One-release fallback: remove with the ``django_cache`` alias.
+"""
+import os
+import pickle
+import threading
+from datetime import timedelta
+from time import monotonic
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.db.models import Q
+from django.utils import timezone
+from efootprint.logger import logger
+
+from model_builder.models import CachedPayload
+
+
+class PayloadTableCache(BaseCache):
+    SWEEP_INTERVAL_SECONDS = int(os.environ.get("PAYLOAD_CACHE_SWEEP_INTERVAL_SECONDS", "300"))
+    SWEEP_BATCH_SIZE = int(os.environ.get("PAYLOAD_CACHE_SWEEP_BATCH_SIZE", "500"))
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._legacy_alias = params.get("OPTIONS", {}).get("LEGACY_ALIAS")
+        self._last_sweep = monotonic()
+        self._sweep_lock = threading.Lock()
+
+    @property
+    def _legacy_cache(self):
+        return caches[self._legacy_alias] if self._legacy_alias else None
+
+    @staticmethod
+    def _live() -> Q:
+        return Q(expires_at__isnull=True) | Q(expires_at__gt=timezone.now())
+
+    def _expires_at(self, timeout):
+        timeout = self.get_backend_timeout(timeout)
+        return None if timeout is None else timezone.now() + timedelta(seconds=timeout)
+
+    @staticmethod
+    def _row_value(value) -> Tuple[bytes, bool]:
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            return bytes(value), False
+        return pickle.dumps(value, pickle.HIGHEST_PROTOCOL), True
+
+    @staticmethod
+    def _value_of(row_value, is_pickled: bool):
+        row_value = bytes(row_value)
+        return pickle.loads(row_value) if is_pickled else row_value
+
+    def get(self, key, default=None, version=None):
+        return self.get_many([key], version=version).get(key, default)
+
+    def get_many(self, keys: Iterable[str], version=None) -> Dict[str, Any]:
+        keys_by_row_key = {self.make_and_validate_key(key, version=version): key for key in keys}
+        rows = CachedPayload.objects.filter(self._live(), key__in=list(keys_by_row_key)).values_list(
+            "key", "value", "is_pickled")
+        values = {keys_by_row_key[row_key]: self._value_of(value, is_pickled) for row_key, value, is_pickled in rows}
+
+        missing_keys = [key for key in keys_by_row_key.values() if key not in values]
+        if missing_keys and self._legacy_cache is not None:
+            values.update(self._legacy_cache.get_many(missing_keys, version=version))
+        return values
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.set_many({key: value}, timeout=timeout, version=version)
+
+    def set_many(self, data: Dict[str, Any], timeout=DEFAULT_TIMEOUT, version=None):
+        expires_at = self._expires_at(timeout)
+        rows = []
+        for key, value in data.items():
+            row_value, is_pickled = self._row_value(value)
+            rows.append(CachedPayload(
+                key=self.make_and_validate_key(key, version=version), value=row_value, is_pickled=is_pickled,
+                expires_at=expires_at))
+        CachedPayload.objects.bulk_create(
+            rows, update_conflicts=True, unique_fields=["key"], update_fields=["value", "is_pickled", "expires_at"])
+        self._sweep_if_due()
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None) -> bool:
+        row_key = self.make_and_validate_key(key, version=version)
+        CachedPayload.objects.filter(key=row_key).exclude(self._live()).delete()
+        row_value, is_pickled = self._row_value(value)
+        _row, created = CachedPayload.objects.get_or_create(
+            key=row_key,
+            defaults={"value": row_value, "is_pickled": is_pickled, "expires_at": self._expires_at(timeout)})
+        return created
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None) -> bool:
+        row_key = self.make_and_validate_key(key, version=version)
+        return CachedPayload.objects.filter(self._live(), key=row_key).update(
+            expires_at=self._expires_at(timeout)) > 0
+
+    def touch_many(self, keys: Iterable[str], timeout=DEFAULT_TIMEOUT, version=None) -> int:
+        """``touch`` several keys in one statement; returns how many live rows were touched."""
+        return CachedPayload.objects.filter(
+            self._live(), key__in=[self.make_and_validate_key(key, version=version) for key in keys]).update(
+            expires_at=self._expires_at(timeout))
+
+    def has_key(self, key, version=None) -> bool:
+        return key in self.get_many([key], version=version)
+
+    def delete(self, key, version=None) -> bool:
+        return self.delete_many([key], version=version)
+
+    def delete_many(self, keys: Iterable[str], version=None):
+        keys = list(keys)
+        nb_deleted, _ = CachedPayload.objects.filter(
+            key__in=[self.make_and_validate_key(key, version=version) for key in keys]).delete()
+        if self._legacy_cache is not None:
+            self._legacy_cache.delete_many(keys, version=version)
+        return nb_deleted > 0
+
+    def clear(self) -> None:
+        CachedPayload.objects.all().delete()
+        if self._legacy_cache is not None:
+            self._legacy_cache.clear()
+
+    def sweep_expired(self, batch_size: Optional[int] = None) -> int:
+        """Delete expired rows, ``batch_size`` at a time so no statement holds locks on the whole table."""
+        batch_size = batch_size or self.SWEEP_BATCH_SIZE
+        nb_deleted = 0
+        while True:
+            now = timezone.now()
+            expired_keys = list(
+                CachedPayload.objects.filter(expires_at__lte=now).values_list("key", flat=True)[:batch_size])
+            if not expired_keys:
+                return nb_deleted
+            batch_nb_deleted, _ = CachedPayload.objects.filter(key__in=expired_keys, expires_at__lte=now).delete()
+            nb_deleted += batch_nb_deleted
+
+    def _sweep_if_due(self) -> None:
+        if monotonic() - self._last_sweep < self.SWEEP_INTERVAL_SECONDS or not self._sweep_lock.acquire(False):
+            return
+        try:
+            self._last_sweep = monotonic()
+            nb_deleted = self.sweep_expired()
+            logger.info(f"Payload cache sweep deleted {nb_deleted} expired rows")
+        except Exception as exc:  # noqa: BLE001
+            logger.warning(f"Payload cache sweep failed: {exc}")
+        finally:
+            self._sweep_lock.release()
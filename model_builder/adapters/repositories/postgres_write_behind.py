@@ -0,0 +1,190 @@
+"""Per-worker write-behind queue for the Postgres cache tier.
+
+Postgres only holds the durability fallback of each payload (Redis serves reads), yet writing it synchronously
+puts a database round trip, and a pickled multi-megabyte row, on the critical path of every edit. With the
+queue enabled (``CACHE_POSTGRES_WRITE_BEHIND``, on by default), ``CacheBackend`` hands Postgres writes to a
+daemon thread instead:
+
+  - writes are **coalesced** per key: a save queued while an older save of the same key is still pending
+    replaces it, so only the latest version is flushed;
+  - the queue is **bounded** (``CACHE_POSTGRES_WRITE_BEHIND_MAX_PENDING`` keys): when it is full, ``submit``
+    refuses and the caller writes synchronously, which throttles a flood of saves to the database's pace;
+  - a **delete** discards the key's pending write and waits for an in-flight one, so a late flush never
+    resurrects a deleted payload; a Postgres read of a key still queued, or being flushed, is served from the
+    queue;
+  - the queue is **flushed on shutdown** (gunicorn ``worker_exit`` hook and ``atexit``).
+
+``metrics()`` reports the queue depth and flush lag (time from the first queued save of a key to its flush),
+and every flush logs them.
+"""
+import atexit
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Any, Callable, Optional, Tuple
+
+from efootprint.logger import logger
+
+
+@dataclass
+class _PendingWrite:
+    value: Any
+    timeout: Optional[int]
+    enqueued_at: float
+
+
+@dataclass
+class WriteBehindMetrics:
+    queue_depth: int
+    oldest_pending_lag_ms: float
+    last_flush_lag_ms: float
+    nb_flushed: int
+    nb_coalesced: int
+    nb_failed: int
+
+
+class PostgresWriteBehind:
+    """Bounded, per-key coalescing queue of cache writes flushed by one daemon thread."""
+
+    ENABLED = os.environ.get("CACHE_POSTGRES_WRITE_BEHIND", "1") == "1"
+    MAX_PENDING = int(os.environ.get("CACHE_POSTGRES_WRITE_BEHIND_MAX_PENDING", "64"))
+
+    def __init__(self, write: Callable[[str, Any, Optional[int]], None], enabled: Optional[bool] = None,
+                 max_pending: Optional[int] = None):
+        self._write = write
+        self.enabled = self.ENABLED if enabled is None else enabled
+        self.max_pending = self.MAX_PENDING if max_pending is None else max_pending
+        self._pending: "OrderedDict[str, _PendingWrite]" = OrderedDict()
+        self._in_flight: Optional[Tuple[str, _PendingWrite]] = None
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self._last_flush_lag_ms = 0.0
+        self._nb_flushed = 0
+        self._nb_coalesced = 0
+        self._nb_failed = 0
+
+    def submit(self, key: str, value: Any, timeout: Optional[int]) -> bool:
+        """Queue a write of ``value`` under ``key``; False when the caller must write synchronously."""
+        if not self.enabled:
+            return False
+        with self._condition:
+            if self._closed:
+                return False
+            pending_write = self._pending.get(key)
+            if pending_write is not None:
+                pending_write.value, pending_write.timeout = value, timeout
+                self._nb_coalesced += 1
+            elif len(self._pending) >= self.max_pending:
+                logger.warning(f"Postgres write-behind queue full ({len(self._pending)} keys); writing {key} inline")
+                return False
+            else:
+                self._pending[key] = _PendingWrite(value, timeout, perf_counter())
+            self._start_thread()
+            self._condition.notify_all()
+        return True
+
+    def pending_value(self, key: str) -> Optional[Any]:
+        """The value queued or being flushed for ``key``, which is newer than the one Postgres holds."""
+        with self._condition:
+            pending_write = self._pending.get(key)
+            if pending_write is None and self._in_flight is not None and self._in_flight[0] == key:
+                pending_write = self._in_flight[1]
+        return None if pending_write is None else pending_write.value
+
+    def discard(self, key: str) -> None:
+        """Drop the pending write of ``key`` and wait until no write of it is in flight."""
+        with self._condition:
+            self._pending.pop(key, None)
+            while self._in_flight is not None and self._in_flight[0] == key:
+                self._condition.wait()
+
+    def flush(self, timeout_seconds: Optional[float] = None) -> bool:
+        """Wait until every queued write is flushed; False if ``timeout_seconds`` elapsed first."""
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: not self._pending and self._in_flight is None, timeout=timeout_seconds)
+
+    def close(self, timeout_seconds: Optional[float] = 30) -> None:
+        """Stop accepting writes and flush the queue."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout_seconds)
+        # Writes left by a thread that never started (or timed out) are flushed inline.
+        while thread is None or not thread.is_alive():
+            with self._condition:
+                if not self._pending:
+                    break
+                key, pending_write = self._pending.popitem(last=False)
+                self._in_flight = (key, pending_write)
+            self._flush_in_flight()
+
+    def metrics(self) -> WriteBehindMetrics:
+        with self._condition:
+            now = perf_counter()
+            oldest_enqueued_at = min((write.enqueued_at for write in self._pending.values()), default=now)
+            return WriteBehindMetrics(
+                queue_depth=len(self._pending),
+                oldest_pending_lag_ms=(now - oldest_enqueued_at) * 1000,
+                last_flush_lag_ms=self._last_flush_lag_ms,
+                nb_flushed=self._nb_flushed,
+                nb_coalesced=self._nb_coalesced,
+                nb_failed=self._nb_failed,
+            )
+
+    def _start_thread(self) -> None:
+        # Started lazily so that it runs in the gunicorn worker, not in the preloading master.
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="postgres-write-behind", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending or self._closed)
+                if not self._pending:
+                    return
+                self._in_flight = self._pending.popitem(last=False)
+            self._flush_in_flight()
+
+    def _flush_in_flight(self) -> None:
+        # The in-flight write stays readable through pending_value until Postgres has committed it.
+        try:
+            self._flush(*self._in_flight)
+        finally:
+            with self._condition:
+                self._in_flight = None
+                self._condition.notify_all()
+
+    def _flush(self, key: str, pending_write: _PendingWrite) -> None:
+        from django.db import close_old_connections
+
+        close_old_connections()
+        start = perf_counter()
+        try:
+            self._write(key, pending_write.value, pending_write.timeout)
+        except Exception as exc:  # noqa: BLE001
+            self._nb_failed += 1
+            logger.warning(f"Postgres write-behind flush of {key} failed: {exc}")
+            return
+        flush_ms = (perf_counter() - start) * 1000
+        self._last_flush_lag_ms = (perf_counter() - pending_write.enqueued_at) * 1000
+        self._nb_flushed += 1
+        logger.info(
+            f"Postgres write-behind flushed {key} in {flush_ms:.1f} ms "
+            f"(lag {self._last_flush_lag_ms:.1f} ms, queue depth {len(self._pending)})")
+
+
+def _write_to_postgres(key: str, value: Any, timeout: Optional[int]) -> None:
+    from model_builder.adapters.repositories.cache_backend import CacheBackend
+
+    CacheBackend().set_postgres(key, value, timeout)
+
+
+postgres_write_behind = PostgresWriteBehind(_write_to_postgres)
+atexit.register(postgres_write_behind.close)
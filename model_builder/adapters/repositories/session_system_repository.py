@@ -1,19 +1,24 @@
 """Session-keyed implementation of ISystemRepository.
 
 This implementation stores system data in Redis (fast cache) with a Postgres
-fallback cache, keyed by the Django session identifier and the workspace slot.
+fallback cache, keyed by the Django session identifier and the workspace slot. The
+slot key holds a manifest of content-addressed object fragments shared across
+sessions (see ``payload_fragment_store``).
 """
 import os
-from typing import Dict, Any, Optional, Tuple
+from copy import deepcopy
+from typing import Dict, Any, Iterable, Optional, Tuple
 
 from django.contrib.sessions.backends.base import SessionBase
 from efootprint.logger import logger
 from e_footprint_interface import __version__ as interface_version
 
-from e_footprint_interface.json_payload_utils import compute_json_size
-from model_builder.domain.exceptions import PayloadSizeLimitExceeded
-from model_builder.domain.interfaces import ISystemRepository
-from model_builder.adapters.repositories.cache_backend import CacheBackend
+from e_footprint_interface.json_payload_utils import encode_json_payload
+from model_builder.domain.exceptions import ConcurrentModificationError, PayloadSizeLimitExceeded
+from model_builder.domain.interfaces import EncodedObject, ISystemRepository, SystemMetadata
+from model_builder.adapters.repositories.cache_backend import CacheBackend, LockHeldError
+from model_builder.adapters.repositories.hydrated_model_cache import hydrated_model_cache
+from model_builder.adapters.repositories.payload_fragment_store import PayloadFragmentStore
 from model_builder.adapters.repositories.workspace_index import WorkspaceIndex
 
 
@@ -23,7 +28,17 @@ class SessionSystemRepository(ISystemRepository):
     A repository is bound to a single slot; with no explicit slot it resolves the workspace's
     active slot, so the single-model call sites construct it unchanged. The shared payload budget
     (the summed with-calc weight of every slot) is enforced on save from the slot-size index in the
-    session — siblings are read from the index, never re-serialized.
+    session — siblings are read from the index, never re-serialized. Every save mints a new payload
+    version stamp for the slot, which keys the per-worker hydrated model cache, and writes a small
+    metadata record next to the payload (same tiers, same TTLs) that existence, size and naming
+    checks read instead of the payload. The daily emissions of the saved model, when given, are
+    written alongside as a side document tagged with that version, so the result panel renders
+    without hydrating the model.
+
+    Saves compare-and-set the stamp: the repository remembers the version its payload (or hydrated graph)
+    was loaded at, and under a short cross-worker lock a save fails with ``ConcurrentModificationError``
+    when another request stored a newer version since, or still holds the lock when the wait ends.
+    Repositories that never loaded the payload (imports, new slots) overwrite it unconditionally.
 
     Usage:
         repository = SessionSystemRepository(request.session)          # active slot
@@ -33,6 +48,8 @@ class SessionSystemRepository(ISystemRepository):
     """
 
     SYSTEM_DATA_KEY = "system_data"
+    SYSTEM_METADATA_KEY = "system_metadata"
+    SYSTEM_EMISSIONS_KEY = "system_emissions"
     INTERFACE_CONFIG_SESSION_KEY = "interface_config"
     INTERFACE_VERSION_SESSION_KEY = "efootprint_interface_version"
     REDIS_CACHE_ALIAS = os.environ.get("SYSTEM_DATA_REDIS_CACHE_ALIAS", "redis")
@@ -40,6 +57,8 @@ class SessionSystemRepository(ISystemRepository):
     REDIS_CACHE_TIMEOUT_SECONDS = int(os.environ.get("SYSTEM_DATA_REDIS_TTL_SECONDS", "600"))
     POSTGRES_CACHE_TIMEOUT_SECONDS = int(os.environ.get("SYSTEM_DATA_POSTGRES_TTL_SECONDS", "43200"))
     MAX_PAYLOAD_SIZE_MB = float(os.environ.get("MAX_PAYLOAD_SIZE_MB", 30.0))
+    SAVE_LOCK_TTL_SECONDS = int(os.environ.get("SYSTEM_DATA_SAVE_LOCK_TTL_SECONDS", "10"))
+    SAVE_LOCK_WAIT_SECONDS = float(os.environ.get("SYSTEM_DATA_SAVE_LOCK_WAIT_SECONDS", "5"))
 
     def __init__(self, session: SessionBase, slot: Optional[int] = None):
         """Initialize with a Django session, optionally bound to a specific slot.
@@ -50,9 +69,14 @@ class SessionSystemRepository(ISystemRepository):
         """
         self._session = session
         self._cache_backend = CacheBackend()
+        self._fragment_store = PayloadFragmentStore(
+            self._cache_backend, self.REDIS_CACHE_TIMEOUT_SECONDS, self.POSTGRES_CACHE_TIMEOUT_SECONDS)
         self._interface_config: Optional[Dict[str, Any]] = None
         self._index = WorkspaceIndex(session)
         self._slot = self._index.active_slot() if slot is None else slot
+        self._preloaded_system_data: Optional[Tuple[Tuple[Optional[Dict[str, Any]], Optional[str]], Any]] = None
+        # Version stamp of the payload this repository's data was loaded at; None until loaded.
+        self._loaded_version: Optional[str] = None
 
     @property
     def slot(self) -> int:
@@ -67,6 +91,28 @@ class SessionSystemRepository(ISystemRepository):
             return None
         return f"{self.SYSTEM_DATA_KEY}:{session_key}:{self._slot}"
 
+    def _metadata_cache_key(self, create_if_missing: bool = True) -> Optional[str]:
+        cache_key = self._cache_key(create_if_missing=create_if_missing)
+        if not cache_key:
+            return None
+        return self.SYSTEM_METADATA_KEY + cache_key[len(self.SYSTEM_DATA_KEY):]
+
+    def _emissions_cache_key(self, create_if_missing: bool = True) -> Optional[str]:
+        cache_key = self._cache_key(create_if_missing=create_if_missing)
+        if not cache_key:
+            return None
+        return self.SYSTEM_EMISSIONS_KEY + cache_key[len(self.SYSTEM_DATA_KEY):]
+
+    def _save_metadata(self, metadata: SystemMetadata) -> None:
+        metadata_key = self._metadata_cache_key(create_if_missing=True)
+        if metadata_key:
+            self._cache_backend.set(
+                metadata_key,
+                metadata.to_json(),
+                redis_timeout_seconds=self.REDIS_CACHE_TIMEOUT_SECONDS,
+                postgres_timeout_seconds=self.POSTGRES_CACHE_TIMEOUT_SECONDS,
+            )
+
     def _legacy_cache_key(self) -> Optional[str]:
         """The pre-workspace unsuffixed key. Read once for slot 0 only (one-release fallback).
 
@@ -96,7 +142,15 @@ class SessionSystemRepository(ISystemRepository):
         """
         cache_key = self._cache_key(create_if_missing=True)
         if cache_key:
-            cached_data, source = self._cache_backend.get_with_source(cache_key)
+            metadata_key = self._metadata_cache_key(create_if_missing=True)
+            if self._preloaded_system_data is not None:
+                ((cached_data, source), metadata_json), self._preloaded_system_data = self._preloaded_system_data, None
+            else:
+                fetched = self._cache_backend.get_many_with_source([cache_key, metadata_key])
+                (cached_data, source), (metadata_json, _) = fetched[cache_key], fetched[metadata_key]
+            if PayloadFragmentStore.is_manifest(cached_data):
+                cached_data, source = self._fragment_store.assemble(cached_data, source)
+            self._loaded_version = self._version_of(metadata_json) if cached_data is not None else None
             if cached_data is None:
                 cached_data, source = self._read_legacy_with_write_through()
             if cached_data is not None:
@@ -109,6 +163,10 @@ class SessionSystemRepository(ISystemRepository):
                 return cached_data, source
         return None, None
 
+    @staticmethod
+    def _version_of(metadata_json: Any) -> Optional[str]:
+        return metadata_json.get("version") if isinstance(metadata_json, dict) else None
+
     def _read_legacy_with_write_through(self) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
         """One-release fallback: read an in-flight slot-0 payload from the unsuffixed key and write
         it through to the suffixed key so the legacy key is read at most once per session."""
@@ -120,13 +178,15 @@ class SessionSystemRepository(ISystemRepository):
             return None, None
         suffixed_key = self._cache_key(create_if_missing=True)
         if suffixed_key:
+            encoded_data, size_result = encode_json_payload(cached_data)
             self._cache_backend.set(
-                suffixed_key, cached_data,
+                suffixed_key, encoded_data,
                 redis_timeout_seconds=self.REDIS_CACHE_TIMEOUT_SECONDS,
                 postgres_timeout_seconds=self.POSTGRES_CACHE_TIMEOUT_SECONDS,
             )
             self._cache_backend.delete(legacy_key)
-            self._index.set_slot_size(self._slot, compute_json_size(cached_data).size_bytes)
+            self._index.set_slot_size(self._slot, size_result.size_bytes)
+            self._index.bump_slot_version(self._slot)
             self._session.modified = True
         return cached_data, source
 
@@ -158,9 +218,13 @@ class SessionSystemRepository(ISystemRepository):
 
     @property
     def interface_config(self) -> dict:
-        """Return the repository-scoped interface config."""
+        """Return the repository-scoped interface config.
+
+        Read from the slot's metadata record, which carries the config of the payload it describes; only
+        records written before they carried it fall back to reading the payload.
+        """
         if self._interface_config is None:
-            self.get_system_data_with_source()
+            self._load_interface_config()
         if self._interface_config is None:
             self._interface_config = self.load_interface_config_from_session()
         return {} if self._interface_config is None else self._interface_config
@@ -169,29 +233,64 @@ class SessionSystemRepository(ISystemRepository):
     def interface_config(self, value: dict) -> None:
         self._interface_config = value
 
+    def _load_interface_config(self) -> None:
+        metadata_key = self._metadata_cache_key(create_if_missing=True)
+        metadata_json = self._cache_backend.get(metadata_key) if metadata_key else None
+        if not isinstance(metadata_json, dict) or "interface_config" not in metadata_json:
+            self.get_system_data_with_source()
+        elif metadata_json["interface_config"] is not None:
+            # Callers edit the config in place: never hand out the cached record's own dict.
+            self._interface_config = deepcopy(metadata_json["interface_config"])
+
     def save_data(
         self,
         data: Dict[str, Any],
-        data_without_calculated_attributes: Optional[Dict[str, Any]] = None
+        data_without_calculated_attributes: Optional[Dict[str, Any]] = None,
+        encoded_data: Optional[bytes] = None,
+        encoded_data_without_calculated_attributes: Optional[bytes] = None,
+        system_emissions: Optional[Dict[str, Any]] = None,
+        encoded_objects: Optional[Dict[str, EncodedObject]] = None,
+        encoded_objects_without_calculated_attributes: Optional[Dict[str, EncodedObject]] = None,
     ) -> None:
         """Persist the system data to Redis and Postgres.
 
         Args:
             data: The system data dictionary to save.
             data_without_calculated_attributes: Optional version without calculated attributes.
+            encoded_data: Optional compact JSON encoding of ``data`` as passed; otherwise ``data`` is encoded
+                here. The one encoding is both measured and stored.
+            encoded_data_without_calculated_attributes: Same for ``data_without_calculated_attributes``.
+            system_emissions: Optional daily emissions of ``data``, written next to it tagged with the new
+                payload version.
+            encoded_objects: Optional per-object encodings of ``data``, so payload fragments are neither
+                encoded nor hashed again for the objects the serializer did not change.
+            encoded_objects_without_calculated_attributes: Same for ``data_without_calculated_attributes``.
 
         Raises:
             PayloadSizeLimitExceeded: If the summed with-calc weight of all slots exceeds
                 MAX_PAYLOAD_SIZE_MB (the shared workspace budget).
         """
+        # A pre-encoded payload stays usable when stamping only adds keys to it: they are spliced in.
+        stamped_keys = ("interface_config", "efootprint_interface_version")
+        if any(key in data for key in stamped_keys):
+            encoded_data = None
+        if data_without_calculated_attributes is None or any(
+                key in data_without_calculated_attributes for key in stamped_keys):
+            encoded_data_without_calculated_attributes = None
+        for payload in (data, data_without_calculated_attributes):
+            if payload is None:
+                continue
+            if self._interface_config is not None:
+                payload["interface_config"] = self._interface_config
+                payload["efootprint_interface_version"] = interface_version
+            else:
+                # Stamp payloads without config too: ModelWeb only trusts stored calculated attributes
+                # written by the running interface version.
+                payload.setdefault("efootprint_interface_version", interface_version)
         if self._interface_config is not None:
-            for payload in (data, data_without_calculated_attributes):
-                if payload is not None:
-                    payload["interface_config"] = self._interface_config
-                    payload["efootprint_interface_version"] = interface_version
             self._save_interface_config_to_session()
 
-        size_result = compute_json_size(data)
+        encoded_data, size_result = encode_json_payload(data, encoded_data, stamped_keys)
         logger.info(
             f"System data JSON size (slot {self._slot}): {size_result.size_mb:.2f} MB "
             f"(computation took {size_result.computation_time_ms:.1f} ms)"
@@ -203,39 +302,198 @@ class SessionSystemRepository(ISystemRepository):
 
         cache_key = self._cache_key(create_if_missing=True)
 
-        postgres_payload = data_without_calculated_attributes or data
-
         if cache_key:
-            self._cache_backend.set(
-                cache_key,
-                data,
-                redis_timeout_seconds=self.REDIS_CACHE_TIMEOUT_SECONDS,
-                write_postgres=False,
-            )
-            self._cache_backend.set(
-                cache_key,
-                postgres_payload,
-                postgres_timeout_seconds=self.POSTGRES_CACHE_TIMEOUT_SECONDS,
-                write_redis=False,
-            )
+            if data_without_calculated_attributes is None or self._fragment_store.enabled:
+                encoded_postgres_payload = encoded_data
+            else:
+                encoded_postgres_payload, _ = encode_json_payload(
+                    data_without_calculated_attributes, encoded_data_without_calculated_attributes, stamped_keys)
+            metadata_key = self._metadata_cache_key(create_if_missing=True)
+            lock_name = f"save:{cache_key}"
+            try:
+                lock_token = self._cache_backend.acquire_lock(
+                    lock_name, self.SAVE_LOCK_TTL_SECONDS, self.SAVE_LOCK_WAIT_SECONDS, raise_if_held=True)
+            except LockHeldError:
+                # Another save of the slot is still running: comparing the stamps now would race with it.
+                raise ConcurrentModificationError(self._loaded_version)
+            try:
+                if self._fragment_store.enabled:
+                    # The previous manifest tells which fragments the slot already references.
+                    stored = self._cache_backend.get_many_with_source([metadata_key, cache_key])
+                    (stored_metadata_json, _source), (previous_payload, _) = stored[metadata_key], stored[cache_key]
+                else:
+                    stored_metadata_json, _source = self._cache_backend.get_with_source(metadata_key)
+                stored_version = self._version_of(stored_metadata_json)
+                if self._loaded_version is not None and stored_version not in (None, self._loaded_version):
+                    raise ConcurrentModificationError(self._loaded_version, stored_version)
+                version = WorkspaceIndex.next_version(stored_version or self._index.slot_version(self._slot))
+                metadata_json = SystemMetadata.of_system_data(data, size_result.size_bytes, version).to_json()
+                side_documents = {metadata_key: metadata_json}
+                if system_emissions is not None:
+                    side_documents[self._emissions_cache_key()] = {"version": version, "emissions": system_emissions}
+                redis_payload, postgres_payload = encoded_data, encoded_postgres_payload
+                if self._fragment_store.enabled:
+                    redis_payload = postgres_payload = self._fragment_store.save(
+                        data, data_without_calculated_attributes, previous_payload,
+                        encoded_objects, encoded_objects_without_calculated_attributes)
+                self._cache_backend.set_many(
+                    {cache_key: redis_payload, **side_documents},
+                    redis_timeout_seconds=self.REDIS_CACHE_TIMEOUT_SECONDS,
+                    write_postgres=False,
+                )
+                self._cache_backend.set_many(
+                    {cache_key: postgres_payload, **side_documents},
+                    postgres_timeout_seconds=self.POSTGRES_CACHE_TIMEOUT_SECONDS,
+                    write_redis=False,
+                )
+            finally:
+                if lock_token is not None:
+                    self._cache_backend.release_lock(lock_name, lock_token)
+            self._preloaded_system_data = None
+            self._loaded_version = version
             self._index.set_slot_size(self._slot, size_result.size_bytes)
+            self._index.bump_slot_version(self._slot, version)
             self._session.modified = True
 
         if self.SYSTEM_DATA_KEY in self._session:
             self._session.pop(self.SYSTEM_DATA_KEY, None)
             self._session.modified = True
 
+    def _hydrated_model_key(self) -> Optional[Tuple[str, int]]:
+        session_key = self._session.session_key
+        return (session_key, self._slot) if session_key else None
+
+    def checkout_hydrated_model(self) -> Optional[Any]:
+        """Take the slot's hydrated graph from the per-worker cache if it matches the stored payload version."""
+        key = self._hydrated_model_key()
+        version = self._index.slot_version(self._slot)
+        if key is None or version is None:
+            return None
+        cached = hydrated_model_cache.take(key, version)
+        if cached is None:
+            return None
+        self._loaded_version = version
+        hydrated_model, interface_config = cached
+        if self._interface_config is None and interface_config is not None:
+            # Skipping the payload read must not lose the config it would have carried.
+            self._interface_config = deepcopy(interface_config)
+        return hydrated_model
+
+    def hold_hydrated_model(self, hydrated_model: Any) -> None:
+        """Hand the graph hydrated from the loaded payload to the request, tagged with the version it was read at."""
+        key = self._hydrated_model_key()
+        weight_bytes = self._index.slot_sizes().get(self._slot)
+        if key is None or self._loaded_version is None or weight_bytes is None:
+            return
+        hydrated_model_cache.hold(
+            key, self._loaded_version, (hydrated_model, deepcopy(self._interface_config)), weight_bytes)
+
+    def end_hydration(self) -> None:
+        key = self._hydrated_model_key()
+        if key is not None:
+            hydrated_model_cache.end_hydration(key)
+
+    def checkin_hydrated_model(self, hydrated_model: Any) -> None:
+        # Tagged with the version this repository saved, not the session index's: a concurrent request's session
+        # write may leave the index at another stamp than the graph's contents.
+        key = self._hydrated_model_key()
+        weight_bytes = self._index.slot_sizes().get(self._slot)
+        if key is None or self._loaded_version is None or weight_bytes is None:
+            return
+        hydrated_model_cache.put(
+            key, self._loaded_version, (hydrated_model, deepcopy(self._interface_config)), weight_bytes)
+
+    def get_system_metadata(self) -> Optional[SystemMetadata]:
+        """Read the slot's metadata record, without fetching the payload when the record exists.
+
+        A payload saved before metadata records existed (or only under the legacy key) is read once and
+        its record written, so later checks stay cheap. The record expires with the payload.
+        """
+        metadata_key = self._metadata_cache_key(create_if_missing=False)
+        if not metadata_key:
+            return None
+        return self._metadata_or_backfill(self._cache_backend.get(metadata_key))
+
+    def _metadata_or_backfill(self, metadata_json: Optional[Dict[str, Any]]) -> Optional[SystemMetadata]:
+        if metadata_json is not None:
+            return SystemMetadata.from_json(metadata_json)
+        data = self.get_system_data()
+        if data is None:
+            return None
+        metadata = SystemMetadata.of_system_data(data, self._index.slot_sizes().get(self._slot))
+        self._save_metadata(metadata)
+        return metadata
+
+    @classmethod
+    def preload_system_data(cls, repositories: Iterable["SessionSystemRepository"]) -> None:
+        """Fetch the payloads of several slot repositories in one round trip per cache tier.
+
+        Each repository serves its preloaded payload on its next read. Slots whose hydrated graph is cached
+        at the stored version are skipped: ``ModelWeb`` checks the graph out instead of reading the payload.
+        """
+        cache_keys, metadata_keys = {}, {}
+        for repository in repositories:
+            key, version = repository._hydrated_model_key(), repository._index.slot_version(repository._slot)
+            if key is not None and version is not None and hydrated_model_cache.contains(key, version):
+                continue
+            cache_key = repository._cache_key(create_if_missing=True)
+            if cache_key:
+                cache_keys[repository] = cache_key
+                metadata_keys[repository] = repository._metadata_cache_key(create_if_missing=True)
+        if len(cache_keys) < 2:
+            return
+        fetched = CacheBackend().get_many_with_source([*cache_keys.values(), *metadata_keys.values()])
+        for repository, cache_key in cache_keys.items():
+            repository._preloaded_system_data = (fetched[cache_key], fetched[metadata_keys[repository]][0])
+
+    @classmethod
+    def system_metadata_of(
+            cls, repositories: Iterable["SessionSystemRepository"]) -> Dict[int, Optional[SystemMetadata]]:
+        """``get_system_metadata`` of several slot repositories, in one round trip per cache tier."""
+        repositories = list(repositories)
+        metadata_keys = {
+            repository.slot: repository._metadata_cache_key(create_if_missing=False) for repository in repositories}
+        fetched = CacheBackend().get_many([key for key in metadata_keys.values() if key])
+        return {
+            repository.slot: repository._metadata_or_backfill(fetched[metadata_keys[repository.slot]])
+            if metadata_keys[repository.slot] else None
+            for repository in repositories
+        }
+
+    def get_system_emissions(self) -> Optional[Dict[str, Any]]:
+        """Read the daily emissions side document of the slot, if it was stored for the current payload version.
+
+        The version is the one this repository loaded, or else the slot's latest save from the workspace index,
+        so the side document is served without reading the payload.
+        """
+        emissions_key = self._emissions_cache_key(create_if_missing=False)
+        version = self._loaded_version or self._index.slot_version(self._slot)
+        if not emissions_key or version is None:
+            return None
+        stored = self._cache_backend.get(emissions_key)
+        if not isinstance(stored, dict) or stored.get("version") != version:
+            return None
+        return stored.get("emissions")
+
+    def save_system_emissions(self, system_emissions: Dict[str, Any]) -> None:
+        """Backfill the side document of a payload saved without its daily emissions."""
+        emissions_key = self._emissions_cache_key(create_if_missing=False)
+        if not emissions_key or self._loaded_version is None:
+            return
+        self._cache_backend.set(
+            emissions_key,
+            {"version": self._loaded_version, "emissions": system_emissions},
+            redis_timeout_seconds=self.REDIS_CACHE_TIMEOUT_SECONDS,
+            postgres_timeout_seconds=self.POSTGRES_CACHE_TIMEOUT_SECONDS,
+        )
+
     def has_system_data(self) -> bool:
-        """Check if system data exists in Redis or Postgres.
+        """Check if system data exists in Redis or Postgres, from the slot's metadata record.
 
         Returns:
             True if system data exists, False otherwise.
         """
-        cache_key = self._cache_key(create_if_missing=False)
-        if cache_key and self._cache_backend.get(cache_key) is not None:
-            return True
-        legacy_key = self._legacy_cache_key()
-        if legacy_key and self._cache_backend.get(legacy_key) is not None:
+        if self.get_system_metadata() is not None:
             return True
         return self.SYSTEM_DATA_KEY in self._session
 
@@ -243,12 +501,23 @@ class SessionSystemRepository(ISystemRepository):
         """Clear this slot's system data from Redis, Postgres, the index, and the session."""
         cache_key = self._cache_key(create_if_missing=False)
         if cache_key:
+            if self._fragment_store.enabled:
+                stored_payload, _source = self._cache_backend.get_with_source(cache_key)
+                self._fragment_store.release(stored_payload)
             self._cache_backend.delete(cache_key)
+            self._cache_backend.delete(self._metadata_cache_key(create_if_missing=False))
+            self._cache_backend.delete(self._emissions_cache_key(create_if_missing=False))
         legacy_key = self._legacy_cache_key()
         if legacy_key:
             self._cache_backend.delete(legacy_key)
 
+        key = self._hydrated_model_key()
+        if key is not None:
+            hydrated_model_cache.evict(key)
+
         self._index.forget_slot_size(self._slot)
+        self._index.forget_slot_version(self._slot)
+        self._loaded_version = None
         self._session.pop(self.SYSTEM_DATA_KEY, None)
         self._session.pop(self.INTERFACE_CONFIG_SESSION_KEY, None)
         self._session.pop(self.INTERFACE_VERSION_SESSION_KEY, None)
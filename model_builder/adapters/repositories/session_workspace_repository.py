@@ -1,7 +1,8 @@
 """Session-backed implementation of IWorkspaceRepository.
 
 Owns the workspace slot index in the Django session (which slots exist, which is active, and each
-slot's last-saved with-calc byte size) and vends a ``SessionSystemRepository`` bound to a slot. Two
+slot's last-saved with-calc byte size) and vends a ``SessionSystemRepository`` bound to a slot —
+several at once with their payloads (or metadata records) fetched in one round trip per cache tier. Two
 invariants are enforced here as the single point for the whole feature:
 
   - the *summed* with-calc weight of all slots stays within ``MAX_PAYLOAD_SIZE_MB`` (the per-slot
@@ -9,11 +10,11 @@ invariants are enforced here as the single point for the whole feature:
   - the two slots never hold the same system id — ``add_slot`` mints a fresh system id on any
     cross-slot collision, covering every source (import, workspace import, template, blank, duplicate).
 """
-from typing import List
+from typing import Dict, List, Optional
 
 from django.contrib.sessions.backends.base import SessionBase
 
-from model_builder.domain.interfaces import ISystemRepository
+from model_builder.domain.interfaces import ISystemRepository, SystemMetadata
 from model_builder.adapters.repositories.workspace_base import WorkspaceRepositoryBase
 from model_builder.adapters.repositories.session_system_repository import SessionSystemRepository
 from model_builder.adapters.repositories.workspace_index import WorkspaceIndex
@@ -38,6 +39,19 @@ class SessionWorkspaceRepository(WorkspaceRepositoryBase):
     def repository_for(self, slot: int) -> ISystemRepository:
         return SessionSystemRepository(self._session, slot=slot)
 
+    def repositories_for(self, slots: List[int]) -> Dict[int, ISystemRepository]:
+        repositories = {slot: SessionSystemRepository(self._session, slot=slot) for slot in slots}
+        SessionSystemRepository.preload_system_data(repositories.values())
+        return repositories
+
+    def slot_version(self, slot: int) -> Optional[str]:
+        """The payload version stamp of a slot, read from the session index without touching the cache."""
+        return self._index.slot_version(slot)
+
+    def system_metadata_of(self, slots: List[int]) -> Dict[int, Optional[SystemMetadata]]:
+        return SessionSystemRepository.system_metadata_of(
+            SessionSystemRepository(self._session, slot=slot) for slot in slots)
+
     def _register_slot(self, slot: int) -> None:
         self._index.add_slot(slot)
 
@@ -98,8 +98,7 @@ class WorkspaceRepositoryBase(IWorkspaceRepository):
         if incoming_id is None:
             return system_data
         sibling_ids = {
-            system_id_of(self.repository_for(slot).get_system_data()) for slot in sibling_slots
-        }
+            metadata.system_id for metadata in self.system_metadata_of(sibling_slots).values() if metadata is not None}
         if incoming_id in sibling_ids:
             return with_fresh_system_id(system_data)
         return system_data
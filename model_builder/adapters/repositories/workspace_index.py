@@ -1,7 +1,9 @@
 """The tiny workspace index stored in the Django session.
 
-The index is the single source of truth for which slots exist, which is active, and each slot's
-last-saved with-calculated-attributes byte size. It is intentionally minimal: the heavy per-slot
+The index is the single source of truth for which slots exist, which is active, each slot's
+last-saved with-calculated-attributes byte size, and each slot's payload version stamp (minted on every
+save and stored with the payload too; it keys the per-worker hydrated model cache and the compare-and-set of
+saves). It is intentionally minimal: the heavy per-slot
 payloads live in the cache (Redis/Postgres), keyed by slot; only this small bookkeeping lives in the
 session. Both ``SessionSystemRepository`` (a per-slot repo) and ``SessionWorkspaceRepository`` (slot
 lifecycle) operate on the same index, so the active slot and the shared budget stay consistent.
@@ -16,7 +18,8 @@ list is therefore deliberately *never sorted*: after removing the Reference (slo
 in slot 1 yet must stay role-first, and a newly added model reuses the freed slot number 0 — sorting
 would re-promote that new model to the Reference position (the model-comparison re-add bug).
 """
-from typing import Dict, List
+from typing import Dict, List, Optional
+from uuid import uuid4
 
 from django.contrib.sessions.backends.base import SessionBase
 
@@ -71,6 +74,7 @@ class WorkspaceIndex:
         if index.get("active") == slot:
             index["active"] = index["slots"][0]
         self.forget_slot_size(slot)
+        self.forget_slot_version(slot)
         self._write(index)
 
     def slot_sizes(self) -> Dict[int, int]:
@@ -98,6 +102,42 @@ class WorkspaceIndex:
         index["sizes"] = sizes
         self._write(index)
 
+    def slot_version(self, slot: int) -> Optional[str]:
+        """The stamp of the slot's last-saved payload, or None when it was never saved under the index."""
+        return self._raw().get("versions", {}).get(str(slot))
+
+    @staticmethod
+    def next_version(version: Optional[str]) -> str:
+        """The stamp following ``version``: ``<revision>-<nonce>``, the revision counting the slot's saves.
+
+        Revisions increase monotonically; the random nonce keeps stamps unique when a cleared slot counts
+        from 1 again, so a graph cached at an older stamp can never be mistaken for the new payload.
+        """
+        return f"{WorkspaceIndex.revision_of(version) + 1}-{uuid4().hex[:12]}"
+
+    @staticmethod
+    def revision_of(version: Optional[str]) -> int:
+        """The revision of a stamp; 0 for none, and for the random stamps minted before revisions existed."""
+        revision = (version or "").partition("-")[0]
+        return int(revision) if version and "-" in version and revision.isdigit() else 0
+
+    def bump_slot_version(self, slot: int, version: Optional[str] = None) -> str:
+        """Record ``version`` (by default the stamp following the current one) as the slot's payload stamp."""
+        version = version or self.next_version(self.slot_version(slot))
+        index = self._raw()
+        versions = index.get("versions", {})
+        versions[str(slot)] = version
+        index["versions"] = versions
+        self._write(index)
+        return version
+
+    def forget_slot_version(self, slot: int) -> None:
+        index = self._raw()
+        versions = index.get("versions", {})
+        versions.pop(str(slot), None)
+        index["versions"] = versions
+        self._write(index)
+
     def workspace_size_mb_with(self, slot: int, slot_size_bytes: int) -> float:
         """Summed with-calc weight (MB) over all slots, substituting ``slot_size_bytes`` for ``slot``.
 
@@ -0,0 +1,67 @@
+"""Conditional GET for the read-only result views.
+
+What these views return only depends on the payload of the slot they read, stamped with a new version on every
+save (see ``WorkspaceIndex``), and on the request itself. ``conditional_on_model_version`` gives their responses a
+strong ETag derived from both, and answers a request whose ``If-None-Match`` matches with a 304 straight from the
+session index, before any payload is read or model hydrated. Responses are sent ``Cache-Control: private,
+no-cache``: the browser keeps them but revalidates them on every use, so a tab switch or a result panel toggle
+on an unchanged model costs a session read.
+
+Views that write (the Sankey card settings, the one-shot calculus graph) or render random ids must not use it. A
+view that also renders the exception modal on errors applies ``render_exception_modal_if_error`` outside it, so
+the modal replaces the conditional response rather than going through it; a modal that reaches it anyway is
+stripped of its ETag like any other error.
+"""
+import hashlib
+from functools import wraps
+
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+from efootprint import __version__ as efootprint_version
+
+from e_footprint_interface import __version__ as interface_version
+from model_builder.adapters.repositories import SessionWorkspaceRepository
+
+
+def _active_slot(request, workspace):
+    return workspace.active_slot()
+
+
+def model_version_etag(request, slot):
+    """ETag of a response built from ``slot``'s current payload, or None when the slot has no version stamp."""
+    version = SessionWorkspaceRepository(request.session).slot_version(slot)
+    if version is None:
+        return None
+    # Renderings differ between full pages and HTMX fragments, and across releases.
+    etag_source = "\n".join([
+        interface_version, efootprint_version, version, request.path, request.META.get("QUERY_STRING", ""),
+        request.headers.get("HX-Request", "")])
+
+    return hashlib.sha256(etag_source.encode("utf-8")).hexdigest()[:32]
+
+
+def conditional_on_model_version(slot_of=_active_slot):
+    """Decorate a read-only view with a model version ETag and 304 answers.
+
+    Args:
+        slot_of: ``(request, workspace) -> slot`` resolving the slot the view reads; the active slot by default.
+    """
+    def decorator(view):
+        def etag_func(request, *args, **kwargs):
+            return model_version_etag(request, slot_of(request, SessionWorkspaceRepository(request.session)))
+
+        conditional_view = condition(etag_func=etag_func)(view)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            if response.status_code in (200, 304) and not getattr(response, "is_exception_modal", False):
+                patch_cache_control(response, private=True, no_cache=True)
+            else:
+                # Errors are not a rendering of the model version: never let the browser revalidate them.
+                response.headers.pop("ETag", None)
+            return response
+
+        return wrapper
+
+    return decorator
@@ -48,6 +48,9 @@ def render_recovery_page(request, error=None, status=200):
     workspace *index* (occupied slot ids + active pointer) and whether each slot's raw payload
     exists, defensively, so a per-slot download link can be offered without ever deserializing.
     """
+    from model_builder.adapters.repositories.hydrated_model_cache import hydrated_model_cache
+    hydrated_model_cache.discard_request_checkouts()
+
     recovery_slots = []
     try:
         from model_builder.adapters.repositories import SessionWorkspaceRepository
@@ -80,6 +83,9 @@ def render_recovery_page(request, error=None, status=200):
 
 
 def render_exception_modal(request, exception):
+    from model_builder.adapters.repositories.hydrated_model_cache import hydrated_model_cache
+    # The failed action may have mutated its checked-out model graph before raising.
+    hydrated_model_cache.discard_request_checkouts()
     if os.environ.get("RAISE_EXCEPTIONS"):
         raise exception
     http_response = render(request, "model_builder/modals/exception_modal.html", {
@@ -92,6 +98,8 @@ def render_exception_modal(request, exception):
     # swaps are still processed, so the modal appears and the canvas is left untouched.
     http_response["HX-Reswap"] = "none"
     http_response["HX-Trigger-After-Settle"] = json.dumps({"openModalDialog": {"modal_id": "model-builder-modal"}})
+    # A 200 like the renderings it replaces: conditional GET views check this to never tag it with an ETag.
+    http_response.is_exception_modal = True
 
     return http_response
 
@@ -1,11 +1,14 @@
+import hashlib
 import json
 import uuid
+from typing import Optional
 
 from django.http import HttpResponse
 from django.shortcuts import render
 from django.template.loader import render_to_string
 from pint import Quantity
 
+from efootprint import __version__ as efootprint_version
 from efootprint.all_classes_in_order import ALL_EFOOTPRINT_CLASSES_DICT, SANKEY_COLUMNS, SANKEY_BREAKDOWN_ONLY_CLASSES
 from efootprint.constants.units import u
 from efootprint.core.lifecycle_phases import LifeCyclePhases
@@ -13,9 +16,11 @@ from efootprint.utils.display import best_display_unit, human_readable_unit, dis
 from efootprint.utils.impact_repartition.sankey import ImpactRepartitionSankey
 from efootprint.utils.tools import time_it
 
-from model_builder.adapters.repositories import SessionWorkspaceRepository
+from e_footprint_interface import __version__ as interface_version
+from model_builder.adapters.repositories import SessionCacheRepository, SessionWorkspaceRepository
 from model_builder.adapters.ui_config.class_ui_config_provider import ClassUIConfigProvider
 from model_builder.adapters.ui_config.object_category_ui_config_provider import ObjectCategoryUIConfigProvider
+from model_builder.adapters.views.conditional_get import conditional_on_model_version
 from model_builder.adapters.views.exception_handling import render_exception_modal_if_error
 from model_builder.domain.entities.web_core.model_web import ModelWeb
 
@@ -313,47 +318,37 @@ def _build_sankey_payload(sankey: ImpactRepartitionSankey) -> dict:
     }, recommended_height
 
 
-@render_exception_modal_if_error
-@time_it
-def sankey_diagram(request):
-    card_id = request.POST.get("card_id", "")
-    repository = SessionWorkspaceRepository(request.session).active_repository()
-    model_web = ModelWeb(repository)
-    system = list(model_web.response_objs["System"].values())[0]
+def _sankey_rendering_cache_key(version: str, settings: dict) -> str:
+    """Session cache key of a diagram rendering: the payload version and the settings shaping the diagram."""
+    key_source = json.dumps([interface_version, efootprint_version, version, settings], sort_keys=True)
+    return hashlib.sha256(key_source.encode("utf-8")).hexdigest()
 
-    lifecycle_phase_str = request.POST.get("lifecycle_phase_filter", "")
-    lifecycle_phase_filter = _LIFECYCLE_PHASE_MAP.get(lifecycle_phase_str)
 
-    aggregation_threshold_percent = float(request.POST.get("aggregation_threshold_percent", "1.0"))
-    active_columns = set(request.POST.getlist("active_columns"))
-    skip_phase_footprint_split = "phase" not in active_columns
-    skip_object_category_footprint_split = "category" not in active_columns
-    skip_object_footprint_split = "7" not in active_columns and "8" not in active_columns
+def _compute_sankey_rendering(system, settings: dict) -> dict:
+    """Build the repartition of ``system`` for a card's settings into everything its template displays."""
+    lifecycle_phase_str = settings["lifecycle_phase_filter"]
+    lifecycle_phase_filter = _LIFECYCLE_PHASE_MAP.get(lifecycle_phase_str)
+    active_columns = set(settings["active_columns"])
+    excluded_object_types = settings["excluded_types"]
     inactive_column_indices = [
         chip_id for chip_id, _, _ in ANALYSE_BY_CHIPS
         if chip_id not in active_columns and chip_id not in ("phase", "category")
     ]
     skipped_classes = _expand_skipped_columns(inactive_column_indices)
-    excluded_object_types = request.POST.getlist("excluded_types")
-    display_column_headers = "display_column_headers" in request.POST
-    node_label_max_length = int(request.POST.get("node_label_max_length", "15"))
 
     sankey = ImpactRepartitionSankey(
         system,
-        aggregation_threshold_percent=aggregation_threshold_percent,
-        node_label_max_length=node_label_max_length,
+        aggregation_threshold_percent=settings["aggregation_threshold_percent"],
+        node_label_max_length=settings["node_label_max_length"],
         skipped_impact_repartition_classes=skipped_classes or None,
-        skip_phase_footprint_split=skip_phase_footprint_split,
-        skip_object_category_footprint_split=skip_object_category_footprint_split,
-        skip_object_footprint_split=skip_object_footprint_split,
+        skip_phase_footprint_split="phase" not in active_columns,
+        skip_object_category_footprint_split="category" not in active_columns,
+        skip_object_footprint_split="7" not in active_columns and "8" not in active_columns,
         excluded_object_types=excluded_object_types or None,
         lifecycle_phase_filter=lifecycle_phase_filter,
         display_column_information=False,
     )
     sankey_payload, sankey_height = _build_sankey_payload(sankey)
-    sankey_payload_json = json.dumps(sankey_payload)
-
-    column_headers = _build_column_headers_context(sankey) if display_column_headers else []
 
     lifecycle_info = f"{lifecycle_phase_str.lower()} " if lifecycle_phase_filter else ""
     excluded_info = ""
@@ -361,45 +356,105 @@ def sankey_diagram(request):
         labels = [ClassUIConfigProvider.get_label(cls) for cls in excluded_object_types]
         excluded_info = f" excluding {', '.join(labels)}"
     total_co2 = _format_sankey_value(sankey, _get_sankey_total_value(sankey))
-    title = f"{system.name} — {lifecycle_info}impact repartition{excluded_info} (total {total_co2} CO₂eq)"
     subtitle_map = {None: "All phases", LifeCyclePhases.MANUFACTURING: "Manufacturing only", LifeCyclePhases.USAGE: "Usage only"}
-    subtitle = subtitle_map[lifecycle_phase_filter]
 
+    return {
+        "sankey_payload": sankey_payload,
+        "sankey_height": sankey_height,
+        "column_headers": _build_column_headers_context(sankey),
+        "title": f"{system.name} — {lifecycle_info}impact repartition{excluded_info} (total {total_co2} CO₂eq)",
+        "subtitle": subtitle_map[lifecycle_phase_filter],
+    }
+
+
+@render_exception_modal_if_error
+@time_it
+def sankey_diagram(request):
+    card_id = request.POST.get("card_id", "")
+    workspace = SessionWorkspaceRepository(request.session)
+    repository = workspace.active_repository()
+
+    # Settings shaping the diagram; the card id and the column headers toggle only affect how it is displayed.
+    settings = {
+        "lifecycle_phase_filter": request.POST.get("lifecycle_phase_filter", ""),
+        "aggregation_threshold_percent": float(request.POST.get("aggregation_threshold_percent", "1.0")),
+        "active_columns": sorted(set(request.POST.getlist("active_columns"))),
+        "excluded_types": request.POST.getlist("excluded_types"),
+        "node_label_max_length": int(request.POST.get("node_label_max_length", "15")),
+    }
+    display_column_headers = "display_column_headers" in request.POST
     card_settings = {
         "id": card_id,
-        "lifecycle_phase_filter": lifecycle_phase_str,
-        "aggregation_threshold_percent": aggregation_threshold_percent,
-        "active_columns": sorted(active_columns),
-        "excluded_types": excluded_object_types,
+        "lifecycle_phase_filter": settings["lifecycle_phase_filter"],
+        "aggregation_threshold_percent": settings["aggregation_threshold_percent"],
+        "active_columns": settings["active_columns"],
+        "excluded_types": settings["excluded_types"],
         "display_column_headers": display_column_headers,
-        "node_label_max_length": node_label_max_length,
+        "node_label_max_length": settings["node_label_max_length"],
     }
+    # Renderings only depend on the payload version and the settings: saved cards re-rendered after a reload
+    # skip the repartition computation, and the model hydration too unless the card settings must be saved.
+    rendering_cache = SessionCacheRepository(request.session, namespace="sankey_rendering")
+    version = workspace.slot_version(workspace.active_slot())
+    cached_rendering = rendering_cache.get(_sankey_rendering_cache_key(version, settings)) if version else None
+    model_web = ModelWeb(repository) if cached_rendering is None else None
+
     config = repository.interface_config
     diagrams = config.setdefault("sankey_diagrams", [])
     existing_index = next((i for i, diagram in enumerate(diagrams) if diagram["id"] == card_id), None)
-    if existing_index is None:
-        diagrams.append(card_settings)
+    settings_changed = existing_index is None or diagrams[existing_index] != card_settings
+    if settings_changed and model_web is None:
+        model_web = ModelWeb(repository)
+
+    if cached_rendering is None:
+        system = list(model_web.response_objs["System"].values())[0]
+        rendering = _compute_sankey_rendering(system, settings)
     else:
-        diagrams[existing_index] = card_settings
-    model_web.persist_to_cache()
+        rendering = json.loads(cached_rendering)
+
+    # Rendering a saved card as it is must not save the model: a save mints a new payload version, which would
+    # invalidate every result ETag and this cache.
+    if settings_changed:
+        if existing_index is None:
+            diagrams.append(card_settings)
+        else:
+            diagrams[existing_index] = card_settings
+        model_web.persist_to_cache()
+        version = workspace.slot_version(workspace.active_slot())
+    if version and (cached_rendering is None or settings_changed):
+        # Card settings are not part of the repartition: the rendering holds for the version just saved.
+        rendering_cache.set(
+            _sankey_rendering_cache_key(version, settings), json.dumps(rendering), write_postgres=False)
 
     return render(request, "model_builder/result/sankey_diagram.html", {
         "card_id": card_id,
-        "sankey_payload_json": sankey_payload_json,
-        "sankey_height": sankey_height,
-        "column_headers": column_headers,
-        "sankey_layout": sankey_payload["layout"],
+        "sankey_payload_json": json.dumps(rendering["sankey_payload"]),
+        "sankey_height": rendering["sankey_height"],
+        "column_headers": rendering["column_headers"] if display_column_headers else [],
+        "sankey_layout": rendering["sankey_payload"]["layout"],
         "display_column_headers": display_column_headers,
-        "title": title,
-        "subtitle": subtitle,
+        "title": rendering["title"],
+        "subtitle": rendering["subtitle"],
     })
 
 
-def sankey_form(request):
+def _default_card_id(version: Optional[str]) -> str:
+    """Id of the card ``sankey_cards`` shows when none is saved.
+
+    Derived from the payload version, since ``sankey_cards`` answers under the version's ETag and a 304 replays
+    the id it rendered; random for a slot without version stamp, which gets no ETag.
+    """
+    if version is None:
+        return uuid.uuid4().hex[:8]
+    return hashlib.sha256(f"sankey-default-card:{version}".encode("utf-8")).hexdigest()[:8]
+
+
+def sankey_form(request, card_id: Optional[str] = None):
     repository = SessionWorkspaceRepository(request.session).active_repository()
     model_web = ModelWeb(repository)
     present_classes = _get_present_classes(model_web)
-    card_id = uuid.uuid4().hex[:8]
+    if card_id is None:
+        card_id = uuid.uuid4().hex[:8]
 
     exclude_chips = _build_exclude_chip_list(EXCLUDABLE_CLASSES, present_classes)
     analyse_by_chips = _build_analyse_by_chips(present_classes)
@@ -411,13 +466,15 @@ def sankey_form(request):
     })
 
 
+@conditional_on_model_version()
 def sankey_cards(request):
     """Return all saved Sankey cards, or a default one if none exist."""
-    repository = SessionWorkspaceRepository(request.session).active_repository()
+    workspace = SessionWorkspaceRepository(request.session)
+    repository = workspace.active_repository()
     saved_diagrams = repository.interface_config.get("sankey_diagrams", [])
 
     if not saved_diagrams:
-        return sankey_form(request)
+        return sankey_form(request, card_id=_default_card_id(workspace.slot_version(workspace.active_slot())))
 
     model_web = ModelWeb(repository)
     present_classes = _get_present_classes(model_web)
@@ -7,6 +7,7 @@ import json
 import os
 import gc
 
+from django.conf import settings
 from django.http import Http404, HttpResponse
 from django.shortcuts import redirect, render
 from django.urls import reverse
@@ -23,6 +24,7 @@ from model_builder.adapters.repositories import (
     SessionSystemRepository, SessionWorkspaceRepository, SessionCacheRepository)
 from model_builder.adapters.label_resolver import LabelResolver
 from model_builder.adapters.ui_config.canvas_help_info import build_canvas_class_help_info
+from model_builder.adapters.views.conditional_get import conditional_on_model_version
 from model_builder.adapters.views.source_table_row_editor_context import build_source_table_row_editor_context
 from model_builder.domain.entities.web_core.model_web import ModelWeb
 from model_builder.domain.entities.web_core.explainable_timeseries_utils import (
@@ -35,10 +37,16 @@ from model_builder.domain.entities.web_abstract_modeling_classes.explainable_obj
 from model_builder.adapters.views.exception_handling import render_exception_modal_if_error, render_recovery_page
 from model_builder.adapters.presenters.template_picker_presenter import build_picker_groups
 from model_builder.adapters.ui_config.tour_steps import build_tour_steps
+from model_builder.domain.exceptions import UploadLimitExceeded
 from model_builder.domain.services import (
-    ProgressiveImportService, SCRATCH_ID, get_template_system_data, is_empty_model)
+    EmissionsCalculationService, JsonUploadParser, ProgressiveImportService, SCRATCH_ID, TemplatePayloadStore,
+    is_empty_model)
 from utils import htmx_render, sanitize_filename, smart_truncate
 
+# Process-wide: each template is computed once, then every load serves a re-ided copy (warmed at startup by the
+# gunicorn ``when_ready`` hook).
+template_payload_store = TemplatePayloadStore(SessionSystemRepository.MAX_PAYLOAD_SIZE_MB)
+
 
 def load_system_into_session(repository, raw_system_data, workspace=None):
     """Upgrade, recompute, wrap and persist a raw system dict into a workspace slot.
@@ -53,6 +61,20 @@ def load_system_into_session(repository, raw_system_data, workspace=None):
     system_data = SessionSystemRepository.upgrade_system_data(raw_system_data)
     import_service = ProgressiveImportService(SessionSystemRepository.MAX_PAYLOAD_SIZE_MB)
     system_data = import_service.import_system(system_data)
+    return _persist_computed_system(repository, system_data, workspace)
+
+
+def load_template_into_session(repository, template_id, workspace=None):
+    """``load_system_into_session`` for a picker template (or ``SCRATCH_ID``), served precomputed.
+
+    The template's with-calc document comes from ``template_payload_store`` under a freshly minted system id,
+    so loading it costs its decode, a hydration that trusts its calculated attributes, and the cache write.
+    Raises ``KeyError`` for an unknown template id.
+    """
+    return _persist_computed_system(repository, template_payload_store.get(template_id), workspace)
+
+
+def _persist_computed_system(repository, system_data, workspace=None):
     if workspace is not None:
         system_data = workspace.distinctify_against_siblings(system_data, repository.slot)
     model_web = ModelWeb(repository, system_data)
@@ -84,13 +106,15 @@ def build_workspace_slots(workspace, active_model_web=None):
     same model a second time, so a render builds each model once rather than the active one twice.
     """
     active_slot = workspace.active_slot()
+    repositories = workspace.repositories_for([
+        slot for slot in workspace.list_slots() if slot != active_slot or active_model_web is None])
     slots = []
     for slot in workspace.list_slots():
         is_active = slot == active_slot
         if is_active and active_model_web is not None:
             model_web = active_model_web
         else:
-            model_web = ModelWeb(workspace.repository_for(slot))
+            model_web = ModelWeb(repositories[slot])
         slots.append({
             "slot": slot,
             "model_web": model_web,
@@ -166,7 +190,7 @@ def model_builder_main(request):
         model_web = ModelWeb(repository)
         if model_web.system_data is None:
             logger.info("No system data found in session, initializing with the empty 'scratch' baseline")
-            model_web = load_system_into_session(repository, get_template_system_data(SCRATCH_ID))
+            model_web = load_template_into_session(repository, SCRATCH_ID)
 
         if efootprint_version != model_web.initial_system_data_efootprint_version:
             logger.info(f"Upgrading system data from version "
@@ -224,7 +248,7 @@ def reset_model(request):
     """
     workspace = SessionWorkspaceRepository(request.session)
     repository = workspace.active_repository()
-    model_web = load_system_into_session(repository, get_template_system_data(SCRATCH_ID), workspace=workspace)
+    model_web = load_template_into_session(repository, SCRATCH_ID, workspace=workspace)
     if request.headers.get("HX-Request") != "true":
         # Non-HTMX callers (e.g. the recovery page's plain form) get a clean redirect to a fresh
         # GET of the builder, rather than the toolbar's in-place fragment swap.
@@ -259,6 +283,7 @@ def _single_model_document(repository, model_web=None) -> dict:
     return document
 
 
+@conditional_on_model_version(slot_of=_requested_slot)
 def download_json(request):
     workspace = SessionWorkspaceRepository(request.session)
     repository = workspace.repository_for(_requested_slot(request, workspace))
@@ -283,8 +308,9 @@ def download_workspace(request):
     slots = workspace.list_slots()
     # Hydrate each slot once; both the export document and the system name come from the same ModelWeb.
     models, names = [], []
+    repositories = workspace.repositories_for(slots)
     for slot in slots:
-        repository = workspace.repository_for(slot)
+        repository = repositories[slot]
         model_web = ModelWeb(repository)
         models.append(_single_model_document(repository, model_web))
         names.append(model_web.system.name)
@@ -303,6 +329,15 @@ def download_workspace(request):
     return response
 
 
+def parse_json_upload(file):
+    """Parse an uploaded JSON file in chunks, within the MAX_UPLOAD_SIZE_MB / MAX_UPLOAD_JSON_OBJECTS limits."""
+    parser = JsonUploadParser(settings.MAX_UPLOAD_SIZE_MB, settings.MAX_UPLOAD_JSON_OBJECTS)
+    try:
+        return parser.parse(file.chunks(), declared_size_bytes=file.size)
+    finally:
+        file.close()
+
+
 @time_it
 def upload_json(request):
     workspace = SessionWorkspaceRepository(request.session)
@@ -314,10 +349,11 @@ def upload_json(request):
         file = request.FILES["import-json-input"]
         try:
             if file and file.name.lower().endswith(".json"):
-                data = json.load(file)
-                file.close()
+                data = parse_json_upload(file)
             else:
                 import_error_message = "Invalid file format ! Please use a JSON file\n"
+        except UploadLimitExceeded as e:
+            import_error_message = f"{e}\n"
         except ValueError:
             import_error_message = "Invalid JSON data\n"
         finally:
@@ -378,18 +414,48 @@ def upload_json(request):
     return http_response
 
 @render_exception_modal_if_error
+@conditional_on_model_version()
 @time_it
 def result_chart(request):
-    model_web = ModelWeb(SessionWorkspaceRepository(request.session).active_repository())
-    model_web.raise_incomplete_modeling_errors()
+    system_emissions = _active_system_emissions(request)
 
     http_response = htmx_render(
-        request, "model_builder/result/result_panel.html", context={"model_web": model_web})
+        request, "model_builder/result/result_panel.html", context={"system_emissions": system_emissions})
     http_response["HX-Trigger-After-Settle"] = "triggerResultRendering"
 
     return http_response
 
 
+@conditional_on_model_version()
+@time_it
+def result_emissions(request):
+    """Emissions of the active model summed server-side into the ``granularity`` a result chart displays."""
+    granularity = request.GET.get("granularity", "year")
+    if granularity not in EmissionsCalculationService.ROLLUP_GRANULARITIES:
+        return HttpResponse(f"Unknown granularity {granularity}.", content_type="text/plain", status=400)
+    try:
+        system_emissions = _active_system_emissions(request)
+    except ValueError as error:
+        return HttpResponse(str(error), content_type="text/plain", status=400)
+    rollup = EmissionsCalculationService().rollup(system_emissions, granularity)
+
+    return HttpResponse(json.dumps(rollup), content_type="application/json")
+
+
+def _active_system_emissions(request) -> dict:
+    """Daily emissions of the active model, raising ValueError while it is incomplete for computation."""
+    repository = SessionWorkspaceRepository(request.session).active_repository()
+    # Saves store the daily emissions of complete models next to the payload: no hydration needed to read them.
+    system_emissions = repository.get_system_emissions()
+    if system_emissions is None:
+        model_web = ModelWeb(repository)
+        model_web.raise_incomplete_modeling_errors()
+        system_emissions = model_web.system_emissions
+        repository.save_system_emissions(system_emissions)
+
+    return system_emissions
+
+
 def get_calculus_graph(request, cache_key):
     cache_repository = SessionCacheRepository(request.session, namespace="calculus_graph")
     content_to_return = cache_repository.pop(cache_key)
@@ -439,6 +505,7 @@ def display_calculus_graph(request, efootprint_id: str, attr_name: str, id_of_ke
     })
 
 
+@conditional_on_model_version()
 @time_it
 def download_sources(request):
     model_web = ModelWeb(SessionWorkspaceRepository(request.session).active_repository())
@@ -499,6 +566,7 @@ def download_sources(request):
     return response
 
 
+@conditional_on_model_version()
 @time_it
 def source_table(request):
     model_web = ModelWeb(SessionWorkspaceRepository(request.session).active_repository())
@@ -512,6 +580,7 @@ def source_table_row_editor(request, object_id: str, attr_name: str):
     return render(request, "model_builder/result/source_table_row_editor.html", context)
 
 
+@conditional_on_model_version()
 @time_it
 def get_explainable_hourly_quantity_chart_and_explanation(
     request, efootprint_id: str, attr_name: str, id_of_key_in_dict: str=None):
@@ -527,6 +596,7 @@ def get_explainable_hourly_quantity_chart_and_explanation(
         "model_builder/side_panels/edit/calculated_attributes/calculated_attribute_chart.html", context=context)
 
 
+@conditional_on_model_version()
 @time_it
 def get_explainable_recurrent_quantity_chart_and_explanation(
     request, efootprint_id: str, attr_name: str):
@@ -542,6 +612,7 @@ def get_explainable_recurrent_quantity_chart_and_explanation(
         "model_builder/side_panels/edit/calculated_attributes/recurrent_attribute_chart.html", context=context)
 
 
+@conditional_on_model_version()
 @time_it
 def get_eco_logits_calculated_attribute_explanation(request, efootprint_id, attr_name):
     model_web = ModelWeb(SessionWorkspaceRepository(request.session).active_repository())
@@ -555,6 +626,7 @@ def get_eco_logits_calculated_attribute_explanation(request, efootprint_id, attr
     )
 
 
+@conditional_on_model_version()
 @time_it
 def get_calculated_attribute_explanation(request, efootprint_id, attr_name, id_of_key_in_dict=None):
     model_web = ModelWeb(SessionWorkspaceRepository(request.session).active_repository())
@@ -109,10 +109,9 @@ def open_link_existing_panel(request, parent_id, child_type_str):
 @render_exception_modal_if_error
 def open_panel_system_name(request):
     repository = SessionWorkspaceRepository(request.session).active_repository()
-    system_data = repository.get_system_data()
     return render(request, "model_builder/side_panels/rename_system.html",context={
         "header_name": "Rename your model",
-        "system_name": next(iter(system_data["System"].values()))["name"],
+        "system_name": repository.get_system_metadata().system_name,
     })
 
 
@@ -10,9 +10,9 @@ from django.shortcuts import redirect
 from django.views.decorators.http import require_POST
 
 from model_builder.adapters.repositories import SessionWorkspaceRepository
-from model_builder.adapters.views.views import load_system_into_session, render_model_builder
+from model_builder.adapters.views.views import load_template_into_session, render_model_builder
 from model_builder.domain.entities.web_core.model_web import ModelWeb
-from model_builder.domain.services import SCRATCH_ID, get_template_system_data
+from model_builder.domain.services import SCRATCH_ID
 
 
 def open_template_picker(request):
@@ -23,7 +23,7 @@ def open_template_picker(request):
     if model_web.system_data is None:
         # A cold visitor arriving via the home CTA has no session model yet; seed the empty
         # baseline so the canvas behind the picker renders.
-        model_web = load_system_into_session(repository, get_template_system_data(SCRATCH_ID))
+        model_web = load_template_into_session(repository, SCRATCH_ID)
     return render_model_builder(request, model_web, show_template_picker=True, workspace=workspace)
 
 
@@ -37,10 +37,9 @@ def load_template(request, template_id):
     workspace = SessionWorkspaceRepository(request.session)
     repository = workspace.active_repository()
     try:
-        raw_system_data = get_template_system_data(template_id)
+        model_web = load_template_into_session(repository, template_id, workspace=workspace)
     except KeyError:
         raise Http404(f"Unknown template: {template_id!r}")
-    model_web = load_system_into_session(repository, raw_system_data, workspace=workspace)
     return render_model_builder(request, model_web, show_template_picker=False, workspace=workspace)
 
 
@@ -54,8 +53,7 @@ def load_template_deeplink(request, template_id):
     """
     repository = SessionWorkspaceRepository(request.session).active_repository()
     try:
-        raw_system_data = get_template_system_data(template_id)
+        load_template_into_session(repository, template_id)
     except KeyError:
         raise Http404(f"Unknown template: {template_id!r}")
-    load_system_into_session(repository, raw_system_data)
     return redirect("model-builder")
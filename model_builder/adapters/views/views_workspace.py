@@ -27,10 +27,12 @@ from efootprint.utils.tools import time_it
 
 from model_builder.adapters.repositories import SessionWorkspaceRepository, SessionSystemRepository
 from model_builder.adapters.views.exception_handling import render_exception_modal_if_error
-from model_builder.adapters.views.views import load_system_into_session, render_model_builder, build_workspace_slots
+from model_builder.adapters.views.views import (
+    build_workspace_slots, load_system_into_session, parse_json_upload, render_model_builder,
+    template_payload_store)
 from model_builder.domain.entities.web_core.model_web import ModelWeb
 from model_builder.domain.services import (
-    ComparisonService, ProgressiveImportService, SCRATCH_ID, get_template_system_data)
+    ComparisonService, ProgressiveImportService, SCRATCH_ID)
 
 
 def _rendered_shared_chrome_oob(model_web) -> str:
@@ -131,11 +133,11 @@ def _restore_workspace(workspace, data: dict) -> None:
 def _system_data_for_add(request, workspace):
     """Build the without-calc single-model document for the model the user asked to add.
 
-    Three sources, all returning a recomputed (with-calc) document for ``add_slot`` to save:
+    Two sources, both recomputed (with-calc) by ``add_model`` before ``add_slot`` saves them:
       - ``duplicate``: deep-copy the active model via the library ``duplicate_system`` (fresh system
         id, object ids preserved) and propose the editable name ``"Copy of {name}"``;
-      - ``blank``: the empty scratch baseline;
       - ``import``: an uploaded single-model file.
+    The third source, ``blank``, is the precomputed scratch baseline and never goes through here.
     """
     source = request.POST.get("source", "duplicate")
 
@@ -143,12 +145,7 @@ def _system_data_for_add(request, workspace):
         file = request.FILES.get("import-json-input")
         if not file or not file.name.lower().endswith(".json"):
             raise ValueError("Invalid file format ! Please use a JSON file.")
-        raw = json.load(file)
-        file.close()
-        return SessionSystemRepository.upgrade_system_data(raw)
-
-    if source == "blank":
-        return get_template_system_data(SCRATCH_ID)
+        return SessionSystemRepository.upgrade_system_data(parse_json_upload(file))
 
     active_model = ModelWeb(workspace.active_repository())
     duplicated = duplicate_system(active_model.system.modeling_obj)
@@ -165,8 +162,10 @@ def add_model(request):
     workspace = SessionWorkspaceRepository(request.session)
     import_service = ProgressiveImportService(SessionSystemRepository.MAX_PAYLOAD_SIZE_MB)
     try:
-        raw_system_data = _system_data_for_add(request, workspace)
-        with_calc = import_service.import_system(raw_system_data)
+        if request.POST.get("source") == "blank":
+            with_calc = template_payload_store.get(SCRATCH_ID)
+        else:
+            with_calc = import_service.import_system(_system_data_for_add(request, workspace))
         new_slot = workspace.add_slot(with_calc)
     finally:
         gc.collect()
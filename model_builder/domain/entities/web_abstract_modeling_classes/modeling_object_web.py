@@ -526,5 +526,4 @@ class ModelingObjectWeb:
         self.modeling_obj.self_delete()
         for mod_obj in cascade_children_to_delete_before_cache_removal:
             mod_obj.self_delete()
-        self.model_web.response_objs[obj_type].pop(object_id, None)
-        self.model_web.flat_efootprint_objs_dict.pop(object_id, None)
+        self.model_web.remove_efootprint_object_from_object_dicts(obj_type, object_id)
@@ -0,0 +1,176 @@
+"""Per-object JSON fragments reused across ``ModelWeb.persist_to_cache`` calls.
+
+Serializing a model walks every efootprint object and re-encodes every timeseries, even when an edit only touched
+a handful of objects. This cache keeps, per object id, the object's with- and without-calculated-attributes JSON
+together with a snapshot of the object's attribute state, and only re-serializes objects whose snapshot changed.
+An object is serialized once, with its calculated attributes: the JSON without them is derived from it by dropping
+keys, so both documents share the input values' encoded leaves (timeseries payloads included). Each fragment also
+keeps its compact JSON encodings and their digests, from which whole documents are assembled (and measured), and
+stored per object, without encoding or hashing them again.
+
+The snapshot records what ``ModelingObject.to_json`` reads: the identity of every attribute value (efootprint
+replaces values on edit and on recomputation rather than mutating them), the in-place editable metadata of
+explainable objects (label, confidence, comment, source) and the calculus-graph links (which grow in place when
+another object starts depending on a value). Values are compared by identity and the snapshot holds references to
+them, so a freed value's id can never be mistaken for its replacement's. Anything the snapshot does not recognise
+is compared by identity too, which errs on the side of re-serializing.
+"""
+from dataclasses import dataclass
+
+from efootprint.abstract_modeling_classes.explainable_object_base_class import ExplainableObject, Source
+from efootprint.abstract_modeling_classes.explainable_object_dict import ExplainableObjectDict
+from efootprint.abstract_modeling_classes.modeling_object import ModelingObject
+
+from e_footprint_interface.json_payload_utils import encode_json, json_digest
+from model_builder.domain.interfaces import EncodedObject
+
+_SCALAR_TYPES = (str, int, float, bool, type(None))
+
+CALCULUS_GRAPH_JSON_KEYS = ("direct_ancestors_with_id", "direct_children_with_id", "explain_nested_tuples")
+
+
+def _without_calculus_graph(explainable_object_json):
+    if not isinstance(explainable_object_json, dict) or "label" not in explainable_object_json:
+        return explainable_object_json
+    return {key: value for key, value in explainable_object_json.items() if key not in CALCULUS_GRAPH_JSON_KEYS}
+
+
+def object_json_without_calculated_attributes(object_json: dict, calculated_attributes) -> tuple[dict, int]:
+    """``object_json`` as ``to_json(save_calculated_attributes=False)`` would write it, and how many values were dropped.
+
+    Calculated attributes go, and so do the calculus-graph links of input values (they point at calculated
+    attributes), including inside ExplainableObjectDicts (label-less dicts of values). Kept values are shared with
+    ``object_json``, never copied.
+    """
+    stripped_object_json = {}
+    nb_dropped = 0
+    for attr_key, attr_value in object_json.items():
+        if attr_key in calculated_attributes:
+            nb_dropped += 1
+        elif isinstance(attr_value, dict) and "label" not in attr_value:
+            stripped_object_json[attr_key] = {
+                dict_key: _without_calculus_graph(dict_value) for dict_key, dict_value in attr_value.items()}
+        else:
+            stripped_object_json[attr_key] = _without_calculus_graph(attr_value)
+
+    return stripped_object_json, nb_dropped
+
+
+def _explainable_object_state(value: ExplainableObject) -> tuple:
+    ancestor_keys = value._keys_of_direct_ancestors_with_id_loaded_from_json
+    child_keys = value._keys_of_direct_children_with_id_loaded_from_json
+    if ancestor_keys is not None and child_keys is not None:
+        graph_state = (ancestor_keys, len(ancestor_keys), child_keys, len(child_keys))
+    else:
+        ancestors = value._direct_ancestors_with_id
+        children = value._direct_children_with_id
+        graph_state = (len(ancestors), *ancestors, len(children), *children)
+
+    return value, value.label, value.confidence, value.comment, value.source, *graph_state
+
+
+def _attribute_state(value) -> tuple:
+    if isinstance(value, ExplainableObject):
+        return _explainable_object_state(value)
+    if isinstance(value, ExplainableObjectDict):
+        state = [value, len(value)]
+        for key, dict_value in value.items():
+            state.append(key)
+            state.extend(_attribute_state(dict_value))
+        return tuple(state)
+    if isinstance(value, list):
+        return value, len(value), *value
+
+    return (value,)
+
+
+def efootprint_object_state(efootprint_obj: ModelingObject) -> tuple:
+    """Snapshot of everything ``efootprint_obj.to_json`` depends on; see ``same_state``."""
+    state = []
+    for key, value in efootprint_obj.__dict__.items():
+        state.append(key)
+        state.extend(_attribute_state(value))
+
+    return tuple(state)
+
+
+def same_state(state: tuple, other_state: tuple) -> bool:
+    """Compare two snapshots: scalars by value, everything else by identity."""
+    if len(state) != len(other_state):
+        return False
+    for item, other_item in zip(state, other_state):
+        if item is other_item:
+            continue
+        if not (isinstance(item, _SCALAR_TYPES) and type(item) is type(other_item) and item == other_item):
+            return False
+
+    return True
+
+
+def _sources_of(efootprint_obj: ModelingObject) -> tuple[Source, ...]:
+    sources = []
+    for attr_val in efootprint_obj.__dict__.values():
+        if isinstance(attr_val, ExplainableObject) and attr_val.source is not None:
+            sources.append(attr_val.source)
+        elif isinstance(attr_val, ExplainableObjectDict):
+            for elt in attr_val.values():
+                if isinstance(elt, ExplainableObject) and elt.source is not None:
+                    sources.append(elt.source)
+
+    return tuple(sources)
+
+
+@dataclass
+class JsonFragment:
+    state: tuple
+    with_calculated_attributes: dict
+    without_calculated_attributes: dict
+    with_calculated_attributes_encoding: EncodedObject
+    without_calculated_attributes_encoding: EncodedObject
+    sources: tuple[Source, ...]
+
+
+def _encoded_object(object_json: dict) -> EncodedObject:
+    encoded = encode_json(object_json)
+    return EncodedObject(object_json, encoded, json_digest(encoded))
+
+
+def _json_fragment(efootprint_obj: ModelingObject, state: tuple) -> JsonFragment:
+    with_calculated_attributes = efootprint_obj.to_json(save_calculated_attributes=True)
+    without_calculated_attributes, _ = object_json_without_calculated_attributes(
+        with_calculated_attributes, efootprint_obj.calculated_attributes)
+
+    return JsonFragment(
+        state, with_calculated_attributes, without_calculated_attributes,
+        _encoded_object(with_calculated_attributes), _encoded_object(without_calculated_attributes),
+        _sources_of(efootprint_obj))
+
+
+class JsonFragmentCache:
+    """JSON fragments of the objects of one hydrated graph, keyed by object id.
+
+    Fragments are shared with the documents built from them: callers must treat those documents as read-only.
+    """
+
+    def __init__(self):
+        self._fragments: dict[str, JsonFragment] = {}
+        self.nb_reserialized = 0
+
+    def __len__(self) -> int:
+        return len(self._fragments)
+
+    def fragment_of(self, efootprint_obj: ModelingObject) -> JsonFragment:
+        """Return the object's fragment, re-serializing it only if its attribute state changed."""
+        state = efootprint_object_state(efootprint_obj)
+        fragment = self._fragments.get(efootprint_obj.id)
+        if fragment is None or not same_state(fragment.state, state):
+            fragment = _json_fragment(efootprint_obj, state)
+            self._fragments[efootprint_obj.id] = fragment
+            self.nb_reserialized += 1
+
+        return fragment
+
+    def retain_only(self, object_ids) -> None:
+        """Drop the fragments of objects no longer in the graph."""
+        for object_id in set(self._fragments) - set(object_ids):
+            del self._fragments[object_id]
@@ -1,4 +1,6 @@
 from copy import deepcopy
+from dataclasses import dataclass, field
+from functools import cache
 from time import perf_counter
 
 from efootprint.abstract_modeling_classes.explainable_object_base_class import ExplainableObject
@@ -12,13 +14,18 @@ from efootprint.logger import logger
 from efootprint.utils.tools import get_init_signature_params
 from efootprint import __version__ as efootprint_version
 
+from e_footprint_interface import __version__ as interface_version
+from e_footprint_interface.json_payload_utils import encode_json, json_object_bytes
+
 from model_builder.domain.all_efootprint_classes import MODELING_OBJECT_CLASSES_DICT, ABSTRACT_EFOOTPRINT_MODELING_CLASSES
-from model_builder.domain.interfaces import ISystemRepository
+from model_builder.domain.interfaces import EncodedObject, ISystemRepository
 from model_builder.domain.entities.web_abstract_modeling_classes.explainable_objects_web import ExplainableQuantityWeb
+from model_builder.domain.entities.web_core.json_fragment_cache import (
+    JsonFragmentCache, object_json_without_calculated_attributes)
 from model_builder.domain.efootprint_to_web_mapping import wrap_efootprint_object
 
 
-from model_builder.domain.exceptions import SessionExpiredError
+from model_builder.domain.exceptions import ConcurrentModificationError, SessionExpiredError
 from model_builder.domain.reference_data import (
     DEFAULT_NETWORKS, DEFAULT_NETWORKS_SOURCES,
     DEFAULT_DEVICES, DEFAULT_DEVICES_SOURCES,
@@ -26,9 +33,9 @@ from model_builder.domain.reference_data import (
 )
 
 DEFAULT_OBJECTS_CLASS_MAPPING = {
-    "Network": lambda: deepcopy(DEFAULT_NETWORKS),
-    "Device": lambda: deepcopy(DEFAULT_DEVICES),
-    "Country": lambda: deepcopy(DEFAULT_COUNTRIES),
+    "Network": lambda: DEFAULT_NETWORKS,
+    "Device": lambda: DEFAULT_DEVICES,
+    "Country": lambda: DEFAULT_COUNTRIES,
 }
 
 DEFAULT_SOURCES_CLASS_MAPPING = {
@@ -37,6 +44,53 @@ DEFAULT_SOURCES_CLASS_MAPPING = {
     "Country": lambda: DEFAULT_COUNTRIES_SOURCES,
 }
 
+@cache
+def default_efootprint_objects_of(object_type: str) -> tuple[ModelingObject, ...]:
+    """Catalog defaults of ``object_type``, built once per process and shared by every ModelWeb.
+
+    These objects only ever feed option lists (ids, names, attribute lookups) and must never be linked into a
+    system: selecting one goes through ``ModelWeb.get_efootprint_object_from_efootprint_id``, which materializes
+    a fresh object from the catalog JSON.
+    """
+    sources_dict = DEFAULT_SOURCES_CLASS_MAPPING[object_type]()
+    return tuple(
+        ModelWeb._efootprint_object_from_json(deepcopy(json_input), object_type, sources_dict)
+        for json_input in DEFAULT_OBJECTS_CLASS_MAPPING[object_type]().values())
+
+
+@cache
+def efootprint_type_names_of(class_key: str) -> tuple[str, ...]:
+    """Every efootprint type name (the class itself and its abstract bases) objects of ``class_key`` are listed under."""
+    concrete_class = MODELING_OBJECT_CLASSES_DICT[class_key]
+    efootprint_types = {**ABSTRACT_EFOOTPRINT_MODELING_CLASSES, **MODELING_OBJECT_CLASSES_DICT}
+    return tuple(type_name for type_name, efootprint_type in efootprint_types.items()
+                 if issubclass(concrete_class, efootprint_type))
+
+
+@dataclass
+class SerializedSystem:
+    """Both serializations of a model, built in one pass, as documents, as their compact JSON encodings and as the
+    encodings of their objects by id."""
+    with_calculated_attributes: dict
+    without_calculated_attributes: dict
+    with_calculated_attributes_json: bytes
+    without_calculated_attributes_json: bytes
+    with_calculated_attributes_objects: dict[str, EncodedObject]
+    without_calculated_attributes_objects: dict[str, EncodedObject]
+
+
+@dataclass
+class HydratedModel:
+    """The efootprint object graph a ModelWeb wraps, as handed to and from the repository's in-memory cache.
+
+    Efootprint objects never reference their ModelWeb (web wrappers are built per call), so the graph can
+    be re-wrapped by the ModelWeb of a later request.
+    """
+    response_objs: dict
+    flat_efootprint_objs_dict: dict
+    efootprint_version: str
+    json_fragments: JsonFragmentCache = field(default_factory=JsonFragmentCache)
+
 
 class ModelWeb:
     def __init__(self, repository: ISystemRepository, system_data: dict = None):
@@ -48,31 +102,83 @@ class ModelWeb:
         self.repository = repository
         self._system_emissions = None
         self.system_data_source = None
+        self.json_fragments = JsonFragmentCache()
+        hydrated_model = None
         if system_data is not None:
             raw_system_data = system_data
             self.system_data_source = "provided"
         else:
-            raw_system_data, self.system_data_source = self.repository.get_system_data_with_source()
-        if raw_system_data is not None:
+            hydrated_model = self.repository.checkout_hydrated_model()
+            raw_system_data = None
+            if hydrated_model is None:
+                raw_system_data, self.system_data_source = self.repository.get_system_data_with_source()
+        if hydrated_model is not None:
+            self.system_data_source = "hydrated_model_cache"
+            self.initial_system_data_efootprint_version = hydrated_model.efootprint_version
+            self.response_objs = hydrated_model.response_objs
+            self.flat_efootprint_objs_dict = hydrated_model.flat_efootprint_objs_dict
+            self.json_fragments = hydrated_model.json_fragments
+            self._index_class_keys_by_efootprint_type()
+            # Only read back (lazily) by the entry views that check for an empty model.
+            self.system_data = None
+            self.system = wrap_efootprint_object(list(self.response_objs["System"].values())[0], self)
+            self.creation_constraints = self._build_creation_constraints()
+            self._last_emitted_has_edge_objects = self.has_edge_objects
+        elif raw_system_data is not None:
             self.initial_system_data_efootprint_version = raw_system_data.get("efootprint_version")
+            # Provided payloads were just computed by this process; stored ones are only trusted when written
+            # by the running code.
+            trust_calculated_attributes = (
+                self.system_data_source == "provided" or self.payload_was_written_by_running_code(raw_system_data))
+            if trust_calculated_attributes and self.system_data_source != "postgres":
+                # The stored payload needs no refresh: concurrent requests waiting for it can hydrate it too.
+                self.repository.end_hydration()
             interface_upgraded_system_data = self.repository.upgrade_system_data(raw_system_data)
+            nb_stale_calculated_attributes = 0
+            if not trust_calculated_attributes:
+                interface_upgraded_system_data, nb_stale_calculated_attributes = self._without_calculated_attributes(
+                    interface_upgraded_system_data)
             start = perf_counter()
             self.response_objs, self.flat_efootprint_objs_dict, self.system_data = json_to_system(
                 interface_upgraded_system_data, launch_system_computations=True,
                 efootprint_classes_dict=MODELING_OBJECT_CLASSES_DICT)
+            self._index_class_keys_by_efootprint_type()
             self.system = wrap_efootprint_object(list(self.response_objs["System"].values())[0], self)
-            logger.info(f"ModelWeb object created in {1000 * (perf_counter() - start):.1f} ms.")
+            hydration_mode = "trusted calculated attributes" if trust_calculated_attributes else "full recomputation"
+            logger.info(f"ModelWeb object created in {1000 * (perf_counter() - start):.1f} ms ({hydration_mode}).")
             self.creation_constraints = self._build_creation_constraints()
             self._last_emitted_has_edge_objects = self.has_edge_objects
-            if self.system_data_source == "postgres":
-                self.persist_to_cache()
+            if self.system_data_source != "provided":
+                # Reads warm the in-memory cache too, not only saves.
+                self.repository.hold_hydrated_model(HydratedModel(
+                    self.response_objs, self.flat_efootprint_objs_dict, self.initial_system_data_efootprint_version,
+                    self.json_fragments))
+            if self.system_data_source == "postgres" or nb_stale_calculated_attributes > 0:
+                # Store the recomputed values so the next hydration can trust them.
+                try:
+                    self.persist_to_cache()
+                except ConcurrentModificationError:
+                    # A newer save superseded the payload refreshed here; it needs no refresh.
+                    logger.info("Skipped storing recomputed values: the payload was saved again meanwhile.")
         else:
             self.system_data = raw_system_data
             self.creation_constraints = {}
             self._last_emitted_has_edge_objects = False
             logger.info(f"Empty system data so e-footprint modeling hasn’t been hydrated.")
+        self.repository.end_hydration()
         self.constraint_changes = []
 
+    @property
+    def system_data(self):
+        """The payload the model was hydrated from; read lazily when the graph came from the in-memory cache."""
+        if self._system_data is None and self.system_data_source == "hydrated_model_cache":
+            self._system_data = self.repository.get_system_data()
+        return self._system_data
+
+    @system_data.setter
+    def system_data(self, value):
+        self._system_data = value
+
     def __getattr__(self, name):
         if name in ("system", "response_objs", "flat_efootprint_objs_dict", "initial_system_data_efootprint_version"):
             raise SessionExpiredError(
@@ -84,43 +190,89 @@ class ModelWeb:
     def to_json(self, save_calculated_attributes=True):
         """
         Serializes the current system data to JSON format.
+
+        Object fragments come from ``self.json_fragments``, so only objects changed since the previous serialization
+        are re-serialized, and the returned document shares them: it must not be mutated.
         :param save_calculated_attributes: If True, calculated attributes will be included in the serialization.
         :return: JSON representation of the system data.
         """
+        serialized_system = self.serialize()
+        if save_calculated_attributes:
+            return serialized_system.with_calculated_attributes
+        return serialized_system.without_calculated_attributes
+
+    def serialize(self) -> SerializedSystem:
+        """Serialize the system with and without calculated attributes in a single walk over its objects.
+
+        Both documents, and their JSON encodings, are assembled from the same per-object fragments (see
+        ``JsonFragmentCache``), so encoding them for storage and measuring them costs no extra pass.
+        """
         sources_by_id = {}
-        modeling_blocks = {}
+        with_calc_blocks = {}
+        without_calc_blocks = {}
+        with_calc_encoded_blocks = {}
+        without_calc_encoded_blocks = {}
+        with_calc_objects = {}
+        without_calc_objects = {}
         for efootprint_obj in self.flat_efootprint_objs_dict.values():
             obj_type = efootprint_obj.class_as_simple_str
-            if obj_type not in modeling_blocks:
-                modeling_blocks[obj_type] = {}
-            modeling_blocks[obj_type][efootprint_obj.id] = efootprint_obj.to_json(
-                save_calculated_attributes=save_calculated_attributes)
-            for attr_val in efootprint_obj.__dict__.values():
-                if isinstance(attr_val, ExplainableObject) and attr_val.source is not None:
-                    sources_by_id.setdefault(attr_val.source.id, attr_val.source)
-                elif isinstance(attr_val, ExplainableObjectDict):
-                    for elt in attr_val.values():
-                        if isinstance(elt, ExplainableObject) and elt.source is not None:
-                            sources_by_id.setdefault(elt.source.id, elt.source)
-
-        output_json = {"efootprint_version": efootprint_version}
+            if obj_type not in with_calc_blocks:
+                with_calc_blocks[obj_type] = {}
+                without_calc_blocks[obj_type] = {}
+                with_calc_encoded_blocks[obj_type] = []
+                without_calc_encoded_blocks[obj_type] = []
+            fragment = self.json_fragments.fragment_of(efootprint_obj)
+            with_calc_blocks[obj_type][efootprint_obj.id] = fragment.with_calculated_attributes
+            without_calc_blocks[obj_type][efootprint_obj.id] = fragment.without_calculated_attributes
+            with_calc_objects[efootprint_obj.id] = fragment.with_calculated_attributes_encoding
+            without_calc_objects[efootprint_obj.id] = fragment.without_calculated_attributes_encoding
+            with_calc_encoded_blocks[obj_type].append(
+                (efootprint_obj.id, fragment.with_calculated_attributes_encoding.encoded))
+            without_calc_encoded_blocks[obj_type].append(
+                (efootprint_obj.id, fragment.without_calculated_attributes_encoding.encoded))
+            for source in fragment.sources:
+                sources_by_id.setdefault(source.id, source)
+        self.json_fragments.retain_only(self.flat_efootprint_objs_dict)
+
+        header = {"efootprint_version": efootprint_version}
         if sources_by_id:
-            output_json["Sources"] = {sid: src.to_json() for sid, src in sorted(sources_by_id.items())}
-        output_json.update(modeling_blocks)
+            header["Sources"] = {sid: src.to_json() for sid, src in sorted(sources_by_id.items())}
+        encoded_header = [(key, encode_json(value)) for key, value in header.items()]
 
-        return output_json
+        def encoded_document(encoded_blocks):
+            return json_object_bytes(encoded_header + [
+                (obj_type, json_object_bytes(encoded_objects)) for obj_type, encoded_objects in encoded_blocks.items()])
+
+        return SerializedSystem(
+            {**header, **with_calc_blocks}, {**header, **without_calc_blocks},
+            encoded_document(with_calc_encoded_blocks), encoded_document(without_calc_encoded_blocks),
+            with_calc_objects, without_calc_objects)
 
     def persist_to_cache(self):
-        """Serialize current system state and persist it to the repository."""
+        """Serialize current system state and persist it to the repository, with its daily emissions.
+
+        The emissions are computed here once per saved version (when the model is complete enough to have
+        results) so that result renders read them from the repository instead of the object graph.
+        """
         start = perf_counter()
-        data_with_calculated_attributes = self.to_json(save_calculated_attributes=True)
-        data_without_calculated_attributes = self.to_json(save_calculated_attributes=False)
+        nb_reserialized_before = self.json_fragments.nb_reserialized
+        serialized_system = self.serialize()
         elapsed_ms = (perf_counter() - start) * 1000
-        logger.info(f"Serialized system data in {round(elapsed_ms, 1)} ms.")
+        nb_reserialized = self.json_fragments.nb_reserialized - nb_reserialized_before
+        logger.info(f"Serialized system data in {round(elapsed_ms, 1)} ms "
+                    f"({nb_reserialized}/{len(self.flat_efootprint_objs_dict)} objects re-serialized).")
+        self._system_emissions = None
         self.repository.save_data(
-            data_with_calculated_attributes,
-            data_without_calculated_attributes=data_without_calculated_attributes
+            serialized_system.with_calculated_attributes,
+            data_without_calculated_attributes=serialized_system.without_calculated_attributes,
+            encoded_data=serialized_system.with_calculated_attributes_json,
+            encoded_data_without_calculated_attributes=serialized_system.without_calculated_attributes_json,
+            system_emissions=self.system_emissions if self.has_results else None,
+            encoded_objects=serialized_system.with_calculated_attributes_objects,
+            encoded_objects_without_calculated_attributes=serialized_system.without_calculated_attributes_objects,
         )
+        self.repository.checkin_hydrated_model(
+            HydratedModel(self.response_objs, self.flat_efootprint_objs_dict, efootprint_version, self.json_fragments))
 
     def _build_creation_constraints(self) -> dict:
         """Snapshot of per-class creation gates plus __results__.
@@ -155,6 +307,12 @@ class ModelWeb:
         }
         return constraints
 
+    @property
+    def has_results(self) -> bool:
+        """Whether the model is complete enough for its impact to be computed."""
+        from model_builder.domain.services import SystemValidationService
+        return SystemValidationService().validate_for_computation(self).is_valid
+
     def raise_incomplete_modeling_errors(self):
         """Validate system completeness and raise ValueError if incomplete."""
         from model_builder.domain.services import SystemValidationService
@@ -162,6 +320,41 @@ class ModelWeb:
         result = validation_service.validate_for_computation(self)
         result.raise_if_invalid()
 
+    @staticmethod
+    def payload_was_written_by_running_code(system_data: dict) -> bool:
+        """True when the payload's efootprint and interface versions are those of the running code.
+
+        Only then can its calculated attributes stand in for a recomputation: a version change may alter the
+        computation logic, or an upgrade handler may rewrite inputs the stored results were derived from.
+        """
+        return (system_data.get("efootprint_version") == efootprint_version
+                and system_data.get("efootprint_interface_version") == interface_version)
+
+    @staticmethod
+    def _without_calculated_attributes(system_data: dict) -> tuple[dict, int]:
+        """Shallow copy of ``system_data`` as serialized without calculated attributes, and how many were dropped.
+
+        json_to_system reuses calculated attributes whenever the payload carries them, so dropping them is what
+        makes it recompute. The calculus graph links of input values point at calculated attributes, so they go
+        too, as in ``to_json(save_calculated_attributes=False)``. The input payload is left untouched (in-memory
+        repositories hand out their own dict).
+        """
+        stripped_data = {}
+        nb_dropped = 0
+        for key, value in system_data.items():
+            efootprint_class = MODELING_OBJECT_CLASSES_DICT.get(key)
+            if efootprint_class is None:
+                stripped_data[key] = value
+                continue
+            calculated_attributes = set(efootprint_class.calculated_attributes)
+            stripped_data[key] = {}
+            for object_id, object_json in value.items():
+                stripped_data[key][object_id], nb_object_dropped = object_json_without_calculated_attributes(
+                    object_json, calculated_attributes)
+                nb_dropped += nb_object_dropped
+
+        return stripped_data, nb_dropped
+
     @staticmethod
     def _efootprint_object_from_json(json_input: dict, object_type: str, sources_dict: dict | None = None):
         efootprint_class = MODELING_OBJECT_CLASSES_DICT[object_type]
@@ -173,15 +366,26 @@ class ModelWeb:
 
         return efootprint_object
 
+    def _index_class_keys_by_efootprint_type(self):
+        """Map each efootprint type name to the ``response_objs`` class keys whose objects are of that type.
+
+        Type lookups then read only the matching buckets, in ``response_objs`` order (the canvas order), instead of
+        scanning every class with ``issubclass``.
+        """
+        self._class_keys_by_efootprint_type = {}
+        for class_key in self.response_objs:
+            self._index_class_key(class_key)
+
+    def _index_class_key(self, class_key: str):
+        for type_name in efootprint_type_names_of(class_key):
+            self._class_keys_by_efootprint_type.setdefault(type_name, []).append(class_key)
+
     def get_efootprint_objects_from_efootprint_type(self, obj_type):
-        obj_type_class = MODELING_OBJECT_CLASSES_DICT.get(obj_type, None)
-        if obj_type_class is None:
-            obj_type_class = ABSTRACT_EFOOTPRINT_MODELING_CLASSES.get(obj_type, None)
-        existing_objects = []
-        for existing_obj_type in self.response_objs.keys():
-            if issubclass(MODELING_OBJECT_CLASSES_DICT[existing_obj_type], obj_type_class):
-                existing_objects += [obj for obj in list(self.response_objs[existing_obj_type].values())
-                                     if obj not in existing_objects]
+        if obj_type not in MODELING_OBJECT_CLASSES_DICT and obj_type not in ABSTRACT_EFOOTPRINT_MODELING_CLASSES:
+            raise ValueError(f"{obj_type} is neither a concrete nor an abstract efootprint class.")
+        existing_objects = [
+            obj for class_key in self._class_keys_by_efootprint_type.get(obj_type, [])
+            for obj in self.response_objs[class_key].values()]
 
         # An existing system object shadows the catalog default with the same name, so selecting e.g. "France" reuses
         # the country already in the system (templates ship their own copy keyed differently from the catalog) instead
@@ -189,11 +393,8 @@ class ModelWeb:
         existing_names = {obj.name for obj in existing_objects}
         output_list = []
         if obj_type in DEFAULT_OBJECTS_CLASS_MAPPING:
-            sources_dict = DEFAULT_SOURCES_CLASS_MAPPING[obj_type]()
-            for json_input in DEFAULT_OBJECTS_CLASS_MAPPING[obj_type]().values():
-                default_obj = self._efootprint_object_from_json(json_input, obj_type, sources_dict)
-                if default_obj.name not in existing_names:
-                    output_list.append(default_obj)
+            output_list += [default_obj for default_obj in default_efootprint_objects_of(obj_type)
+                            if default_obj.name not in existing_names]
 
         output_list += existing_objects
 
@@ -210,7 +411,7 @@ class ModelWeb:
         if efootprint_id in self.flat_efootprint_objs_dict.keys():
             efootprint_object = self.flat_efootprint_objs_dict[efootprint_id]
         else:
-            web_object_json = DEFAULT_OBJECTS_CLASS_MAPPING[object_type]()[efootprint_id]
+            web_object_json = deepcopy(DEFAULT_OBJECTS_CLASS_MAPPING[object_type]()[efootprint_id])
             sources_dict = DEFAULT_SOURCES_CLASS_MAPPING[object_type]()
             efootprint_object = self._efootprint_object_from_json(web_object_json, object_type, sources_dict)
             web_object = self.add_new_efootprint_object_to_system(efootprint_object)
@@ -222,9 +423,15 @@ class ModelWeb:
         object_type = efootprint_object.class_as_simple_str
         if object_type not in self.response_objs:
             self.response_objs[object_type] = {}
+            self._index_class_key(object_type)
         self.response_objs[object_type][efootprint_object.id] = efootprint_object
         self.flat_efootprint_objs_dict[efootprint_object.id] = efootprint_object
 
+    def remove_efootprint_object_from_object_dicts(self, object_type: str, object_id: str):
+        # The class key stays indexed: its bucket may be refilled, and an empty bucket costs nothing to read.
+        self.response_objs[object_type].pop(object_id, None)
+        self.flat_efootprint_objs_dict.pop(object_id, None)
+
     def add_new_efootprint_object_to_system(self, efootprint_object: ModelingObject):
         self.add_new_efootprint_object_to_object_dicts(efootprint_object)
         for modeling_obj_attribute in efootprint_object.mod_obj_attributes:
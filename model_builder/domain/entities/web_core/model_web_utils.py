@@ -43,6 +43,63 @@ def get_reindexed_array_from_dict(
     return reindex_array(val, global_start, total_hours)
 
 
+def build_hourly_matrix(
+    rows: List[List[ExplainableHourlyQuantities]], global_start, total_hours: int, unit) -> np.ndarray:
+    """Stack rows of summed hourly quantities into one float32 (rows × hours) matrix of magnitudes in ``unit``.
+
+    Each quantity is added at its offset from ``global_start`` and converted by a single scalar factor, with no
+    intermediate pint arrays. The hour axis is zero-padded to whole days, ready for ``to_rounded_daily_sums``.
+    """
+    matrix = np.zeros((len(rows), math.ceil(total_hours / 24) * 24), dtype=np.float32)
+    for row_index, ehqs in enumerate(rows):
+        for ehq in ehqs:
+            offset = int((ehq.start_date - global_start).total_seconds() // 3600)
+            values = ehq.magnitude
+            conversion_factor = np.float32(u.Quantity(1, ehq.unit).to(unit).magnitude)
+            matrix[row_index, offset: offset + len(values)] += values * conversion_factor
+
+    return matrix
+
+
+def to_rounded_daily_sums(hourly_matrix: np.ndarray, rounding_depth: int = 5) -> np.ndarray:
+    """Sum every row of an hourly matrix padded to whole days into daily values, in one reshape and sum.
+
+    Only for cumulative quantities (emissions, energy): see ``to_rounded_daily_values`` for per-unit strategies.
+    """
+    nb_rows, nb_hours = hourly_matrix.shape
+    daily = hourly_matrix.reshape(nb_rows, nb_hours // 24, 24).sum(axis=2, dtype=np.float64)
+
+    return np.round(daily, rounding_depth)
+
+
+def rollup_daily_values(first_date: str, daily_matrix: np.ndarray, granularity: str,
+                        rounding_depth: int = 5) -> Tuple[List[str], np.ndarray]:
+    """Sum the daily columns of a (rows × days) matrix into day, week, month or year periods.
+
+    Periods are contiguous runs of days, so their sums are one ``np.add.reduceat`` over the period start indices.
+    Weeks start on Mondays. Labels are the period of each column: "YYYY-MM-DD" for days and weeks (the Monday),
+    "YYYY-MM" for months and "YYYY" for years.
+    """
+    days = np.datetime64(first_date, "D") + np.arange(daily_matrix.shape[1])
+    if granularity == "day":
+        periods = days
+    elif granularity == "week":
+        # Day 0 of datetime64 (1970-01-01) is a Thursday, i.e. weekday 3 counting from Monday.
+        periods = days - (days.astype(np.int64) + 3) % 7
+    elif granularity == "month":
+        periods = days.astype("datetime64[M]")
+    elif granularity == "year":
+        periods = days.astype("datetime64[Y]")
+    else:
+        raise ValueError(f"Unknown rollup granularity {granularity}")
+    if not len(days):
+        return [], daily_matrix
+    period_starts = np.flatnonzero(np.concatenate(([True], periods[1:] != periods[:-1])))
+    sums = np.add.reduceat(daily_matrix, period_starts, axis=1)
+
+    return np.datetime_as_string(periods[period_starts]).tolist(), np.round(sums, rounding_depth)
+
+
 def to_rounded_daily_values(quantity_arr: u.Quantity, rounding_depth: int = 5) -> List[float]:
     """
     Aggregate hourly values into daily values.
@@ -3,6 +3,8 @@
 These exceptions represent domain-level errors that can occur during
 system operations, independent of the web framework.
 """
+from typing import Optional
+
 from efootprint.logger import logger
 
 
@@ -33,3 +35,44 @@ class PayloadSizeLimitExceeded(Exception):
             f"Your recent changes have NOT been saved."
         )
         super().__init__(message)
+
+
+class ConcurrentModificationError(Exception):
+    """Raised when a save would overwrite a payload saved since the version the caller loaded.
+
+    Saves compare-and-set the slot's payload version stamp: the change that raised was computed from an
+    older model than the stored one, so it is rejected rather than silently undoing the newer save. Without
+    a ``stored_version``, another save of the slot was still in progress and the stamps could not be compared.
+    """
+
+    def __init__(self, loaded_version: Optional[str], stored_version: Optional[str] = None):
+        self.loaded_version = loaded_version
+        self.stored_version = stored_version
+        if stored_version is None:
+            logger.warning(f"Concurrent modification: another save in progress (loaded version {loaded_version})")
+        else:
+            logger.warning(
+                f"Concurrent modification: loaded version {loaded_version}, stored version {stored_version}")
+        message = (
+            "Your model was modified by another action while this one was being processed.\n\n"
+            "To avoid overwriting that modification, your last change has NOT been saved. "
+            "Please reload the page and try again."
+        )
+        super().__init__(message)
+
+
+class UploadLimitExceeded(Exception):
+    """Raised when an uploaded model file goes past the configured size or JSON object-count limit.
+
+    Reading stops as soon as a limit is crossed, so the file is never fully loaded.
+    """
+
+    def __init__(self, exceeded: str, limit: str):
+        self.exceeded = exceeded
+        self.limit = limit
+        logger.error(f"Upload limit exceeded: {exceeded} (limit: {limit})")
+        message = (
+            f"This file is too large to be imported on this shared instance ({exceeded} over the limit of "
+            f"{limit}).\n\nYour model has NOT been imported."
+        )
+        super().__init__(message)
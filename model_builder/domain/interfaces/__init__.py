@@ -1,4 +1,4 @@
-from model_builder.domain.interfaces.system_repository import ISystemRepository
+from model_builder.domain.interfaces.system_repository import EncodedObject, ISystemRepository, SystemMetadata
 from model_builder.domain.interfaces.workspace_repository import IWorkspaceRepository
 
-__all__ = ["ISystemRepository", "IWorkspaceRepository"]
+__all__ = ["EncodedObject", "ISystemRepository", "IWorkspaceRepository", "SystemMetadata"]
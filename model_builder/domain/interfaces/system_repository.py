@@ -6,11 +6,62 @@ Implementations can use Django sessions, databases, files, or in-memory storage.
 This module has NO Django dependencies, keeping the domain layer framework-agnostic.
 """
 from abc import ABC, abstractmethod
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
 from typing import Dict, Any, Optional, Tuple
 
 from efootprint.logger import logger
 
 
+@dataclass(frozen=True)
+class SystemMetadata:
+    """What existence, size and naming checks need to know about a stored payload, without the payload.
+
+    It also carries the payload's interface config (None when the payload has none), small and read on every
+    result request (the Sankey card settings), so reading the config does not mean reading the payload.
+    """
+
+    size_bytes: Optional[int]
+    efootprint_version: Optional[str]
+    system_id: Optional[str]
+    system_name: Optional[str]
+    saved_at: str
+    version: Optional[str] = None
+    interface_config: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def of_system_data(cls, data: Dict[str, Any], size_bytes: Optional[int] = None,
+                       version: Optional[str] = None) -> "SystemMetadata":
+        # Read defensively: the recovery page probes payloads that may not deserialize.
+        system_id, system_json = next(iter((data.get("System") or {}).items()), (None, None))
+        return cls(
+            size_bytes=size_bytes,
+            efootprint_version=data.get("efootprint_version"),
+            system_id=system_id,
+            system_name=system_json.get("name") if isinstance(system_json, dict) else None,
+            saved_at=datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            version=version,
+            interface_config=data.get("interface_config"),
+        )
+
+    @classmethod
+    def from_json(cls, metadata_json: Dict[str, Any]) -> "SystemMetadata":
+        return cls(**{key: metadata_json.get(key) for key in cls.__dataclass_fields__})
+
+    def to_json(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass(frozen=True)
+class EncodedObject:
+    """One object of a payload document as the serializer placed it, with its compact encoding and that
+    encoding's digest (``json_digest``), so storing the object per fragment neither encodes nor hashes it again."""
+
+    object_json: Dict[str, Any]
+    encoded: bytes
+    digest: str
+
+
 class ISystemRepository(ABC):
     """Interface for system data persistence.
 
@@ -39,6 +90,27 @@ class ISystemRepository(ABC):
         """
         return self.get_system_data(), "unknown"
 
+    def get_system_metadata(self) -> Optional[SystemMetadata]:
+        """Retrieve the metadata of the stored payload, or None if no data exists.
+
+        Repositories that keep a metadata record next to the payload answer without reading the payload;
+        this default derives it from ``get_system_data``.
+        """
+        data = self.get_system_data()
+        return SystemMetadata.of_system_data(data) if data else None
+
+    def get_system_emissions(self) -> Optional[Dict[str, Any]]:
+        """Retrieve the daily emissions stored with the current payload version, or None.
+
+        Repositories that keep them as a side document of the payload (see ``save_data``) answer without the
+        payload or the object graph; this default has none, so the caller computes them from the graph.
+        """
+        return None
+
+    def save_system_emissions(self, system_emissions: Dict[str, Any]) -> None:
+        """Store the daily emissions computed for the payload version this repository loaded."""
+        pass
+
     def get_interface_config(self) -> dict:
         """Retrieve interface_config from stored system data."""
         data = self.get_system_data()
@@ -53,6 +125,31 @@ class ISystemRepository(ABC):
     def interface_config(self, value: dict) -> None:
         self._interface_config = value
 
+    def checkout_hydrated_model(self) -> Optional[Any]:
+        """Return the hydrated object graph of the stored payload, when the repository keeps one in memory.
+
+        The graph is handed over exclusively (it may be mutated by the caller) and comes back through
+        ``checkin_hydrated_model``. Repositories without an in-process cache return None, so the caller
+        hydrates from ``get_system_data``.
+        """
+        return None
+
+    def hold_hydrated_model(self, hydrated_model: Any) -> None:
+        """Offer the graph just hydrated from the payload read by ``get_system_data`` for reuse by later requests."""
+        pass
+
+    def end_hydration(self) -> None:
+        """Signal that the caller is done hydrating the payload after ``checkout_hydrated_model`` missed.
+
+        Repositories that make concurrent hydrations of the same payload wait for each other release the
+        waiters here rather than when the request ends.
+        """
+        pass
+
+    def checkin_hydrated_model(self, hydrated_model: Any) -> None:
+        """Offer the graph matching the payload just passed to ``save_data`` for reuse by later hydrations."""
+        pass
+
     @staticmethod
     def upgrade_system_data(data: Dict[str, Any]) -> Dict[str, Any]:
         """Upgrade system data to the latest schema version.
@@ -93,7 +190,12 @@ class ISystemRepository(ABC):
     def save_data(
         self,
         data: Dict[str, Any],
-        data_without_calculated_attributes: Optional[Dict[str, Any]] = None
+        data_without_calculated_attributes: Optional[Dict[str, Any]] = None,
+        encoded_data: Optional[bytes] = None,
+        encoded_data_without_calculated_attributes: Optional[bytes] = None,
+        system_emissions: Optional[Dict[str, Any]] = None,
+        encoded_objects: Optional[Dict[str, EncodedObject]] = None,
+        encoded_objects_without_calculated_attributes: Optional[Dict[str, EncodedObject]] = None,
     ) -> None:
         """Persist the system data.
 
@@ -101,6 +203,14 @@ class ISystemRepository(ABC):
             data: The system data dictionary to save.
             data_without_calculated_attributes: Optional version without calculated attributes,
                 used for slower persistence layers (e.g., Postgres fallback cache).
+            encoded_data: Optional compact JSON encoding of ``data`` as passed, when the caller already has it
+                (see ``ModelWeb.serialize``), so it is neither encoded again to be measured nor to be stored.
+            encoded_data_without_calculated_attributes: Same for ``data_without_calculated_attributes``.
+            system_emissions: Optional daily emissions of ``data`` (``EmissionsResult.to_dict``), stored with
+                this payload version and served by ``get_system_emissions`` until the next save.
+            encoded_objects: Optional per-object encodings of ``data`` by object id (see ``ModelWeb.serialize``),
+                reused by repositories storing payloads per object.
+            encoded_objects_without_calculated_attributes: Same for ``data_without_calculated_attributes``.
         """
         pass
 
@@ -7,9 +7,9 @@ model never deserializes or recomputes the other.
 This module has NO Django dependencies, keeping the domain layer framework-agnostic.
 """
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
-from model_builder.domain.interfaces.system_repository import ISystemRepository
+from model_builder.domain.interfaces.system_repository import ISystemRepository, SystemMetadata
 
 
 class IWorkspaceRepository(ABC):
@@ -60,3 +60,15 @@ class IWorkspaceRepository(ABC):
     def active_repository(self) -> ISystemRepository:
         """Return an ``ISystemRepository`` bound to the active slot."""
         return self.repository_for(self.active_slot())
+
+    def repositories_for(self, slots: List[int]) -> Dict[int, ISystemRepository]:
+        """Return repositories bound to each of ``slots``, for operations that read several slots.
+
+        Implementations backed by a remote store fetch the slots' payloads in bulk here; this default
+        vends them one by one.
+        """
+        return {slot: self.repository_for(slot) for slot in slots}
+
+    def system_metadata_of(self, slots: List[int]) -> Dict[int, Optional[SystemMetadata]]:
+        """Return the stored-payload metadata of each of ``slots`` (None for an empty slot)."""
+        return {slot: self.repository_for(slot).get_system_metadata() for slot in slots}
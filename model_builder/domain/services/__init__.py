@@ -8,11 +8,13 @@ from model_builder.domain.services.emissions_calculation_service import Emission
 from model_builder.domain.services.comparison_service import ComparisonService, ComparisonView
 from model_builder.domain.services.edit_service import EditService, EditResult
 from model_builder.domain.services.progressive_import_service import ProgressiveImportService
+from model_builder.domain.services.json_upload_parser import JsonUploadParser
 from model_builder.domain.services.empty_model import is_empty_model
 from model_builder.domain.services.template_catalog_service import (
     CatalogEntry, CatalogGroup, CatalogGuide, SCRATCH_ID, UPLOAD_ID,
     build_template_catalog, get_template_system_data,
 )
+from model_builder.domain.services.template_payload_store import TemplatePayloadStore, all_template_ids
 
 __all__ = [
     "ObjectLinkingService",
@@ -21,7 +23,9 @@ __all__ = [
     "ComparisonService", "ComparisonView",
     "EditService", "EditResult",
     "ProgressiveImportService",
+    "JsonUploadParser",
     "is_empty_model",
     "CatalogEntry", "CatalogGroup", "CatalogGuide", "SCRATCH_ID", "UPLOAD_ID",
     "build_template_catalog", "get_template_system_data",
+    "TemplatePayloadStore", "all_template_ids",
 ]
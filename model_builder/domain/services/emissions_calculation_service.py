@@ -5,15 +5,15 @@ timeseries for visualization.
 """
 import math
 from dataclasses import dataclass
-from datetime import timedelta
 from typing import Dict, List, Any, Protocol, runtime_checkable
 
+import numpy as np
 from efootprint.abstract_modeling_classes.explainable_hourly_quantities import ExplainableHourlyQuantities
 from efootprint.constants.units import u
 from efootprint.utils.display import best_display_unit, human_readable_unit
 
 from model_builder.domain.entities.web_core.model_web_utils import (
-    determine_global_time_bounds, get_reindexed_array_from_dict, to_rounded_daily_values
+    build_hourly_matrix, determine_global_time_bounds, rollup_daily_values, to_rounded_daily_sums
 )
 
 
@@ -48,17 +48,20 @@ class EmissionsCalculationService:
     emissions values suitable for charting.
     """
 
-    EMPTY_VALUE_KEYS = (
-        "Servers_and_storage_energy",
-        "ExternalAPIs_energy",
-        "Edge_devices_energy",
-        "Devices_energy",
-        "Network_energy",
-        "Servers_and_storage_fabrication",
-        "ExternalAPIs_fabrication",
-        "Edge_devices_fabrication",
-        "Devices_fabrication",
+    # Chart series: the footprint phase they read and the categories they sum.
+    EMISSION_SERIES = (
+        ("Servers_and_storage_energy", "energy", ("Servers", "Storage")),
+        ("ExternalAPIs_energy", "energy", ("ExternalAPIs",)),
+        ("Edge_devices_energy", "energy", ("EdgeDevices",)),
+        ("Devices_energy", "energy", ("Devices",)),
+        ("Network_energy", "energy", ("Network",)),
+        ("Servers_and_storage_fabrication", "fabrication", ("Servers", "Storage")),
+        ("ExternalAPIs_fabrication", "fabrication", ("ExternalAPIs",)),
+        ("Edge_devices_fabrication", "fabrication", ("EdgeDevices",)),
+        ("Devices_fabrication", "fabrication", ("Devices",)),
     )
+    EMPTY_VALUE_KEYS = tuple(series_key for series_key, _phase, _categories in EMISSION_SERIES)
+    ROLLUP_GRANULARITIES = ("day", "week", "month", "year")
 
     def calculate_daily_emissions(self, system: SystemWithFootprints) -> EmissionsResult:
         """Calculate daily emissions timeseries for the system.
@@ -83,36 +86,40 @@ class EmissionsCalculationService:
 
         global_start, total_hours = determine_global_time_bounds(ehqs)
 
-        dates = [
-            (global_start + timedelta(days=i)).strftime("%Y-%m-%d")
-            for i in range(math.ceil(total_hours / 24))
-        ]
+        dates = np.datetime_as_string(
+            np.datetime64(global_start.date()) + np.arange(math.ceil(total_hours / 24)), unit="D").tolist()
         display_unit = best_display_unit(system.total_footprint.sum().value)
 
-        def _daily_values(key: str, footprint_dict: Dict) -> List[float]:
-            return to_rounded_daily_values(
-                get_reindexed_array_from_dict(key, footprint_dict, global_start, total_hours).to(display_unit))
-
+        # One series × hours matrix in the display unit, aggregated to days in a single reshape and sum.
+        footprints = {"energy": energy, "fabrication": fab}
+        rows = [
+            [footprints[phase][category] for category in categories
+             if isinstance(footprints[phase][category], ExplainableHourlyQuantities)]
+            for _series_key, phase, categories in self.EMISSION_SERIES
+        ]
+        daily_values = to_rounded_daily_sums(build_hourly_matrix(rows, global_start, total_hours, display_unit))
         values = {
-            "Servers_and_storage_energy": to_rounded_daily_values(
-                (
-                    get_reindexed_array_from_dict("Servers", energy, global_start, total_hours)
-                    + get_reindexed_array_from_dict("Storage", energy, global_start, total_hours)
-                ).to(display_unit)
-            ),
-            "ExternalAPIs_energy": _daily_values("ExternalAPIs", energy),
-            "Edge_devices_energy": _daily_values("EdgeDevices", energy),
-            "Devices_energy": _daily_values("Devices", energy),
-            "Network_energy": _daily_values("Network", energy),
-            "Servers_and_storage_fabrication": to_rounded_daily_values(
-                (
-                    get_reindexed_array_from_dict("Servers", fab, global_start, total_hours)
-                    + get_reindexed_array_from_dict("Storage", fab, global_start, total_hours)
-                ).to(display_unit)
-            ),
-            "ExternalAPIs_fabrication": _daily_values("ExternalAPIs", fab),
-            "Edge_devices_fabrication": _daily_values("EdgeDevices", fab),
-            "Devices_fabrication": _daily_values("Devices", fab),
+            series_key: series_daily_values.tolist()
+            for (series_key, _phase, _categories), series_daily_values in zip(self.EMISSION_SERIES, daily_values)
         }
 
         return EmissionsResult(dates=dates, values=values, display_unit=human_readable_unit(display_unit))
+
+    def rollup(self, system_emissions: Dict[str, Any], granularity: str) -> Dict[str, Any]:
+        """Sum daily emissions (``EmissionsResult.to_dict``) into the periods of ``granularity``.
+
+        Returns the period ``labels``, the per-series ``values`` of each period and the ``display_unit``, so the
+        result charts only download the granularity they display.
+        """
+        series_keys = list(system_emissions["values"])
+        daily_matrix = np.array([system_emissions["values"][key] for key in series_keys], dtype=np.float64)
+        first_date = system_emissions["dates"][0] if system_emissions["dates"] else "1970-01-01"
+        labels, period_values = rollup_daily_values(
+            first_date, daily_matrix.reshape(len(series_keys), len(system_emissions["dates"])), granularity)
+
+        return {
+            "granularity": granularity,
+            "labels": labels,
+            "values": {key: series_values.tolist() for key, series_values in zip(series_keys, period_values)},
+            "display_unit": system_emissions["display_unit"],
+        }
@@ -0,0 +1,68 @@
+"""Service for parsing uploaded e-footprint JSON files within size and object-count limits.
+
+An uploaded file is read chunk by chunk and abandoned as soon as its raw size goes past the limit, then
+parsed with a hook that counts JSON objects as they are built and aborts past the object limit: an oversized
+or maliciously dense file is rejected before it is fully held in memory, let alone imported.
+"""
+import json
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from efootprint.logger import logger
+
+from model_builder.domain.exceptions import UploadLimitExceeded
+
+
+class JsonUploadParser:
+    """Parses the chunks of an uploaded JSON file into the plain dicts ``json_to_system`` expects."""
+
+    def __init__(self, max_size_mb: float, max_json_objects: int):
+        """Initialize the parser with its limits.
+
+        Args:
+            max_size_mb: Maximum raw size of the file, in megabytes.
+            max_json_objects: Maximum number of JSON objects (``{...}``) the file may contain.
+        """
+        self.max_size_mb = max_size_mb
+        self.max_json_objects = max_json_objects
+
+    def parse(self, chunks: Iterable[bytes], declared_size_bytes: Optional[int] = None) -> Any:
+        """Read and parse the file.
+
+        Args:
+            chunks: The file content, chunk by chunk.
+            declared_size_bytes: The file size announced by the upload, checked before reading anything.
+
+        Returns:
+            The parsed document.
+
+        Raises:
+            UploadLimitExceeded: If the file is larger than max_size_mb or holds more than max_json_objects.
+            ValueError: If the file is not valid JSON.
+        """
+        max_size_bytes = int(self.max_size_mb * 1024 * 1024)
+        if declared_size_bytes is not None and declared_size_bytes > max_size_bytes:
+            raise UploadLimitExceeded(
+                f"file size of {declared_size_bytes / (1024 * 1024):.1f} MB", f"{self.max_size_mb} MB")
+        content = bytearray()
+        for chunk in chunks:
+            content += chunk
+            if len(content) > max_size_bytes:
+                raise UploadLimitExceeded("file size", f"{self.max_size_mb} MB")
+
+        nb_json_objects = 0
+
+        def build_json_object(pairs: List[Tuple[str, Any]]) -> Dict[str, Any]:
+            nonlocal nb_json_objects
+            nb_json_objects += 1
+            if nb_json_objects > self.max_json_objects:
+                raise UploadLimitExceeded("number of JSON objects", f"{self.max_json_objects}")
+            return dict(pairs)
+
+        try:
+            document = json.loads(content, object_pairs_hook=build_json_object)
+        except RecursionError:
+            raise ValueError("JSON nesting too deep")
+        logger.info(f"Parsed uploaded JSON file of {len(content) / (1024 * 1024):.2f} MB "
+                    f"({nb_json_objects} JSON objects).")
+
+        return document
@@ -7,6 +7,10 @@ to fail fast if a model exceeds the maximum allowed size.
 from time import perf_counter
 from typing import Dict, Any
 
+import numpy as np
+from efootprint.abstract_modeling_classes.explainable_hourly_quantities import ExplainableHourlyQuantities
+from efootprint.abstract_modeling_classes.explainable_object_base_class import ExplainableObject
+from efootprint.abstract_modeling_classes.explainable_object_dict import ExplainableObjectDict
 from efootprint.api_utils.json_to_system import json_to_system
 from efootprint.api_utils.system_to_json import system_to_json
 from efootprint.logger import logger
@@ -17,31 +21,88 @@ from model_builder.domain.all_efootprint_classes import MODELING_OBJECT_CLASSES_
 from model_builder.domain.exceptions import PayloadSizeLimitExceeded
 
 
+class PayloadSizeEstimator:
+    """Analytic estimate of the JSON bytes an object's calculated attributes add to the payload.
+
+    Serializing each object as soon as it is computed (compressing and base64-encoding every timeseries) cost
+    as much as the final encoding, so the fail-fast check estimates instead, from counts only:
+
+      - a fixed overhead per calculated value (label, unit, explanation tuples),
+      - a few bytes per ancestor/child reference,
+      - for hourly timeseries, a few bytes per value *change*: the stored buffers are compressed, so a flat
+        series costs next to nothing whatever its length.
+
+    Calibrated on the introductory templates, the actual bytes of a whole payload lie between
+    ``LOWER_ERROR_BOUND`` and ``UPPER_ERROR_BOUND`` times the estimate (0.52x to 1.91x measured; single objects
+    spread wider, but the check runs on the running total). A lower bound over the limit rejects the model
+    early. Once the upper bound passes the limit, the estimate can no longer tell, and the computed objects are
+    measured exactly from then on; below it, the exact size is only measured once, on the final payload.
+    """
+
+    BYTES_PER_CALCULATED_VALUE = 300
+    BYTES_PER_REFERENCE = 40
+    BYTES_PER_HOURLY_VALUE_CHANGE = 3
+    LOWER_ERROR_BOUND = 0.4
+    UPPER_ERROR_BOUND = 2.5
+
+    def estimate_bytes(self, efootprint_object: Any) -> float:
+        estimated_bytes = 0.0
+        for calculated_value in self._calculated_values(efootprint_object):
+            estimated_bytes += self.BYTES_PER_CALCULATED_VALUE + self.BYTES_PER_REFERENCE * (
+                len(calculated_value.direct_ancestors_with_id) + len(calculated_value.direct_children_with_id))
+            if isinstance(calculated_value, ExplainableHourlyQuantities):
+                estimated_bytes += self.BYTES_PER_HOURLY_VALUE_CHANGE * self.nb_value_changes(calculated_value)
+        return estimated_bytes
+
+    def lower_bound_bytes(self, estimated_bytes: float) -> float:
+        return estimated_bytes * self.LOWER_ERROR_BOUND
+
+    def upper_bound_bytes(self, estimated_bytes: float) -> float:
+        return estimated_bytes * self.UPPER_ERROR_BOUND
+
+    @staticmethod
+    def nb_value_changes(hourly_quantities: ExplainableHourlyQuantities) -> int:
+        magnitude = np.asarray(hourly_quantities.magnitude)
+        if magnitude.size == 0:
+            return 0
+        return int(np.count_nonzero(np.diff(magnitude))) + 1
+
+    @staticmethod
+    def _calculated_values(efootprint_object: Any):
+        for attr_name in efootprint_object.calculated_attributes:
+            value = getattr(efootprint_object, attr_name, None)
+            values = value.values() if isinstance(value, ExplainableObjectDict) else [value]
+            yield from (item for item in values if isinstance(item, ExplainableObject))
+
+
 class ProgressiveImportService:
     """Service for importing system data with progressive size validation.
 
     This service imports e-footprint system data from JSON, computing calculated
-    attributes one object at a time and checking the cumulative size after each.
+    attributes one object at a time and checking the cumulative estimated size after each.
     This allows failing fast if a model exceeds the maximum allowed size, rather
     than computing everything first and failing at session save time.
     """
 
-    def __init__(self, max_payload_size_mb: float):
+    def __init__(self, max_payload_size_mb: float, size_estimator: PayloadSizeEstimator | None = None):
         """Initialize the service with size constraints.
 
         Args:
             max_payload_size_mb: Maximum allowed payload size in megabytes.
+            size_estimator: Estimator driving the fail-fast check during computation.
         """
         self.max_payload_size_mb = max_payload_size_mb
+        self.size_estimator = size_estimator or PayloadSizeEstimator()
 
     def import_system(self, system_data: Dict[str, Any]) -> Dict[str, Any]:
         """Import system data with progressive size validation.
 
         This method:
         1. Parses the JSON into efootprint objects without computing attributes
-        2. Monkey-patches each object to track size after computation
-        3. Triggers computations, failing fast if size limit exceeded
-        4. Returns the fully computed system_data dict
+        2. Monkey-patches each object to track its estimated size after computation
+        3. Triggers computations, failing fast if the estimate is certainly over the limit, or if the exact
+           size of the computed objects is, once the estimate can no longer rule it out
+        4. Serializes and measures the computed system once, and returns it
 
         Args:
             system_data: The raw system data dictionary (already upgraded).
@@ -50,14 +111,14 @@ class ProgressiveImportService:
             Computed system data.
 
         Raises:
-            PayloadSizeLimitExceeded: If cumulative JSON size exceeds max_payload_size_mb.
+            PayloadSizeLimitExceeded: If the payload size exceeds max_payload_size_mb.
         """
         response_objs, flat_efootprint_objs_dict, upgraded_system_data = json_to_system(
             system_data, launch_system_computations=False,
             efootprint_classes_dict=MODELING_OBJECT_CLASSES_DICT)
 
         upgraded_system_data["efootprint_version"] = efootprint_version
-        size_tracker = {"json_size": 0}
+        size_tracker = {"estimated_bytes": 0.0, "computed_objects": [], "exact_bytes": None}
 
         self._patch_objects_for_progressive_computation(flat_efootprint_objs_dict, size_tracker)
 
@@ -77,11 +138,11 @@ class ProgressiveImportService:
 
     def _patch_objects_for_progressive_computation(
             self, flat_efootprint_objs_dict: Dict[str, Any], size_tracker: Dict[str, float]) -> None:
-        """Patch all objects to track and validate size after computation.
+        """Patch all objects to track and validate their estimated size after computation.
 
         Args:
             flat_efootprint_objs_dict: Dictionary of efootprint objects by ID.
-            size_tracker: Mutable dict tracking cumulative JSON size.
+            size_tracker: Mutable dict tracking the cumulative estimated (or exact) size.
         """
         for efootprint_object in flat_efootprint_objs_dict.values():
             # Use object.__setattr__ to bypass ModelingObject's custom __setattr__ which triggers computations
@@ -91,46 +152,63 @@ class ProgressiveImportService:
 
             def compute_and_store_calculated_attributes(obj=efootprint_object):
                 obj.original_compute_calculated_attributes()
-                self._compute_json_and_track_size(obj, size_tracker)
+                self._estimate_and_track_size(obj, size_tracker)
 
             object.__setattr__(
                 efootprint_object, "compute_calculated_attributes", compute_and_store_calculated_attributes)
 
-    def _compute_json_and_track_size(
-            self, efootprint_object: Any, size_tracker: Dict[str, float]) -> None:
-        """Serialize a computed object for progressive size checks.
+    def _estimate_and_track_size(
+            self, efootprint_object: Any, size_tracker: Dict[str, Any]) -> None:
+        """Add a computed object's size to the cumulative size: estimated, or exact once the estimate is unsure.
 
         Args:
-            efootprint_object: The efootprint object to serialize.
-            size_tracker: Mutable dict tracking cumulative JSON size.
+            efootprint_object: The efootprint object whose calculated attributes were just computed.
+            size_tracker: Mutable dict tracking the cumulative estimated (or exact) size.
 
         Raises:
-            PayloadSizeLimitExceeded: If cumulative size exceeds limit.
+            PayloadSizeLimitExceeded: If the lower bound of the cumulative estimate, or the cumulative exact
+                size, exceeds the limit.
         """
-        class_name = efootprint_object.class_as_simple_str
-        # Remove patched method from instance __dict__ before to_json, so it falls back to class method
+        # Remove patched method from instance __dict__ so later computations fall back to the class method
         del efootprint_object.__dict__["compute_calculated_attributes"]
         del efootprint_object.__dict__["original_compute_calculated_attributes"]
 
-        json_data = efootprint_object.to_json(save_calculated_attributes=True)
-        json_data_size = compute_json_size(json_data).size_mb
-        size_tracker["json_size"] += json_data_size
+        if size_tracker["exact_bytes"] is not None:
+            size_tracker["exact_bytes"] += self._exact_bytes(efootprint_object)
+            self._validate_payload_size(size_mb=size_tracker["exact_bytes"] / (1024 * 1024))
+            return
 
-        logger.debug(
-            f"Computed and serialized calculated attributes for {class_name} (ID: {efootprint_object.id}), "
-            f"increasing JSON size by {round(json_data_size, 2)}. "
-            f"Total size is now {round(size_tracker['json_size'], 1)} MB")
+        size_tracker["computed_objects"].append(efootprint_object)
+        estimated_bytes = self.size_estimator.estimate_bytes(efootprint_object)
+        size_tracker["estimated_bytes"] += estimated_bytes
+        lower_bound_mb = self.size_estimator.lower_bound_bytes(size_tracker["estimated_bytes"]) / (1024 * 1024)
 
-        self._validate_payload_size(size_mb=size_tracker["json_size"])
+        logger.debug(
+            f"Computed calculated attributes for {efootprint_object.class_as_simple_str} "
+            f"(ID: {efootprint_object.id}), estimated at {round(estimated_bytes / 1024, 1)} kB. "
+            f"Estimated total is now {round(size_tracker['estimated_bytes'] / (1024 * 1024), 1)} MB")
+
+        self._validate_payload_size(size_mb=lower_bound_mb)
+
+        upper_bound_mb = self.size_estimator.upper_bound_bytes(size_tracker["estimated_bytes"]) / (1024 * 1024)
+        if upper_bound_mb > self.max_payload_size_mb:
+            logger.info(
+                f"Estimated payload may exceed {self.max_payload_size_mb} MB (up to {round(upper_bound_mb, 1)} MB), "
+                f"measuring computed objects exactly from now on.")
+            size_tracker["exact_bytes"] = sum(
+                self._exact_bytes(computed_object) for computed_object in size_tracker["computed_objects"])
+            size_tracker["computed_objects"] = []
+            self._validate_payload_size(size_mb=size_tracker["exact_bytes"] / (1024 * 1024))
 
-        object.__setattr__(efootprint_object, "saved_to_json", True)
+    @staticmethod
+    def _exact_bytes(efootprint_object: Any) -> int:
+        return compute_json_size(efootprint_object.to_json(save_calculated_attributes=True)).size_bytes
 
     def _remove_progressive_computation_patch(self, flat_efootprint_objs_dict: Dict[str, Any]) -> None:
         """Remove import-only instance attributes before canonical serialization."""
         for efootprint_object in flat_efootprint_objs_dict.values():
             efootprint_object.__dict__.pop("compute_calculated_attributes", None)
             efootprint_object.__dict__.pop("original_compute_calculated_attributes", None)
-            efootprint_object.__dict__.pop("saved_to_json", None)
 
     def _serialize_system_and_orphans(self, system: Any, flat_efootprint_objs_dict: Dict[str, Any]) -> Dict[str, Any]:
         """Serialize the connected system, then preserve objects outside that graph.
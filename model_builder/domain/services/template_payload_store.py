@@ -0,0 +1,139 @@
+"""Per-process store of computed template payloads.
+
+Loading a template (picker, deep link, reset to scratch, first visit) used to upgrade and fully recompute the
+same handful of templates on every load. ``TemplatePayloadStore`` computes each template's with-calc document
+once per process — lazily, or for all of them at startup with ``warm`` — keeps its compact encoding, and serves
+a decoded copy under a freshly minted system id, so a load only costs the decode and the session's cache write.
+
+Re-iding goes through the document's structure, never through its bytes: the System's key and ``id`` field
+are rewritten, and so are the reference-list entries that name it — the id itself, or the ``(id, attribute)``
+tuple of a calculated value pointing at it. Those entries are located once, when the template is computed, so
+a load only rewrites them; an input value or label that happens to contain the id is left alone. The new id is
+minted by the library's ``assign_fresh_system_id``, which stays the source of truth for id semantics.
+
+Pure domain: no Django. The adapter owns the process-wide instance.
+"""
+import threading
+from time import perf_counter
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple
+
+import orjson
+from efootprint.comparison.duplication import assign_fresh_system_id
+from efootprint.logger import logger
+from efootprint.modeling_templates import list_how_to_templates
+
+from model_builder.domain.interfaces.system_repository import ISystemRepository
+from model_builder.domain.reference_data.modeling_templates import INTRO_TEMPLATES
+from model_builder.domain.services.progressive_import_service import ProgressiveImportService
+from model_builder.domain.services.template_catalog_service import SCRATCH_ID, get_template_system_data
+
+
+# Path from the document root to a reference-list entry naming the System.
+ReferencePath = Tuple[Any, ...]
+
+
+def all_template_ids() -> Tuple[str, ...]:
+    """Every loadable template id: introductory, library how-to, then the scratch baseline."""
+    return tuple(t.id for t in INTRO_TEMPLATES) + tuple(t.id for t in list_how_to_templates()) + (SCRATCH_ID,)
+
+
+class TemplatePayloadStore:
+    """Computed with-calc template documents, encoded once and served re-ided."""
+
+    def __init__(self, max_payload_size_mb: float,
+                 load_template: Callable[[str], Dict[str, Any]] = get_template_system_data):
+        """
+        Args:
+            max_payload_size_mb: Size limit the templates are imported under.
+            load_template: Resolves a template id to its raw serialized System (KeyError when unknown).
+        """
+        self.max_payload_size_mb = max_payload_size_mb
+        self._load_template = load_template
+        self._encoded_payloads: Dict[str, Tuple[bytes, str, str, List[ReferencePath]]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._encoded_payloads)
+
+    def get(self, template_id: str) -> Dict[str, Any]:
+        """A computed copy of the template, with a System id no other load of it shares.
+
+        Raises ``KeyError`` for an unknown id.
+        """
+        encoded_payload, system_id, system_name, reference_paths = self._encoded_payload(template_id)
+        fresh_system_id = assign_fresh_system_id(SimpleNamespace(id=system_id, name=system_name)).id
+        return self._with_system_id(orjson.loads(encoded_payload), system_id, fresh_system_id, reference_paths)
+
+    def warm(self, template_ids: Iterable[str] = None) -> None:
+        """Compute every template up front; a template failing to compute is left to compute on demand."""
+        start = perf_counter()
+        for template_id in template_ids or all_template_ids():
+            try:
+                self._encoded_payload(template_id)
+            except Exception as exc:  # noqa: BLE001
+                logger.warning(f"Could not precompute template {template_id}: {exc}")
+        logger.info(f"Precomputed {len(self)} template payloads in {round(perf_counter() - start, 1)} s.")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._encoded_payloads.clear()
+
+    def _encoded_payload(self, template_id: str) -> Tuple[bytes, str, str, List[ReferencePath]]:
+        encoded_payload = self._encoded_payloads.get(template_id)
+        if encoded_payload is not None:
+            return encoded_payload
+        # Held while computing so that concurrent first loads of a template wait for a single computation.
+        with self._lock:
+            if template_id not in self._encoded_payloads:
+                self._encoded_payloads[template_id] = self._compute(template_id)
+            return self._encoded_payloads[template_id]
+
+    def _compute(self, template_id: str) -> Tuple[bytes, str, str, List[ReferencePath]]:
+        start = perf_counter()
+        system_data = ISystemRepository.upgrade_system_data(self._load_template(template_id))
+        system_data = ProgressiveImportService(self.max_payload_size_mb).import_system(system_data)
+        system_id, system_json = next(iter(system_data["System"].items()))
+        encoded_payload = orjson.dumps(system_data)
+        reference_paths = list(self._system_references(system_data, system_id))
+        logger.info(
+            f"Computed template {template_id} ({round(len(encoded_payload) / (1024 * 1024), 2)} MB) "
+            f"in {round((perf_counter() - start) * 1000, 1)} ms.")
+        return encoded_payload, system_id, system_json["name"], reference_paths
+
+    @staticmethod
+    def _tuple_prefix(system_id: str) -> str:
+        # Serialized ``(id, attribute)`` references are the Python repr of the tuple.
+        return f"({system_id!r},"
+
+    @classmethod
+    def _system_references(cls, node: Any, system_id: str, path: ReferencePath = ()) -> Iterator[ReferencePath]:
+        """Paths of the reference-list entries naming ``system_id``, outside the System's own key and id."""
+        if isinstance(node, dict):
+            for key, value in node.items():
+                yield from cls._system_references(value, system_id, path + (key,))
+        elif isinstance(node, list):
+            tuple_prefix = cls._tuple_prefix(system_id)
+            for index, item in enumerate(node):
+                if isinstance(item, str):
+                    if item == system_id or item.startswith(tuple_prefix):
+                        yield path + (index,)
+                else:
+                    yield from cls._system_references(item, system_id, path + (index,))
+
+    @classmethod
+    def _with_system_id(cls, system_data: Dict[str, Any], system_id: str, fresh_system_id: str,
+                        reference_paths: List[ReferencePath]) -> Dict[str, Any]:
+        tuple_prefix, fresh_tuple_prefix = cls._tuple_prefix(system_id), cls._tuple_prefix(fresh_system_id)
+        # Paths were recorded under the template's System key, so the references are rewritten first.
+        for reference_path in reference_paths:
+            references = system_data
+            for key in reference_path[:-1]:
+                references = references[key]
+            reference = references[reference_path[-1]]
+            references[reference_path[-1]] = (
+                fresh_system_id if reference == system_id else fresh_tuple_prefix + reference[len(tuple_prefix):])
+        system_json = system_data["System"].pop(system_id)
+        system_json["id"] = fresh_system_id
+        system_data["System"][fresh_system_id] = system_json
+        return system_data
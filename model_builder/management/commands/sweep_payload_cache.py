@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from model_builder.adapters.repositories.cache_backend import CacheBackend
+from model_builder.adapters.repositories.payload_table_cache import PayloadTableCache
+
+
+class Command(BaseCommand):
+    help = "Delete expired rows of the Postgres payload cache table, in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=PayloadTableCache.SWEEP_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        postgres_cache = CacheBackend._get_cache(CacheBackend.POSTGRES_CACHE_ALIAS)
+        if not isinstance(postgres_cache, PayloadTableCache):
+            self.stdout.write(f"Cache {CacheBackend.POSTGRES_CACHE_ALIAS!r} is not a payload table; nothing to sweep.")
+            return
+        nb_deleted = postgres_cache.sweep_expired(batch_size=options["batch_size"])
+        self.stdout.write(f"Deleted {nb_deleted} expired payload cache rows.")
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.17 on 2026-10-17 18:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CachedPayload',
+            fields=[
+                ('key', models.CharField(max_length=255, primary_key=True, serialize=False)),
+                ('value', models.BinaryField()),
+                ('is_pickled', models.BooleanField(default=False)),
+                ('expires_at', models.DateTimeField(db_index=True, null=True)),
+            ],
+            options={
+                'db_table': 'model_builder_cached_payload',
+            },
+        ),
+    ]
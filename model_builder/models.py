@@ -0,0 +1,17 @@
+from django.db import models
+
+
+class CachedPayload(models.Model):
+    """An entry of the Postgres cache tier (see ``PayloadTableCache``).
+
+    Values are the bytes ``CacheBackend`` stores (compact JSON, possibly compressed), kept as they are; other
+    values are pickled. ``expires_at`` is indexed so that expired rows are swept in batches rather than culled.
+    """
+
+    key = models.CharField(max_length=255, primary_key=True)
+    value = models.BinaryField()
+    is_pickled = models.BooleanField(default=False)
+    expires_at = models.DateTimeField(null=True, db_index=True)
+
+    class Meta:
+        db_table = "model_builder_cached_payload"
@@ -52,6 +52,7 @@ urlpatterns = [
     path("download-json/", views.download_json, name="download-json"),
     path("download-workspace/", views.download_workspace, name="download-workspace"),
     path("result-chart/", views.result_chart, name="result-chart"),
+    path("result-emissions/", views.result_emissions, name="result-emissions"),
     path("open-import-json-panel/", views.open_import_json_panel, name="open-import-json-panel"),
     path("upload-json/", views.upload_json, name="upload-json"),
     path("display-calculus-graph/<efootprint_id>/<attr_name>/", model_builder.adapters.views.views.display_calculus_graph,
@@ -1,4 +1,9 @@
 """Pytest configuration and shared fixtures."""
+import os
+
+# Postgres cache writes stay synchronous under test: assertions read the cache right after a save.
+os.environ.setdefault("CACHE_POSTGRES_WRITE_BEHIND", "0")
+
 from efootprint.abstract_modeling_classes.explainable_object_base_class import Source
 
 pytest_plugins = ["tests.fixtures.system_builders"]
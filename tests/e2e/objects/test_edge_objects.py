@@ -191,8 +191,9 @@ class TestEdgeObjects:
         # Click results and check that server footprints are not zero.
         model_builder.open_result_panel()
         model_builder.result_chart_should_be_visible()
-        server_energy = page.evaluate("window.emissions.values['Servers_and_storage_energy']")
-        server_fabrication = page.evaluate("window.emissions.values['Servers_and_storage_fabrication']")
+        server_energy = page.evaluate("window.emissions.rollups.year.then(r => r.values['Servers_and_storage_energy'])")
+        server_fabrication = page.evaluate(
+            "window.emissions.rollups.year.then(r => r.values['Servers_and_storage_fabrication'])")
         assert any(value > 0 for value in server_energy) or any(value > 0 for value in server_fabrication)
 
     def test_edge_device_with_advanced_options(self, empty_model_builder: ModelBuilderPage):
@@ -3,7 +3,8 @@
 Each committed JSON must load through the interface's real import path
 (``ProgressiveImportService``) and produce a non-empty computed footprint —
 the success criterion "complete, working system... results compute without
-error". Fails if a template stops loading or computing after a library schema
+error" — and its computed payload must stay within the size estimator's
+calibrated error bounds. Fails if a template stops loading or computing after a library schema
 change (re-run ``python -m scripts.build_intro_templates`` to regenerate).
 
 ``test_scenario_constructor_round_trips_to_committed_json`` additionally guards
@@ -14,6 +15,7 @@ including a live Boavizta API call via ``BoaviztaCloudServer.from_defaults``.
 """
 import importlib
 import json
+from copy import deepcopy
 
 import pytest
 from efootprint.abstract_modeling_classes.empty_explainable_object import EmptyExplainableObject
@@ -21,9 +23,12 @@ from efootprint.abstract_modeling_classes.modeling_object import ModelingObject
 from efootprint.api_utils.json_to_system import json_to_system
 from efootprint.api_utils.system_to_json import system_to_json
 
+from e_footprint_interface.json_payload_utils import compute_json_size
+from model_builder.domain.all_efootprint_classes import MODELING_OBJECT_CLASSES_DICT
 from model_builder.domain.reference_data.modeling_templates import INTRO_TEMPLATES
 from model_builder.domain.reference_data.modeling_templates.introductory.registry import HERE
 from model_builder.domain.services import ProgressiveImportService
+from model_builder.domain.services.progressive_import_service import PayloadSizeEstimator
 
 # Mirror the production import cap (InMemorySystemRepository(max_payload_size_mb=30.0)).
 MAX_PAYLOAD_SIZE_MB = 30.0
@@ -54,6 +59,20 @@ def test_template_imports_and_computes_through_interface_path(tpl):
         f"Template {tpl.id} produced an empty total_footprint")
 
 
+@_params
+def test_size_estimate_bounds_the_computed_template_payload(tpl):
+    """Pins the ``PayloadSizeEstimator`` calibration: its bounds must hold on every introductory template."""
+    raw = _load_raw(tpl)
+    imported = ProgressiveImportService(max_payload_size_mb=MAX_PAYLOAD_SIZE_MB).import_system(deepcopy(raw))
+    _, flat_obj_dict, _ = json_to_system(imported, efootprint_classes_dict=MODELING_OBJECT_CLASSES_DICT)
+    estimator = PayloadSizeEstimator()
+    estimated_bytes = sum(estimator.estimate_bytes(efootprint_object) for efootprint_object in flat_obj_dict.values())
+    actual_bytes = compute_json_size(imported).size_bytes
+
+    assert estimator.lower_bound_bytes(estimated_bytes) <= actual_bytes
+    assert actual_bytes <= estimator.upper_bound_bytes(estimated_bytes) + compute_json_size(raw).size_bytes
+
+
 def test_iot_template_contains_edge_objects():
     """The IoT template must serialize edge objects so the Step 5 edge toggle latches on load."""
     iot = next(tpl for tpl in INTRO_TEMPLATES if tpl.id == "iot_industrial")
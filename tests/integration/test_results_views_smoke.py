@@ -9,6 +9,7 @@ SystemValidationService) on each archetype.
 
 Each archetype × endpoint pair is one test. Endpoints covered:
 - GET /model_builder/result-chart/    — fires the moment "Results" is clicked
+- GET /model_builder/result-emissions/ — fetched by each result chart for its granularity
 - POST /model_builder/sankey-diagram/ — fires when the panel settles
 
 RAISE_EXCEPTIONS=1 is critical: without it, render_exception_modal_if_error
@@ -182,6 +183,7 @@ _DEFAULT_POST = {
 
 ENDPOINTS = [
     ("result_chart", lambda client: client.get("/model_builder/result-chart/")),
+    ("result_emissions", lambda client: client.get("/model_builder/result-emissions/", {"granularity": "month"})),
     ("sankey_diagram", lambda client: client.post("/model_builder/sankey-diagram/", _DEFAULT_POST)),
 ]
 
@@ -315,8 +315,10 @@ def test_entry_view_collapses_workspace_when_a_parked_slot_cache_expired(client,
     workspace.set_active_slot(0)
     session.save()
 
-    # Drop slot 1's payload from both caches while the session index still lists it (TTL expiry).
+    # Drop slot 1's payload from both caches while the session index still lists it (TTL expiry: the
+    # metadata record shares the payload's TTLs).
     CacheBackend().delete(workspace.repository_for(1)._cache_key())
+    CacheBackend().delete(workspace.repository_for(1)._metadata_cache_key())
 
     response = client.get("/model_builder/")
 
@@ -343,8 +345,9 @@ def test_entry_view_reseeds_when_every_slot_cache_expired(client, minimal_system
     assert workspace.list_slots() == [0, 1]
 
     # Both payloads expire from both caches while the session index still lists both slots.
-    CacheBackend().delete(workspace.repository_for(0)._cache_key())
-    CacheBackend().delete(workspace.repository_for(1)._cache_key())
+    for slot in (0, 1):
+        CacheBackend().delete(workspace.repository_for(slot)._cache_key())
+        CacheBackend().delete(workspace.repository_for(slot)._metadata_cache_key())
 
     response = client.get("/model_builder/")
 
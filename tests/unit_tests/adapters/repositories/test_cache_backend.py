@@ -0,0 +1,258 @@
+"""Unit tests for CacheBackend: the storage codec (JSON encoding, optional compression), the per-worker L1 and locks."""
+import os
+from unittest.mock import MagicMock, patch
+
+import orjson
+import pytest
+from django.core.cache.backends.locmem import LocMemCache
+
+from model_builder.adapters.repositories.cache_backend import CacheBackend, L1Cache, LockHeldError, l1_cache
+from model_builder.adapters.repositories.postgres_write_behind import postgres_write_behind
+
+LARGE_DATA = {"System": {f"id-{index}": {"name": "Server", "value": index} for index in range(2000)}}
+
+
+@pytest.mark.parametrize("codec", ["zlib", "lzma"])
+def test_large_payloads_are_compressed_behind_a_codec_header(codec):
+    with patch.object(CacheBackend, "COMPRESSION_CODEC", codec), \
+            patch.object(CacheBackend, "COMPRESSION_MIN_BYTES", 1024):
+        stored = CacheBackend._encode(LARGE_DATA)
+
+    assert stored.startswith(CacheBackend.COMPRESSION_HEADERS[codec])
+    assert len(stored) < len(orjson.dumps(LARGE_DATA))
+    assert CacheBackend._decode(stored) == LARGE_DATA
+
+
+def test_payloads_below_the_threshold_are_stored_as_plain_json():
+    with patch.object(CacheBackend, "COMPRESSION_CODEC", "zlib"), \
+            patch.object(CacheBackend, "COMPRESSION_MIN_BYTES", 1024):
+        assert CacheBackend._encode({"a": 1}) == orjson.dumps({"a": 1})
+
+
+def test_incompressible_payloads_are_stored_as_they_are():
+    incompressible = os.urandom(4096)
+    with patch.object(CacheBackend, "COMPRESSION_CODEC", "zlib"), \
+            patch.object(CacheBackend, "COMPRESSION_MIN_BYTES", 1024):
+        assert CacheBackend._encode(incompressible) == incompressible
+
+
+def test_entries_without_header_still_read_once_compression_is_on():
+    with patch.object(CacheBackend, "COMPRESSION_CODEC", "lzma"):
+        assert CacheBackend._decode(orjson.dumps(LARGE_DATA)) == LARGE_DATA
+        assert CacheBackend._decode(LARGE_DATA) is LARGE_DATA
+
+
+def test_compressed_entries_still_read_once_compression_is_off():
+    with patch.object(CacheBackend, "COMPRESSION_MIN_BYTES", 1024):
+        stored = CacheBackend._encode(LARGE_DATA)
+
+    with patch.object(CacheBackend, "COMPRESSION_CODEC", "none"):
+        assert CacheBackend._encode(LARGE_DATA) == orjson.dumps(LARGE_DATA)
+        assert CacheBackend._decode(stored) == LARGE_DATA
+
+
+@pytest.fixture
+def redis_cache():
+    """Back CacheBackend with fresh in-memory caches and an empty L1."""
+    redis_cache = LocMemCache("test-redis", {})
+    postgres_cache = LocMemCache("test-postgres", {})
+    redis_cache.clear()
+    postgres_cache.clear()
+
+    def get_cache(alias):
+        return redis_cache if alias == CacheBackend.REDIS_CACHE_ALIAS else postgres_cache
+
+    with patch.object(CacheBackend, "_get_cache", side_effect=get_cache):
+        l1_cache.clear()
+        yield redis_cache
+        l1_cache.clear()
+
+
+class TestL1Cache:
+    def test_unchanged_value_is_served_from_l1_with_a_version_check(self, redis_cache):
+        CacheBackend().set("key", LARGE_DATA, write_postgres=False)
+
+        with patch.object(redis_cache, "get_many", wraps=redis_cache.get_many) as get_many_mock, \
+                patch.object(redis_cache, "get", wraps=redis_cache.get) as get_mock:
+            assert CacheBackend().get_with_source("key") == (LARGE_DATA, "redis")
+
+        get_many_mock.assert_not_called()
+        get_mock.assert_called_once_with(CacheBackend._version_key("key"))
+
+    def test_value_written_by_another_worker_is_read_from_redis(self, redis_cache):
+        CacheBackend().set("key", {"v": 1}, write_postgres=False)
+        # Another worker's write replaces both the value and its version stamp.
+        redis_cache.set_many({"key": orjson.dumps({"v": 2}), CacheBackend._version_key("key"): "other-worker"})
+
+        assert CacheBackend().get("key") == {"v": 2}
+        assert l1_cache.get("key").version == "other-worker"
+
+    def test_delete_by_another_worker_invalidates_the_l1_copy(self, redis_cache):
+        CacheBackend().set("key", {"v": 1}, write_postgres=False)
+        redis_cache.delete_many(["key", CacheBackend._version_key("key")])
+
+        assert CacheBackend().get("key") is None
+        assert l1_cache.get("key") is None
+
+    def test_delete_drops_the_value_and_its_version(self, redis_cache):
+        CacheBackend().set("key", {"v": 1})
+
+        CacheBackend().delete("key")
+
+        assert redis_cache.get(CacheBackend._version_key("key")) is None
+        assert l1_cache.get("key") is None
+
+    def test_values_without_version_stamp_are_not_kept(self, redis_cache):
+        redis_cache.set("key", orjson.dumps({"v": 1}))
+
+        assert CacheBackend().get("key") == {"v": 1}
+        assert len(l1_cache) == 0
+
+    def test_least_recently_used_values_are_evicted_past_the_byte_ceiling(self):
+        cache = L1Cache(max_mb=3 / (1024 * 1024))
+        cache.put("a", "v", b"a")
+        cache.put("b", "v", b"b")
+        cache.get("a")
+        cache.put("c", "v", b"cc")
+
+        assert cache.get("b") is None
+        assert cache.total_bytes == 3
+
+
+class TestBulkOperations:
+    def test_get_many_reads_each_tier_once(self, redis_cache):
+        CacheBackend().set_many({"a": {"v": "a"}, "b": {"v": "b"}})
+        CacheBackend().set("c", {"v": "c"}, write_redis=False)
+        postgres_cache = CacheBackend._get_cache(CacheBackend.POSTGRES_CACHE_ALIAS)
+
+        with patch.object(redis_cache, "get_many", wraps=redis_cache.get_many) as redis_get_many, \
+                patch.object(postgres_cache, "get_many", wraps=postgres_cache.get_many) as postgres_get_many:
+            results = CacheBackend().get_many_with_source(["a", "b", "c", "missing"])
+
+        assert results == {"a": ({"v": "a"}, "redis"), "b": ({"v": "b"}, "redis"), "c": ({"v": "c"}, "postgres"),
+                           "missing": (None, None)}
+        redis_get_many.assert_called_once()
+        postgres_get_many.assert_called_once_with(["c", "missing"])
+
+    def test_get_many_refreshes_stale_l1_copies(self, redis_cache):
+        CacheBackend().set_many({"a": {"v": 1}, "b": {"v": 1}}, write_postgres=False)
+        redis_cache.set_many({"a": orjson.dumps({"v": 2}), CacheBackend._version_key("a"): "other-worker"})
+
+        assert CacheBackend().get_many(["a", "b"]) == {"a": {"v": 2}, "b": {"v": 1}}
+        assert l1_cache.get("a").version == "other-worker"
+
+
+class TestPostgresWriteBehind:
+    def test_postgres_writes_are_queued_and_read_back_before_the_flush(self, redis_cache):
+        postgres_cache = CacheBackend._get_cache(CacheBackend.POSTGRES_CACHE_ALIAS)
+        with patch.object(postgres_write_behind, "enabled", True), \
+                patch.object(postgres_cache, "set", wraps=postgres_cache.set) as postgres_set:
+            CacheBackend().set("key", {"v": 1}, write_redis=False)
+            assert CacheBackend().get_with_source("key") == ({"v": 1}, "postgres")
+            assert postgres_write_behind.flush(5)
+
+        postgres_set.assert_called_once()
+        assert CacheBackend._decode(postgres_cache.get("key")) == {"v": 1}
+
+    def test_delete_drops_the_queued_write(self, redis_cache):
+        with patch.object(postgres_write_behind, "enabled", True):
+            CacheBackend().set("key", {"v": 1})
+            CacheBackend().delete("key")
+            assert postgres_write_behind.flush(5)
+
+        assert CacheBackend().get("key") is None
+
+
+class TestLocks:
+    def test_lock_held_past_the_wait_returns_none_unless_asked_to_raise(self, redis_cache):
+        assert CacheBackend().acquire_lock("save", 10, 0) is not None
+
+        assert CacheBackend().acquire_lock("save", 10, 0) is None
+        with pytest.raises(LockHeldError):
+            CacheBackend().acquire_lock("save", 10, 0, raise_if_held=True)
+
+    def test_release_leaves_a_lock_retaken_by_another_holder(self, redis_cache):
+        expired_token = CacheBackend().acquire_lock("save", 10, 0)
+        redis_cache.delete("lock:save")
+        other_token = CacheBackend().acquire_lock("save", 10, 0)
+
+        CacheBackend().release_lock("save", expired_token)
+        assert redis_cache.get("lock:save") == other_token
+
+        CacheBackend().release_lock("save", other_token)
+        assert redis_cache.get("lock:save") is None
+
+    def test_release_on_redis_is_one_compare_and_delete_script(self):
+        redis_cache = MagicMock()
+        redis_cache.make_and_validate_key.side_effect = lambda key: f":1:{key}"
+        redis_cache._cache._serializer.dumps.side_effect = lambda value: f"pickled-{value}".encode()
+        client = redis_cache._cache.get_client.return_value
+
+        with patch.object(CacheBackend, "_get_cache", return_value=redis_cache):
+            CacheBackend().release_lock("save", "token")
+
+        client.register_script.assert_called_once_with(CacheBackend.RELEASE_LOCK_SCRIPT)
+        client.register_script.return_value.assert_called_once_with(keys=[":1:lock:save"], args=[b"pickled-token"])
+        redis_cache.get.assert_not_called()
+        redis_cache.delete.assert_not_called()
+
+
+class TestTouch:
+    def test_touch_refreshes_values_and_their_version_stamps(self, redis_cache):
+        CacheBackend().set("key", {"v": 1}, redis_timeout_seconds=1, write_postgres=False)
+
+        with patch.object(redis_cache, "touch", wraps=redis_cache.touch) as touch_mock:
+            CacheBackend().touch_many(["key"], redis_timeout_seconds=60, touch_postgres=False)
+
+        assert {call.args for call in touch_mock.call_args_list} == {
+            ("key", 60), (CacheBackend._version_key("key"), 60)}
+
+    def test_touch_on_redis_is_one_pipeline(self):
+        redis_cache = MagicMock()
+        redis_cache.make_and_validate_key.side_effect = lambda key: f":1:{key}"
+        redis_cache.get_backend_timeout.side_effect = lambda timeout: timeout
+        pipeline = redis_cache._cache.get_client.return_value.pipeline.return_value
+
+        with patch.object(CacheBackend, "_get_cache", side_effect=lambda alias: (
+                redis_cache if alias == CacheBackend.REDIS_CACHE_ALIAS else None)):
+            CacheBackend().touch_many(["a", "b"], redis_timeout_seconds=60)
+
+        assert [call.args for call in pipeline.expire.call_args_list] == [
+            (":1:a", 60), (":1:b", 60), (":1:cache_version:a", 60), (":1:cache_version:b", 60)]
+        pipeline.execute.assert_called_once_with()
+        redis_cache.touch.assert_not_called()
+
+
+class TestCounters:
+    def test_counter_reaching_zero_is_deleted_with_the_redis_copy_of_its_key(self, redis_cache):
+        CacheBackend().set("fragment", {"v": 1})
+        assert CacheBackend().add_to_counters({"refs": 2}, 60) == {"refs": 2}
+
+        assert CacheBackend().add_to_counters({"refs": -1}, 60, delete_at_zero={"refs": "fragment"}) == {"refs": 1}
+        assert CacheBackend().add_to_counters({"refs": -1}, 60, delete_at_zero={"refs": "fragment"}) == {"refs": 0}
+
+        assert redis_cache.get("refs") is None
+        assert redis_cache.get("fragment") is None
+        assert CacheBackend().get_with_source("fragment") == ({"v": 1}, "postgres")
+
+    def test_missing_counter_is_never_decremented(self, redis_cache):
+        assert CacheBackend().add_to_counters({"refs": -1}, 60) == {"refs": None}
+        assert redis_cache.get("refs") is None
+
+    def test_counters_on_redis_are_one_script_without_a_lock(self):
+        redis_cache = MagicMock()
+        redis_cache.make_and_validate_key.side_effect = lambda key: f":1:{key}"
+        redis_cache._cache._serializer.dumps.side_effect = lambda value: value
+        client = redis_cache._cache.get_client.return_value
+        client.register_script.return_value.return_value = [0, 3]
+
+        with patch.object(CacheBackend, "_get_cache", return_value=redis_cache):
+            counts = CacheBackend().add_to_counters({"refs:a": -1, "refs:b": 1}, 60, delete_at_zero={"refs:a": "a"})
+
+        assert counts == {"refs:a": 0, "refs:b": 3}
+        client.register_script.assert_called_once_with(CacheBackend.ADD_TO_COUNTERS_SCRIPT)
+        client.register_script.return_value.assert_called_once_with(
+            keys=[":1:refs:a", ":1:a", ":1:cache_version:a", ":1:refs:b", ":1:refs:b", ":1:cache_version:refs:b"],
+            args=[60, -1, 1])
+        redis_cache.add.assert_not_called()
+        redis_cache.incr.assert_not_called()
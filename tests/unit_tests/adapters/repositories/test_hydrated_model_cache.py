@@ -0,0 +1,401 @@
+"""Unit tests for the per-worker hydrated model cache.
+
+Covers the LRU bookkeeping (version-tagged lookups, entry and memory ceilings), the checkout/request-scope
+contract that keeps half-mutated graphs out of the cache, and the ModelWeb round trip through a session
+repository: a saved model is re-wrapped without hydration until the next save mints a new version stamp.
+"""
+import threading
+from contextvars import copy_context
+from time import monotonic
+from unittest.mock import patch
+
+import pytest
+from efootprint.api_utils.json_to_system import json_to_system
+
+from model_builder.adapters.repositories.cache_backend import CacheBackend
+from model_builder.adapters.repositories.hydrated_model_cache import (
+    HydratedModelCache, RedisHydrationLock, hydrated_model_cache)
+from model_builder.adapters.repositories.session_system_repository import SessionSystemRepository
+from model_builder.adapters.repositories.workspace_index import WorkspaceIndex
+from model_builder.domain.entities.web_core.model_web import ModelWeb
+from tests.unit_tests.adapters.repositories.test_workspace_repository import DictSession
+
+MB = 1024 * 1024
+
+
+class TestHydratedModelCache:
+    def test_take_hits_only_on_matching_version(self):
+        cache = HydratedModelCache(max_mb=10, max_entries=4)
+        cache.put(("s", 0), "v1", "graph", MB)
+
+        assert cache.take(("s", 0), "v2") is None
+        # A stale-version lookup drops the entry: it can never be served again.
+        assert len(cache) == 0
+
+        cache.put(("s", 0), "v1", "graph", MB)
+        assert cache.take(("s", 0), "v1") == "graph"
+
+    def test_take_checks_the_graph_out(self):
+        cache = HydratedModelCache(max_mb=10, max_entries=4)
+        cache.put(("s", 0), "v1", "graph", MB)
+
+        cache.take(("s", 0), "v1")
+
+        assert cache.take(("s", 0), "v1") is None
+        assert cache.total_bytes == 0
+
+    def test_least_recently_used_entries_are_evicted_past_the_memory_ceiling(self):
+        cache = HydratedModelCache(max_mb=3, max_entries=10)
+        cache.put("a", "v", "graph-a", MB)
+        cache.put("b", "v", "graph-b", MB)
+        cache.put("c", "v", "graph-c", 2 * MB)
+
+        assert cache.total_bytes == 3 * MB
+        assert cache.take("a", "v") is None
+        assert cache.take("b", "v") == "graph-b"
+        assert cache.take("c", "v") == "graph-c"
+
+    def test_entry_ceiling(self):
+        cache = HydratedModelCache(max_mb=100, max_entries=2)
+        for key in "abc":
+            cache.put(key, "v", key, MB)
+
+        assert len(cache) == 2
+        assert cache.take("a", "v") is None
+
+    def test_graph_heavier_than_the_ceiling_is_not_cached(self):
+        cache = HydratedModelCache(max_mb=1, max_entries=2)
+        cache.put("a", "v", "graph", 2 * MB)
+
+        assert len(cache) == 0
+
+    def test_zero_ceiling_disables_the_cache(self):
+        cache = HydratedModelCache(max_mb=0, max_entries=2)
+        cache.put("a", "v", "graph", 1)
+
+        assert not cache.enabled
+        assert len(cache) == 0
+
+
+class TestRequestScope:
+    def test_successful_request_returns_its_checkouts(self):
+        cache = HydratedModelCache(max_mb=10, max_entries=4)
+        cache.put("a", "v1", "graph", MB)
+
+        token = cache.begin_request()
+        cache.take("a", "v1")
+        cache.end_request(token, succeeded=True)
+
+        assert cache.take("a", "v1") == "graph"
+
+    def test_failed_request_drops_its_checkouts(self):
+        cache = HydratedModelCache(max_mb=10, max_entries=4)
+        cache.put("a", "v1", "graph", MB)
+
+        token = cache.begin_request()
+        cache.take("a", "v1")
+        cache.end_request(token, succeeded=False)
+
+        assert cache.take("a", "v1") is None
+
+    def test_discarded_checkouts_are_not_returned_even_if_the_response_succeeds(self):
+        cache = HydratedModelCache(max_mb=10, max_entries=4)
+        cache.put("a", "v1", "graph", MB)
+
+        token = cache.begin_request()
+        cache.take("a", "v1")
+        cache.discard_request_checkouts()
+        cache.end_request(token, succeeded=True)
+
+        assert len(cache) == 0
+
+    def test_put_of_a_newer_version_supersedes_the_pending_checkout(self):
+        cache = HydratedModelCache(max_mb=10, max_entries=4)
+        cache.put("a", "v1", "old", MB)
+
+        token = cache.begin_request()
+        cache.take("a", "v1")
+        cache.put("a", "v2", "new", MB)
+        cache.end_request(token, succeeded=True)
+
+        assert cache.take("a", "v2") == "new"
+
+
+def _in_request(cache, fn, succeeded=True):
+    """Run ``fn`` in a fresh context wrapped in a request scope, as the middleware does."""
+    def run():
+        token = cache.begin_request()
+        try:
+            return fn()
+        finally:
+            cache.end_request(token, succeeded)
+    return copy_context().run(run)
+
+
+class TestSingleFlight:
+    def test_concurrent_request_waits_for_the_hydration_but_never_takes_the_hydrated_graph(self):
+        cache = HydratedModelCache(max_mb=10, max_entries=4, single_flight_wait_seconds=5)
+        leader_missed, leader_release, leader_request_end = threading.Event(), threading.Event(), threading.Event()
+        follower_result = {}
+
+        def leader():
+            assert cache.take("a", "v1") is None
+            leader_missed.set()
+            leader_release.wait(5)
+            cache.put("a", "v2", "graph", MB)
+            # Still rendering from the graph it handed in.
+            leader_request_end.wait(5)
+
+        def follower():
+            follower_result["graph"] = cache.take("a", "v2")
+
+        leader_thread = threading.Thread(target=lambda: _in_request(cache, leader))
+        leader_thread.start()
+        leader_missed.wait(5)
+        follower_thread = threading.Thread(target=lambda: _in_request(cache, follower))
+        follower_thread.start()
+        follower_thread.join(0.2)
+        assert follower_thread.is_alive()
+
+        leader_release.set()
+        follower_thread.join(5)
+        assert follower_result["graph"] is None
+        leader_request_end.set()
+        leader_thread.join(5)
+        assert cache.take("a", "v2") == "graph"
+
+    def test_flight_ends_with_the_hydration_not_the_request(self):
+        cache = HydratedModelCache(max_mb=10, max_entries=4, single_flight_wait_seconds=5)
+        token = cache.begin_request()
+        cache.take("a", "v1")
+        cache.end_hydration("a")
+
+        start = monotonic()
+        assert _in_request(cache, lambda: cache.take("a", "v1")) is None
+        assert monotonic() - start < 1
+        cache.end_request(token, succeeded=True)
+
+    def test_hit_holds_no_flight(self):
+        cache = HydratedModelCache(max_mb=10, max_entries=4, single_flight_wait_seconds=5)
+        cache.put("a", "v1", "graph", MB)
+        token = cache.begin_request()
+        assert cache.take("a", "v1") == "graph"
+
+        start = monotonic()
+        assert _in_request(cache, lambda: cache.take("a", "v1")) is None
+        assert monotonic() - start < 1
+        cache.end_request(token, succeeded=True)
+
+    def test_failed_request_releases_its_flight(self):
+        cache = HydratedModelCache(max_mb=10, max_entries=4, single_flight_wait_seconds=5)
+        _in_request(cache, lambda: cache.take("a", "v1"), succeeded=False)
+
+        assert _in_request(cache, lambda: cache.take("a", "v1")) is None
+
+    def test_waiting_gives_up_after_the_timeout(self):
+        cache = HydratedModelCache(max_mb=10, max_entries=4, single_flight_wait_seconds=0.05)
+        token = cache.begin_request()
+        cache.take("a", "v1")
+
+        assert _in_request(cache, lambda: cache.take("a", "v1")) is None
+        cache.end_request(token, succeeded=True)
+
+    def test_hydrating_request_holds_the_cross_worker_lock(self):
+        cache = HydratedModelCache(
+            max_mb=10, max_entries=4, single_flight_wait_seconds=0.05, distributed_lock=RedisHydrationLock())
+        other_worker_lock = RedisHydrationLock()
+        token = cache.begin_request()
+        cache.take(("s", 0), "v1")
+
+        assert other_worker_lock.acquire(("s", 0), "v1", wait_seconds=0.05) is None
+        cache.end_hydration(("s", 0))
+        other_worker_token = other_worker_lock.acquire(("s", 0), "v1", wait_seconds=0.05)
+        assert other_worker_token is not None
+        other_worker_lock.release(("s", 0), "v1", other_worker_token)
+        cache.end_request(token, succeeded=True)
+
+
+@pytest.fixture
+def session_caches():
+    """Route CacheBackend through plain dicts so SessionSystemRepository round-trips without Django caches."""
+    store = {}
+
+    def fake_get_with_source(self, cache_key):
+        return (store[cache_key], "redis") if cache_key in store else (None, None)
+
+    def fake_get_many_with_source(self, cache_keys):
+        return {cache_key: fake_get_with_source(self, cache_key) for cache_key in cache_keys}
+
+    def fake_set(self, cache_key, value, **kwargs):
+        if kwargs.get("write_redis", True):
+            store[cache_key] = CacheBackend._decode(value)
+
+    def fake_set_many(self, values, **kwargs):
+        for cache_key, value in values.items():
+            fake_set(self, cache_key, value, **kwargs)
+
+    def fake_delete_many(self, cache_keys):
+        for cache_key in cache_keys:
+            store.pop(cache_key, None)
+
+    def fake_add_to_counters(self, deltas, timeout_seconds, delete_at_zero=None):
+        for counter_key, delta in deltas.items():
+            store[counter_key] = max(store.get(counter_key, 0) + delta, 0)
+        counts = {counter_key: store[counter_key] for counter_key in deltas}
+        for counter_key, deleted_key in (delete_at_zero or {}).items():
+            if counts.get(counter_key) == 0:
+                store.pop(counter_key, None)
+                store.pop(deleted_key, None)
+        return counts
+
+    with patch.object(CacheBackend, "get_with_source", fake_get_with_source), \
+            patch.object(CacheBackend, "get_many_with_source", fake_get_many_with_source), \
+            patch.object(CacheBackend, "set", fake_set), \
+            patch.object(CacheBackend, "set_many", fake_set_many), \
+            patch.object(CacheBackend, "delete", lambda self, cache_key: store.pop(cache_key, None)), \
+            patch.object(CacheBackend, "delete_many", fake_delete_many), \
+            patch.object(CacheBackend, "touch_many", lambda self, cache_keys, **kwargs: None), \
+            patch.object(CacheBackend, "add_to_counters", fake_add_to_counters):
+        hydrated_model_cache.clear()
+        yield store
+        hydrated_model_cache.clear()
+
+
+class TestModelWebReuse:
+    def test_save_stamps_a_new_slot_version(self, session_caches, minimal_system_data):
+        session = DictSession()
+        repository = SessionSystemRepository(session)
+
+        repository.save_data(minimal_system_data)
+        first_version = WorkspaceIndex(session).slot_version(0)
+        repository.save_data(minimal_system_data)
+
+        assert first_version is not None
+        assert WorkspaceIndex(session).slot_version(0) != first_version
+
+    def test_persisted_model_is_reused_without_hydration(self, session_caches, minimal_system_data):
+        session = DictSession()
+        ModelWeb(SessionSystemRepository(session), minimal_system_data).persist_to_cache()
+
+        with patch("model_builder.domain.entities.web_core.model_web.json_to_system") as json_to_system_mock:
+            model_web = ModelWeb(SessionSystemRepository(session))
+
+        json_to_system_mock.assert_not_called()
+        assert model_web.system_data_source == "hydrated_model_cache"
+        assert model_web.system.name == "Test System"
+        assert model_web.system_data["System"] is not None
+
+    def test_a_read_after_an_eviction_warms_the_cache_for_the_next_request(self, session_caches, minimal_system_data):
+        session = DictSession()
+        ModelWeb(SessionSystemRepository(session), minimal_system_data).persist_to_cache()
+        hydrated_model_cache.clear()
+
+        first_read = _in_request(hydrated_model_cache, lambda: ModelWeb(SessionSystemRepository(session)))
+        second_read = _in_request(hydrated_model_cache, lambda: ModelWeb(SessionSystemRepository(session)))
+
+        assert first_read.system_data_source == "redis"
+        assert second_read.system_data_source == "hydrated_model_cache"
+
+    def test_a_read_outside_a_request_scope_is_not_cached(self, session_caches, minimal_system_data):
+        session = DictSession()
+        ModelWeb(SessionSystemRepository(session), minimal_system_data).persist_to_cache()
+        hydrated_model_cache.clear()
+
+        ModelWeb(SessionSystemRepository(session))
+
+        assert len(hydrated_model_cache) == 0
+
+    def test_concurrent_request_hydrates_the_payload_the_first_one_refreshed(
+            self, session_caches, minimal_system_data):
+        session = DictSession()
+        ModelWeb(SessionSystemRepository(session), minimal_system_data).persist_to_cache()
+        hydrated_model_cache.clear()
+        leader_hydrating, leader_release = threading.Event(), threading.Event()
+        model_webs = {}
+
+        def blocking_first_json_to_system(*args, **kwargs):
+            if not leader_hydrating.is_set():
+                leader_hydrating.set()
+                leader_release.wait(5)
+            return json_to_system(*args, **kwargs)
+
+        def read(role):
+            model_webs[role] = _in_request(hydrated_model_cache, lambda: ModelWeb(SessionSystemRepository(session)))
+
+        # The first read finds stale calculated attributes and stores recomputed ones; the second trusts them.
+        with patch.object(ModelWeb, "payload_was_written_by_running_code", side_effect=[False, True]), \
+                patch("model_builder.domain.entities.web_core.model_web.json_to_system",
+                      side_effect=blocking_first_json_to_system):
+            leader_thread = threading.Thread(target=read, args=("leader",))
+            leader_thread.start()
+            leader_hydrating.wait(5)
+            follower_thread = threading.Thread(target=read, args=("follower",))
+            follower_thread.start()
+            follower_thread.join(0.2)
+            assert follower_thread.is_alive()
+
+            leader_release.set()
+            leader_thread.join(5)
+            follower_thread.join(5)
+
+        leader, follower = model_webs["leader"], model_webs["follower"]
+        assert follower.system_data_source == "redis"
+        assert follower.repository._loaded_version == leader.repository._loaded_version
+        assert follower.response_objs is not leader.response_objs
+
+    def test_requests_for_a_trusted_payload_hydrate_side_by_side(self, session_caches, minimal_system_data):
+        session = DictSession()
+        ModelWeb(SessionSystemRepository(session), minimal_system_data).persist_to_cache()
+        hydrated_model_cache.clear()
+        leader_hydrating, leader_release = threading.Event(), threading.Event()
+
+        def blocking_first_json_to_system(*args, **kwargs):
+            if not leader_hydrating.is_set():
+                leader_hydrating.set()
+                leader_release.wait(5)
+            return json_to_system(*args, **kwargs)
+
+        with patch("model_builder.domain.entities.web_core.model_web.json_to_system",
+                   side_effect=blocking_first_json_to_system):
+            leader_thread = threading.Thread(target=lambda: _in_request(
+                hydrated_model_cache, lambda: ModelWeb(SessionSystemRepository(session))))
+            leader_thread.start()
+            leader_hydrating.wait(5)
+            follower_thread = threading.Thread(target=lambda: _in_request(
+                hydrated_model_cache, lambda: ModelWeb(SessionSystemRepository(session))))
+            follower_thread.start()
+            follower_thread.join(5)
+            follower_done_while_leader_hydrates = not follower_thread.is_alive()
+            leader_release.set()
+            leader_thread.join(5)
+
+        assert follower_done_while_leader_hydrates
+
+    def test_persisted_model_is_cached_under_the_saved_version_not_the_session_index(
+            self, session_caches, minimal_system_data):
+        session = DictSession()
+        repository = SessionSystemRepository(session)
+        # Another request's session write left the index behind the stamp this save minted.
+        with patch.object(WorkspaceIndex, "bump_slot_version"):
+            ModelWeb(repository, minimal_system_data).persist_to_cache()
+
+        assert WorkspaceIndex(session).slot_version(0) is None
+        assert hydrated_model_cache.contains((session.session_key, 0), repository._loaded_version)
+
+    def test_saving_from_elsewhere_invalidates_the_cached_model(self, session_caches, minimal_system_data):
+        session = DictSession()
+        ModelWeb(SessionSystemRepository(session), minimal_system_data).persist_to_cache()
+        SessionSystemRepository(session).save_data(SessionSystemRepository(session).get_system_data())
+
+        model_web = ModelWeb(SessionSystemRepository(session))
+
+        assert model_web.system_data_source == "redis"
+
+    def test_clear_evicts_the_cached_model(self, session_caches, minimal_system_data):
+        session = DictSession()
+        ModelWeb(SessionSystemRepository(session), minimal_system_data).persist_to_cache()
+
+        SessionSystemRepository(session).clear()
+
+        assert len(hydrated_model_cache) == 0
+        assert WorkspaceIndex(session).slot_version(0) is None
@@ -0,0 +1,170 @@
+"""Unit tests for content-addressed payload fragments: the split/assemble round trip, sharing across slots,
+reference counting and the fallback from an incomplete Redis tier to the Postgres document."""
+from unittest.mock import patch
+
+import pytest
+
+from e_footprint_interface.json_payload_utils import encode_json, json_digest
+from model_builder.adapters.repositories.cache_backend import CacheBackend
+from model_builder.adapters.repositories.payload_fragment_store import PayloadFragmentStore
+from model_builder.domain.interfaces import EncodedObject
+
+REDIS_TIMEOUT, POSTGRES_TIMEOUT = 3600, 86400
+
+
+class TwoTierCache:
+    """CacheBackend stand-in keeping each tier in its own dict and recording the keys written to each."""
+
+    def __init__(self):
+        self.tiers = {"redis": {}, "postgres": {}}
+        self.writes = {"redis": [], "postgres": []}
+        self.touches = {"redis": [], "postgres": []}
+
+    def get_many(self, cache_keys):
+        return {key: self.tiers["redis"].get(key, self.tiers["postgres"].get(key)) for key in cache_keys}
+
+    def set_many(self, values, write_redis=True, write_postgres=True, **kwargs):
+        for tier, written in (("redis", write_redis), ("postgres", write_postgres)):
+            if written:
+                self.tiers[tier].update({key: CacheBackend._decode(value) for key, value in values.items()})
+                self.writes[tier].extend(values)
+
+    def delete_many(self, cache_keys):
+        for tier in self.tiers.values():
+            for key in cache_keys:
+                tier.pop(key, None)
+
+    def touch_many(self, cache_keys, touch_redis=True, touch_postgres=True, **kwargs):
+        for tier, touched in (("redis", touch_redis), ("postgres", touch_postgres)):
+            if touched:
+                self.touches[tier].extend(cache_keys)
+
+    def add_to_counters(self, deltas, timeout_seconds, delete_at_zero=None):
+        counters, counts = self.tiers["redis"], {}
+        for key, delta in deltas.items():
+            counts[key] = counters[key] = counters.get(key, 0) + delta
+            if counts[key] <= 0:
+                counters.pop(key)
+                counters.pop((delete_at_zero or {}).get(key), None)
+        return counts
+
+    def fragment_keys(self, tier):
+        return {key for key in self.tiers[tier] if key.startswith(f"{PayloadFragmentStore.FRAGMENT_KEY}:")}
+
+
+@pytest.fixture
+def cache():
+    return TwoTierCache()
+
+
+@pytest.fixture
+def fragment_store(cache):
+    return PayloadFragmentStore(cache, REDIS_TIMEOUT, POSTGRES_TIMEOUT, enabled=True)
+
+
+def _document(server_name="Server", with_calculated_attributes=True):
+    server = {"id": "server-1", "name": server_name}
+    if with_calculated_attributes:
+        server["calculated_attributes_values"] = {"energy": [1, 2, 3]}
+    return {
+        "efootprint_version": "22.1.0",
+        "System": {"system-1": {"id": "system-1", "name": "System", "servers": ["server-1"]}},
+        "Server": {"server-1": server},
+    }
+
+
+def test_manifest_references_objects_by_digest_and_assembles_back(fragment_store):
+    data, data_without = _document(), _document(with_calculated_attributes=False)
+
+    manifest = fragment_store.save(data, data_without, previous_manifest=None)
+
+    assert PayloadFragmentStore.is_manifest(manifest)
+    assert manifest["with_calculated_attributes"]["efootprint_version"] == "22.1.0"
+    assert len(manifest["with_calculated_attributes"]["Server"]["server-1"]) == 64
+    assert fragment_store.assemble(manifest, "redis") == (data, "redis")
+    assert fragment_store.assemble(manifest, "postgres") == (data_without, "postgres")
+
+
+def test_split_reuses_the_serializer_encodings_of_the_objects_it_is_given():
+    document = _document()
+    system_json, server_json = document["System"]["system-1"], document["Server"]["server-1"]
+    encoded_server = encode_json(server_json)
+    encoded_objects = {
+        "server-1": EncodedObject(server_json, encoded_server, json_digest(encoded_server)),
+        # Not the JSON placed in the document: encoded afresh.
+        "system-1": EncodedObject(dict(system_json), b"stale", "stale-digest"),
+    }
+
+    with patch("model_builder.adapters.repositories.payload_fragment_store.encode_json",
+               wraps=encode_json) as encode_json_mock:
+        manifest_document, fragments = PayloadFragmentStore.split(document, encoded_objects)
+
+    encode_json_mock.assert_called_once_with(system_json)
+    assert manifest_document["Server"]["server-1"] == json_digest(encoded_server)
+    assert fragments == {json_digest(encoded_server): encoded_server,
+                         json_digest(encode_json(system_json)): encode_json(system_json)}
+
+
+def test_slots_saving_the_same_objects_share_their_fragments(fragment_store, cache):
+    first_manifest = fragment_store.save(_document(), None, previous_manifest=None)
+    written_by_first_save = len(cache.writes["redis"])
+
+    second_manifest = fragment_store.save(_document(), None, previous_manifest=None)
+
+    assert second_manifest["with_calculated_attributes"] == first_manifest["with_calculated_attributes"]
+    assert len(cache.fragment_keys("redis")) == 2
+    assert len(cache.writes["redis"]) == 2 * written_by_first_save
+
+
+def test_an_edit_only_writes_the_fragments_that_changed(fragment_store, cache):
+    manifest = fragment_store.save(_document(), None, previous_manifest=None)
+    cache.writes = {"redis": [], "postgres": []}
+
+    edited_manifest = fragment_store.save(_document(server_name="Renamed"), None, previous_manifest=manifest)
+
+    edited_digest = edited_manifest["with_calculated_attributes"]["Server"]["server-1"]
+    assert cache.writes == {"redis": [PayloadFragmentStore.fragment_key(edited_digest)],
+                            "postgres": [PayloadFragmentStore.fragment_key(edited_digest)]}
+    # The previous version of the server was only referenced by this slot.
+    assert cache.fragment_keys("redis") == {
+        PayloadFragmentStore.fragment_key(digest)
+        for digest in PayloadFragmentStore.digests_of(edited_manifest)["redis"]}
+
+
+def test_releasing_the_last_reference_deletes_only_the_redis_copy(fragment_store, cache):
+    first_manifest = fragment_store.save(_document(), None, previous_manifest=None)
+    second_manifest = fragment_store.save(_document(), None, previous_manifest=None)
+
+    fragment_store.release(first_manifest)
+    assert len(cache.fragment_keys("redis")) == 2
+
+    fragment_store.release(second_manifest)
+    assert cache.tiers["redis"] == {}
+    # Redis counters may have been evicted and restarted, so they never decide a Postgres deletion.
+    assert cache.fragment_keys("postgres") == {
+        PayloadFragmentStore.fragment_key(digest) for digest in PayloadFragmentStore.digests_of(first_manifest)["redis"]}
+
+
+def test_carried_fragments_are_touched_once_per_tier_timeout(fragment_store, cache):
+    manifest = fragment_store.save(_document(), None, previous_manifest=None)
+
+    manifest = fragment_store.save(_document(), None, previous_manifest=manifest)
+    assert cache.touches == {"redis": [], "postgres": []}
+
+    with patch("model_builder.adapters.repositories.payload_fragment_store.time",
+               return_value=manifest["refreshed_at"]["redis"] + REDIS_TIMEOUT + 1):
+        fragment_store.save(_document(), None, previous_manifest=manifest)
+    assert len(cache.touches["redis"]) == 2
+    assert cache.touches["postgres"] == []
+
+
+def test_incomplete_redis_fragments_fall_back_to_the_postgres_document(fragment_store, cache):
+    data_without = _document(with_calculated_attributes=False)
+    manifest = fragment_store.save(_document(), data_without, previous_manifest=None)
+    cache.tiers["redis"] = {key: value for key, value in cache.tiers["redis"].items()
+                            if not key.startswith(f"{PayloadFragmentStore.FRAGMENT_KEY}:")}
+
+    assert fragment_store.assemble(manifest, "redis") == (data_without, "postgres")
+
+    cache.tiers["postgres"].clear()
+    assert fragment_store.assemble(manifest, "redis") == (None, None)
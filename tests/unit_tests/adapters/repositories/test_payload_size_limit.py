@@ -1,13 +1,16 @@
 """Unit tests for payload size limit enforcement in repositories."""
 import json
 import os
+import orjson
 import pytest
 from unittest.mock import MagicMock, patch
 
-from e_footprint_interface.json_payload_utils import compute_json_size, JsonSizeResult
+from e_footprint_interface.json_payload_utils import (
+    compute_json_size, decode_json, encode_json, encode_json_payload, JsonSizeResult)
 from model_builder.adapters.repositories.in_memory_system_repository import InMemorySystemRepository
 from model_builder.adapters.repositories.session_system_repository import SessionSystemRepository
 from model_builder.adapters.repositories.cache_backend import CacheBackend
+from model_builder.adapters.repositories.payload_fragment_store import PayloadFragmentStore
 from model_builder.domain.exceptions import PayloadSizeLimitExceeded
 
 
@@ -60,6 +63,28 @@ class TestJsonPayloadUtils:
         with pytest.raises(TypeError):
             compute_json_size({"bad": object()})
 
+    def test_encode_json_payload_splices_added_keys_into_a_known_encoding(self):
+        """Topping up a known encoding with new keys should match encoding the merged payload."""
+        data = {"System": {"id": "system"}}
+        encoded_data = orjson.dumps(data)
+        data.update({"interface_config": {"a": [1, 2]}, "efootprint_interface_version": "1.0.0"})
+
+        encoded, size_result = encode_json_payload(
+            data, encoded_data, ("interface_config", "efootprint_interface_version"))
+
+        assert encoded == orjson.dumps(data)
+        assert size_result.size_bytes == len(encoded) == compute_json_size(data).size_bytes
+
+    def test_decode_json_handles_payloads_deeper_than_orjson_allows(self):
+        """Deep explanation trees must survive a round trip through the storage codec."""
+        nested = current = {}
+        for _ in range(1200):
+            child = {}
+            current["next"] = child
+            current = child
+
+        assert decode_json(encode_json(nested)) == nested
+
 
 class TestInMemorySystemRepositorySizeLimit:
     """Tests for size limit enforcement in InMemorySystemRepository."""
@@ -93,6 +118,20 @@ class TestInMemorySystemRepositorySizeLimit:
 
         assert repository.get_system_data() == large_data
 
+    def test_known_encoding_is_reused_instead_of_serializing_again(self):
+        """Should check the limit against the caller's encoding plus the stamp, without re-encoding the payload."""
+        repository = InMemorySystemRepository(max_payload_size_mb=0.001)
+        encoded_data = orjson.dumps({"System": {"test": "small data"}})
+
+        with patch("model_builder.adapters.repositories.in_memory_system_repository.compute_json_size") as size_mock:
+            with pytest.raises(PayloadSizeLimitExceeded):
+                repository.save_data(
+                    {"System": {"test": "small data"}}, encoded_data=encoded_data[:-1] + b',"pad":"' + b"x" * 2000 + b'"}')
+            repository.save_data({"System": {"test": "small data"}}, encoded_data=encoded_data)
+
+        size_mock.assert_not_called()
+        assert repository.get_system_data()["System"] == {"test": "small data"}
+
     def test_data_not_saved_when_limit_exceeded(self):
         """Should not modify stored data when limit is exceeded."""
         initial_data = {"System": {"initial": True}}
@@ -124,7 +163,9 @@ class TestSessionSystemRepositorySizeLimit:
 
     def test_save_within_limit_succeeds(self):
         """Should save data when within the size limit."""
-        repository = SessionSystemRepository(DictSession())
+        # Whole-payload storage; fragment storage is covered in test_payload_fragment_store.
+        with patch.object(PayloadFragmentStore, "ENABLED", False):
+            repository = SessionSystemRepository(DictSession())
 
         redis_cache = MagicMock()
         postgres_cache = MagicMock()
@@ -139,13 +180,14 @@ class TestSessionSystemRepositorySizeLimit:
             with patch.object(CacheBackend, "_get_cache", side_effect=get_cache):
                 repository.save_data(small_data)
 
+        # Stored as the compact JSON encoding the size check measured, not as a pickled dict.
         cache_key = f"{SessionSystemRepository.SYSTEM_DATA_KEY}:session-key:0"
-        redis_cache.set.assert_called_once_with(
-            cache_key, small_data, timeout=SessionSystemRepository.REDIS_CACHE_TIMEOUT_SECONDS
-        )
-        postgres_cache.set.assert_called_once_with(
-            cache_key, small_data, timeout=SessionSystemRepository.POSTGRES_CACHE_TIMEOUT_SECONDS
-        )
+        (redis_values,), redis_kwargs = redis_cache.set_many.call_args
+        assert redis_values[cache_key] == orjson.dumps(small_data)
+        assert redis_kwargs == {"timeout": SessionSystemRepository.REDIS_CACHE_TIMEOUT_SECONDS}
+        (postgres_values,), postgres_kwargs = postgres_cache.set_many.call_args
+        assert postgres_values[cache_key] == orjson.dumps(small_data)
+        assert postgres_kwargs == {"timeout": SessionSystemRepository.POSTGRES_CACHE_TIMEOUT_SECONDS}
 
     def test_save_exceeding_limit_raises_exception(self):
         """Should raise PayloadSizeLimitExceeded when data exceeds limit."""
@@ -166,8 +208,8 @@ class TestSessionSystemRepositorySizeLimit:
                     repository.save_data(large_data)
 
             assert exc_info.value.limit_mb == 0.001
-            redis_cache.set.assert_not_called()
-            postgres_cache.set.assert_not_called()
+            redis_cache.set_many.assert_not_called()
+            postgres_cache.set_many.assert_not_called()
 
     def test_cache_not_written_when_limit_exceeded(self):
         """Should not write to caches when limit is exceeded."""
@@ -187,8 +229,8 @@ class TestSessionSystemRepositorySizeLimit:
                 with patch.object(CacheBackend, "_get_cache", side_effect=get_cache):
                     repository.save_data(large_data)
 
-        redis_cache.set.assert_not_called()
-        postgres_cache.set.assert_not_called()
+        redis_cache.set_many.assert_not_called()
+        postgres_cache.set_many.assert_not_called()
 
     def test_limit_from_environment_variable(self):
         """Should use MAX_PAYLOAD_SIZE_MB class attribute (set from env)."""
@@ -0,0 +1,104 @@
+"""Unit tests for the Postgres payload table cache backend: upserts, expiry, the batched sweeper and the
+fallback to entries of the legacy DatabaseCache."""
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+from django.core.cache import caches
+from django.core.management import call_command
+from django.utils import timezone
+
+from model_builder.adapters.repositories.payload_table_cache import PayloadTableCache
+from model_builder.models import CachedPayload
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def payload_cache():
+    cache = PayloadTableCache(None, {"OPTIONS": {"LEGACY_ALIAS": "postgres_legacy"}})
+    caches["postgres_legacy"].clear()
+    return cache
+
+
+def _expire(cache, key):
+    CachedPayload.objects.filter(key=cache.make_key(key)).update(expires_at=timezone.now() - timedelta(seconds=1))
+
+
+def test_bytes_are_stored_as_they_are_and_other_values_pickled(payload_cache):
+    payload_cache.set("encoded", b"\x00ZL1payload", timeout=60)
+    payload_cache.set("index", {"slots": [0, 1]}, timeout=60)
+
+    assert payload_cache.get("encoded") == b"\x00ZL1payload"
+    assert payload_cache.get("index") == {"slots": [0, 1]}
+    assert not CachedPayload.objects.get(key=payload_cache.make_key("encoded")).is_pickled
+
+
+def test_set_upserts_the_row(payload_cache):
+    payload_cache.set("key", b"v1", timeout=60)
+    payload_cache.set_many({"key": b"v2", "other": b"o"}, timeout=60)
+
+    assert payload_cache.get_many(["key", "other", "missing"]) == {"key": b"v2", "other": b"o"}
+    assert CachedPayload.objects.count() == 2
+
+
+def test_expired_rows_are_not_served(payload_cache):
+    payload_cache.set("key", b"value", timeout=60)
+    _expire(payload_cache, "key")
+
+    assert payload_cache.get("key", default="miss") == "miss"
+    assert not payload_cache.has_key("key")
+    assert payload_cache.add("key", b"new", timeout=60)
+    assert payload_cache.get("key") == b"new"
+
+
+def test_none_timeout_never_expires(payload_cache):
+    payload_cache.set("key", b"value", timeout=None)
+
+    assert CachedPayload.objects.get(key=payload_cache.make_key("key")).expires_at is None
+    assert payload_cache.sweep_expired() == 0
+
+
+def test_sweep_deletes_expired_rows_in_batches(payload_cache):
+    payload_cache.set_many({f"expired-{index}": b"x" for index in range(5)}, timeout=60)
+    payload_cache.set("live", b"x", timeout=60)
+    for index in range(5):
+        _expire(payload_cache, f"expired-{index}")
+
+    with patch.object(CachedPayload.objects, "filter", wraps=CachedPayload.objects.filter) as filter_mock:
+        assert payload_cache.sweep_expired(batch_size=2) == 5
+
+    # Three batches of at most two rows, each selected then deleted, plus the final empty selection.
+    assert filter_mock.call_count == 7
+    assert list(CachedPayload.objects.values_list("key", flat=True)) == [payload_cache.make_key("live")]
+
+
+def test_writes_trigger_the_sweep_once_per_interval(payload_cache):
+    with patch.object(PayloadTableCache, "SWEEP_INTERVAL_SECONDS", 0), \
+            patch.object(PayloadTableCache, "sweep_expired", return_value=0) as sweep_mock:
+        payload_cache.set("key", b"value", timeout=60)
+    sweep_mock.assert_called_once()
+
+    with patch.object(PayloadTableCache, "sweep_expired", return_value=0) as sweep_mock:
+        payload_cache.set("key", b"value", timeout=60)
+    sweep_mock.assert_not_called()
+
+
+def test_legacy_entries_are_read_and_deleted(payload_cache):
+    caches["postgres_legacy"].set("key", b"legacy", 60)
+
+    assert payload_cache.get("key") == b"legacy"
+
+    payload_cache.delete("key")
+    assert caches["postgres_legacy"].get("key") is None
+
+
+def test_sweep_command(payload_cache):
+    payload_cache.set("key", b"value", timeout=60)
+    _expire(payload_cache, "key")
+
+    with patch("model_builder.management.commands.sweep_payload_cache.CacheBackend._get_cache",
+               return_value=payload_cache):
+        call_command("sweep_payload_cache", "--batch-size", "10")
+
+    assert not CachedPayload.objects.exists()
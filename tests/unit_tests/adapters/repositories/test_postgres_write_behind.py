@@ -0,0 +1,96 @@
+"""Unit tests for the Postgres write-behind queue: coalescing, bounds, deletes and shutdown flush."""
+import threading
+
+from model_builder.adapters.repositories.postgres_write_behind import PostgresWriteBehind
+
+
+class _BlockingWriter:
+    """Records writes; each write waits until the test releases it."""
+
+    def __init__(self):
+        self.writes = []
+        self.release = threading.Event()
+        self.started = threading.Event()
+
+    def __call__(self, key, value, timeout):
+        self.started.set()
+        self.release.wait(5)
+        self.writes.append((key, value, timeout))
+
+
+def test_successive_saves_of_a_key_are_coalesced_into_the_latest():
+    writer = _BlockingWriter()
+    queue = PostgresWriteBehind(writer, enabled=True, max_pending=4)
+    queue.submit("blocker", b"0", 10)
+    writer.started.wait(5)
+
+    for version in (b"1", b"2", b"3"):
+        queue.submit("key", version, 10)
+    assert queue.pending_value("key") == b"3"
+    writer.release.set()
+
+    assert queue.flush(5)
+    assert writer.writes == [("blocker", b"0", 10), ("key", b"3", 10)]
+    metrics = queue.metrics()
+    assert (metrics.queue_depth, metrics.nb_flushed, metrics.nb_coalesced) == (0, 2, 2)
+
+
+def test_a_write_being_flushed_is_still_served_until_it_commits():
+    writer = _BlockingWriter()
+    queue = PostgresWriteBehind(writer, enabled=True)
+    queue.submit("key", b"1", 10)
+    writer.started.wait(5)
+
+    assert queue.pending_value("key") == b"1"
+    queue.submit("key", b"2", 10)
+    assert queue.pending_value("key") == b"2"  # a newer queued save wins over the one in flight
+    writer.release.set()
+
+    assert queue.flush(5)
+    assert queue.pending_value("key") is None
+    assert writer.writes == [("key", b"1", 10), ("key", b"2", 10)]
+
+
+def test_full_queue_hands_the_write_back_to_the_caller():
+    writer = _BlockingWriter()
+    queue = PostgresWriteBehind(writer, enabled=True, max_pending=1)
+    queue.submit("blocker", b"0", 10)
+    writer.started.wait(5)
+    queue.submit("a", b"a", 10)
+
+    assert not queue.submit("b", b"b", 10)
+    assert queue.submit("a", b"a2", 10)  # coalescing into a queued key needs no room
+    writer.release.set()
+    queue.flush(5)
+
+
+def test_discard_drops_the_pending_write():
+    writer = _BlockingWriter()
+    queue = PostgresWriteBehind(writer, enabled=True)
+    queue.submit("blocker", b"0", 10)
+    writer.started.wait(5)
+    queue.submit("key", b"1", 10)
+
+    queue.discard("key")
+    writer.release.set()
+
+    assert queue.flush(5)
+    assert [key for key, _value, _timeout in writer.writes] == ["blocker"]
+
+
+def test_close_flushes_and_refuses_new_writes():
+    writer = _BlockingWriter()
+    writer.release.set()
+    queue = PostgresWriteBehind(writer, enabled=True)
+    queue.submit("key", b"1", 10)
+
+    queue.close()
+
+    assert writer.writes == [("key", b"1", 10)]
+    assert not queue.submit("key", b"2", 10)
+
+
+def test_disabled_queue_refuses_every_write():
+    queue = PostgresWriteBehind(_BlockingWriter(), enabled=False)
+
+    assert not queue.submit("key", b"1", 10)
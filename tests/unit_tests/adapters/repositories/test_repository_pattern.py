@@ -137,6 +137,31 @@ class TestSessionSystemRepositoryInterfaceConfigFallback:
         with patch("model_builder.adapters.repositories.session_system_repository.CacheBackend.get_with_source", return_value=(None, None)):
             assert repository.interface_config == {"sankey_diagrams": [{"id": "deadbeef"}]}
 
+    def test_interface_config_is_read_from_the_metadata_record_not_the_payload(self):
+        repository = SessionSystemRepository(FakeSession())
+        metadata_json = {"version": "1-abc", "interface_config": {"sankey_diagrams": [{"id": "deadbeef"}]}}
+
+        with patch("model_builder.adapters.repositories.session_system_repository.CacheBackend.get",
+                   return_value=metadata_json), \
+                patch.object(SessionSystemRepository, "get_system_data_with_source") as payload_read_mock:
+            config = repository.interface_config
+
+        payload_read_mock.assert_not_called()
+        assert config == {"sankey_diagrams": [{"id": "deadbeef"}]}
+        assert config is not metadata_json["interface_config"]
+
+    def test_metadata_record_without_interface_config_falls_back_to_the_payload(self):
+        repository = SessionSystemRepository(FakeSession())
+        payload = {"System": {}, "interface_config": {"sankey_diagrams": [{"id": "deadbeef"}]}}
+
+        with patch("model_builder.adapters.repositories.session_system_repository.CacheBackend.get",
+                   return_value={"version": "1-abc"}), \
+                patch("model_builder.adapters.repositories.session_system_repository.CacheBackend."
+                      "get_many_with_source", side_effect=lambda keys: {
+                          key: (payload, "redis") if key.startswith(SessionSystemRepository.SYSTEM_DATA_KEY)
+                          else ({"version": "1-abc"}, "redis") for key in keys}):
+            assert repository.interface_config == {"sankey_diagrams": [{"id": "deadbeef"}]}
+
     def test_save_data_persists_interface_config_to_session(self):
         session = FakeSession()
         repository = SessionSystemRepository(session)
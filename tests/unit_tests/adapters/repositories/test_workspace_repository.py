@@ -1,8 +1,8 @@
 """Unit tests for the workspace persistence layer.
 
-Covers the slot-aware cache key + one-release legacy read-fallback, the workspace index lifecycle
-(add / switch / remove), the shared payload budget (summed over slots, not per slot), and the
-distinct-system-id invariant (an incoming id colliding with another slot is re-minted).
+Covers the slot-aware cache key + one-release legacy read-fallback, the per-slot metadata record, the
+compare-and-set of payload version stamps, the workspace index lifecycle (add / switch / remove), the shared payload budget (summed over slots, not per
+slot), and the distinct-system-id invariant (an incoming id colliding with another slot is re-minted).
 """
 from unittest.mock import patch
 
@@ -12,7 +12,7 @@ from model_builder.adapters.repositories.cache_backend import CacheBackend
 from model_builder.adapters.repositories.session_system_repository import SessionSystemRepository
 from model_builder.adapters.repositories.session_workspace_repository import SessionWorkspaceRepository
 from model_builder.adapters.repositories.workspace_index import WorkspaceIndex
-from model_builder.domain.exceptions import PayloadSizeLimitExceeded
+from model_builder.domain.exceptions import ConcurrentModificationError, PayloadSizeLimitExceeded
 
 
 class DictSession(dict):
@@ -67,6 +67,8 @@ class TestSlotAwareCacheKey:
 
         sets, deletes = [], []
         with patch.object(CacheBackend, "get_with_source", autospec=True, side_effect=fake_get_with_source), \
+             patch.object(CacheBackend, "get_many_with_source", autospec=True,
+                          side_effect=lambda _s, keys: {key: fake_get_with_source(_s, key) for key in keys}), \
              patch.object(CacheBackend, "set", autospec=True, side_effect=lambda _s, k, v, **kw: sets.append(k)), \
              patch.object(CacheBackend, "delete", autospec=True, side_effect=lambda _s, k: deletes.append(k)):
             data = repo.get_system_data()
@@ -84,6 +86,217 @@ class TestSlotAwareCacheKey:
         assert repo._legacy_cache_key() is None
 
 
+# --------------------------------------------------------------------------- #
+# Per-slot metadata record: existence, size and name checks never fetch the payload
+# --------------------------------------------------------------------------- #
+@pytest.fixture
+def cache_store():
+    store = {}
+    payload_reads = []
+
+    def fake_get(_self, cache_key):
+        if cache_key.startswith(SessionSystemRepository.SYSTEM_DATA_KEY):
+            payload_reads.append(cache_key)
+        return store.get(cache_key)
+
+    def fake_get_many_with_source(_self, cache_keys):
+        return {cache_key: (fake_get(_self, cache_key), "redis") if cache_key in store else (None, None)
+                for cache_key in cache_keys}
+
+    def fake_add_to_counters(_self, deltas, timeout_seconds, delete_at_zero=None):
+        for counter_key, delta in deltas.items():
+            store[counter_key] = max(store.get(counter_key, 0) + delta, 0)
+        counts = {counter_key: store[counter_key] for counter_key in deltas}
+        for counter_key, deleted_key in (delete_at_zero or {}).items():
+            if counts.get(counter_key) == 0:
+                store.pop(counter_key, None)
+                store.pop(deleted_key, None)
+        return counts
+
+    with patch.object(CacheBackend, "get", autospec=True, side_effect=fake_get), \
+         patch.object(CacheBackend, "get_with_source", autospec=True,
+                      side_effect=lambda _s, k: (fake_get(_s, k), "redis") if k in store else (None, None)), \
+         patch.object(CacheBackend, "get_many_with_source", fake_get_many_with_source), \
+         patch.object(CacheBackend, "set", autospec=True,
+                      side_effect=lambda _s, k, v, **kw: store.__setitem__(k, CacheBackend._decode(v))), \
+         patch.object(CacheBackend, "set_many", autospec=True,
+                      side_effect=lambda _s, values, **kw: store.update(
+                          {k: CacheBackend._decode(v) for k, v in values.items()})), \
+         patch.object(CacheBackend, "delete", autospec=True, side_effect=lambda _s, k: store.pop(k, None)), \
+         patch.object(CacheBackend, "delete_many", autospec=True,
+                      side_effect=lambda _s, keys: [store.pop(k, None) for k in keys]), \
+         patch.object(CacheBackend, "touch_many", autospec=True), \
+         patch.object(CacheBackend, "add_to_counters", fake_add_to_counters):
+        yield store, payload_reads
+
+
+class TestSystemMetadata:
+    def test_saved_slot_is_probed_from_its_metadata_record(self, cache_store):
+        _store, payload_reads = cache_store
+        repo = SessionSystemRepository(DictSession())
+        repo.save_data(_data("sys-0"))
+
+        metadata = repo.get_system_metadata()
+
+        assert repo.has_system_data()
+        assert (metadata.system_id, metadata.system_name, metadata.efootprint_version) == (
+            "sys-0", "sys-0", "22.1.0")
+        assert metadata.size_bytes == WorkspaceIndex(repo.session).slot_sizes()[0]
+        assert payload_reads == []
+
+    def test_payload_without_record_is_read_once_and_backfilled(self, cache_store):
+        store, payload_reads = cache_store
+        repo = SessionSystemRepository(DictSession())
+        store["system_data:session-key:0"] = _data("sys-0")
+
+        assert repo.get_system_metadata().system_id == "sys-0"
+        assert repo.get_system_metadata().system_id == "sys-0"
+        assert payload_reads == ["system_data:session-key:0"]
+
+    def test_clear_drops_the_record(self, cache_store):
+        store, _payload_reads = cache_store
+        repo = SessionSystemRepository(DictSession())
+        repo.save_data(_data("sys-0"))
+
+        repo.clear()
+
+        assert store == {}
+        assert not repo.has_system_data()
+
+
+class TestSystemEmissions:
+    EMISSIONS = {"dates": ["2025-01-01"], "values": {"Devices_energy": [1.0]}, "display_unit": "kg"}
+
+    def test_emissions_saved_with_the_payload_are_served_without_reading_it(self, cache_store):
+        _store, payload_reads = cache_store
+        session = DictSession()
+        SessionSystemRepository(session).save_data(_data("sys-0"), system_emissions=self.EMISSIONS)
+
+        assert SessionSystemRepository(session).get_system_emissions() == self.EMISSIONS
+        assert payload_reads == []
+
+    def test_a_save_without_emissions_supersedes_the_stored_ones(self, cache_store):
+        session = DictSession()
+        SessionSystemRepository(session).save_data(_data("sys-0"), system_emissions=self.EMISSIONS)
+
+        SessionSystemRepository(session).save_data(_data("sys-0", payload="edited"))
+
+        assert SessionSystemRepository(session).get_system_emissions() is None
+
+    def test_emissions_are_backfilled_for_the_loaded_version(self, cache_store):
+        session = DictSession()
+        SessionSystemRepository(session).save_data(_data("sys-0"))
+        repo = SessionSystemRepository(session)
+        repo.get_system_data()
+
+        repo.save_system_emissions(self.EMISSIONS)
+
+        assert SessionSystemRepository(session).get_system_emissions() == self.EMISSIONS
+
+    def test_clear_drops_the_emissions(self, cache_store):
+        session = DictSession()
+        repo = SessionSystemRepository(session)
+        repo.save_data(_data("sys-0"), system_emissions=self.EMISSIONS)
+
+        repo.clear()
+
+        assert repo.get_system_emissions() is None
+
+
+class TestOptimisticConcurrency:
+    def test_saves_stamp_increasing_revisions_in_the_payload_record_and_the_index(self, cache_store):
+        session = DictSession()
+        repo = SessionSystemRepository(session)
+
+        repo.save_data(_data("sys-0"))
+        first_version = WorkspaceIndex(session).slot_version(0)
+        repo.save_data(_data("sys-0"))
+        second_version = WorkspaceIndex(session).slot_version(0)
+
+        assert WorkspaceIndex.revision_of(first_version) == 1
+        assert WorkspaceIndex.revision_of(second_version) == 2
+        assert repo.get_system_metadata().version == second_version
+
+    def test_save_computed_from_an_outdated_load_is_rejected(self, cache_store):
+        store, _payload_reads = cache_store
+        session = DictSession()
+        SessionSystemRepository(session).save_data(_data("sys-0"))
+        first_request, second_request = SessionSystemRepository(session), SessionSystemRepository(session)
+        first_request.get_system_data()
+        second_request.get_system_data()
+
+        first_request.save_data(_data("sys-0", payload="first"))
+        with pytest.raises(ConcurrentModificationError):
+            second_request.save_data(_data("sys-0", payload="second"))
+
+        assert SessionSystemRepository(session).get_system_data()["payload"] == "first"
+
+    def test_save_while_another_save_holds_the_lock_is_rejected(self, cache_store):
+        store, _payload_reads = cache_store
+        session = DictSession()
+        SessionSystemRepository(session).save_data(_data("sys-0"))
+        repo = SessionSystemRepository(session)
+        repo.get_system_data()
+
+        lock_name = f"save:{repo._cache_key()}"
+        token = CacheBackend().acquire_lock(lock_name, 10, 0)
+        try:
+            with patch.object(SessionSystemRepository, "SAVE_LOCK_WAIT_SECONDS", 0), \
+                    pytest.raises(ConcurrentModificationError):
+                repo.save_data(_data("sys-0", payload="unlocked"))
+        finally:
+            CacheBackend().release_lock(lock_name, token)
+
+        assert SessionSystemRepository(session).get_system_data()["payload"] == "x"
+
+    def test_repository_that_never_loaded_the_payload_overwrites_it(self, cache_store):
+        store, _payload_reads = cache_store
+        session = DictSession()
+        SessionSystemRepository(session).save_data(_data("sys-0"))
+
+        SessionSystemRepository(session).save_data(_data("sys-1", payload="imported"))
+
+        assert SessionSystemRepository(session).get_system_data()["payload"] == "imported"
+        assert WorkspaceIndex.revision_of(WorkspaceIndex(session).slot_version(0)) == 2
+
+    def test_stamps_minted_before_revisions_count_as_revision_zero(self):
+        assert WorkspaceIndex.revision_of("0123456789abcdef0123456789abcdef") == 0
+        assert WorkspaceIndex.revision_of(WorkspaceIndex.next_version(None)) == 1
+
+
+class TestBulkSlotReads:
+    def _two_saved_slots(self):
+        session = DictSession()
+        workspace = SessionWorkspaceRepository(session)
+        workspace.repository_for(0).save_data(_data("sys-0"))
+        workspace.repository_for(1).save_data(_data("sys-1"))
+        return workspace
+
+    def test_repositories_for_fetches_every_payload_at_once(self, cache_store):
+        workspace = self._two_saved_slots()
+
+        with patch.object(CacheBackend, "get_many_with_source", autospec=True,
+                          side_effect=lambda _s, keys: {key: (_data(key), "redis") for key in keys}) as get_many_mock:
+            repositories = workspace.repositories_for([0, 1])
+            payloads = [repositories[slot].get_system_data() for slot in (0, 1)]
+
+        get_many_mock.assert_called_once()
+        assert [payload["payload"] for payload in payloads] == ["x", "x"]
+        assert cache_store[1] == []  # no per-slot payload read
+
+    def test_system_metadata_of_reads_every_record_at_once(self, cache_store):
+        store, payload_reads = cache_store
+        workspace = self._two_saved_slots()
+
+        with patch.object(CacheBackend, "get_many", autospec=True,
+                          side_effect=lambda _s, keys: {key: store.get(key) for key in keys}) as get_many_mock:
+            metadata = workspace.system_metadata_of([0, 1])
+
+        get_many_mock.assert_called_once()
+        assert {slot: slot_metadata.system_id for slot, slot_metadata in metadata.items()} == {0: "sys-0", 1: "sys-1"}
+        assert payload_reads == []
+
+
 # --------------------------------------------------------------------------- #
 # Workspace index lifecycle
 # --------------------------------------------------------------------------- #
@@ -156,7 +369,7 @@ class TestSharedBudget:
         # A ~0.6 MB slot-1 payload fits per slot but together exceeds a 1 MB shared budget.
         big = _data("sys-1", payload="x" * int(0.6 * 1024 * 1024))
         with patch.object(SessionSystemRepository, "MAX_PAYLOAD_SIZE_MB", 1.0), \
-             patch.object(CacheBackend, "set", autospec=True):
+             patch.object(CacheBackend, "set_many", autospec=True):
             with pytest.raises(PayloadSizeLimitExceeded):
                 repo1.save_data(big)
 
@@ -164,7 +377,7 @@ class TestSharedBudget:
         session = DictSession()
         repo = SessionSystemRepository(session)
         with patch.object(SessionSystemRepository, "MAX_PAYLOAD_SIZE_MB", 1.0), \
-             patch.object(CacheBackend, "set", autospec=True):
+             patch.object(CacheBackend, "set_many", autospec=True):
             repo.save_data(_data("sys-0"))
         assert WorkspaceIndex(session).slot_sizes()[0] > 0
 
@@ -226,10 +439,13 @@ class TestDistinctSystemIdInvariant:
         system, and as heavy as a fresh with-calc serialization.
         """
         from efootprint.api_utils.system_to_json import system_to_json
+        from e_footprint_interface import __version__ as interface_version
         from e_footprint_interface.json_payload_utils import compute_json_size
         from model_builder.adapters.repositories import InMemoryWorkspaceRepository
 
         with_calc = system_to_json(minimal_system, save_calculated_attributes=True)
+        # save_data stamps the interface version on every stored payload.
+        with_calc["efootprint_interface_version"] = interface_version
         without_calc = system_to_json(minimal_system, save_calculated_attributes=False)
         with_calc_bytes = compute_json_size(with_calc).size_bytes
         without_calc_bytes = compute_json_size(without_calc).size_bytes
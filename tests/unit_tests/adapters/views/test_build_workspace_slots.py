@@ -19,6 +19,9 @@ class _FakeWorkspace:
     def repository_for(self, slot):
         return slot
 
+    def repositories_for(self, slots):
+        return {slot: self.repository_for(slot) for slot in slots}
+
 
 def _stub_model_web(name):
     return type("MW", (), {"system": type("S", (), {"name": name})()})()
@@ -0,0 +1,114 @@
+"""Unit tests for the model version ETags of the read-only result views."""
+import pytest
+from django.http import HttpResponse
+
+from model_builder.adapters.repositories import SessionSystemRepository
+from model_builder.adapters.views.conditional_get import conditional_on_model_version, model_version_etag
+from model_builder.adapters.views.exception_handling import render_exception_modal_if_error
+from tests.unit_tests.adapters.repositories.test_workspace_repository import DictSession
+
+
+def _setup_session(client, system_data: dict) -> None:
+    # The version stamp lives in the session index: persist it as the session middleware would.
+    session = client.session
+    SessionSystemRepository(session).save_data(system_data)
+    session.save()
+
+
+def _render_modal_without_template(monkeypatch) -> None:
+    # Only the modal's response headers matter here, not its (static asset linking) template.
+    monkeypatch.delenv("RAISE_EXCEPTIONS", raising=False)
+    monkeypatch.setattr("model_builder.adapters.views.exception_handling.render",
+                        lambda request, template_name, context: HttpResponse(str(context["message"])))
+
+
+@pytest.mark.django_db
+class TestConditionalGet:
+
+    def test_responses_carry_a_strong_etag_and_are_revalidated(self, client, minimal_system_data):
+        _setup_session(client, minimal_system_data)
+
+        response = client.get("/model_builder/source-table/")
+
+        assert response.status_code == 200
+        assert response["ETag"].startswith('"')
+        assert set(response["Cache-Control"].split(", ")) == {"private", "no-cache"}
+
+    def test_matching_etag_is_answered_with_304_before_hydration(self, client, minimal_system_data, monkeypatch):
+        _setup_session(client, minimal_system_data)
+        etag = client.get("/model_builder/source-table/")["ETag"]
+        monkeypatch.setattr(
+            "model_builder.adapters.views.views.ModelWeb",
+            lambda *args, **kwargs: pytest.fail("a 304 should not hydrate ModelWeb"),
+        )
+
+        response = client.get("/model_builder/source-table/", headers={"If-None-Match": etag})
+
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response["ETag"] == etag
+
+    def test_saving_the_model_changes_the_etag(self, client, minimal_system_data):
+        _setup_session(client, minimal_system_data)
+        etag = client.get("/model_builder/source-table/")["ETag"]
+
+        _setup_session(client, minimal_system_data)
+        response = client.get("/model_builder/source-table/", headers={"If-None-Match": etag})
+
+        assert response.status_code == 200
+        assert response["ETag"] != etag
+
+    def test_etag_depends_on_the_request_parameters(self, client, minimal_system_data):
+        _setup_session(client, minimal_system_data)
+
+        month_etag = client.get("/model_builder/result-emissions/", {"granularity": "month"})["ETag"]
+        year_etag = client.get("/model_builder/result-emissions/", {"granularity": "year"})["ETag"]
+        fragment_etag = client.get(
+            "/model_builder/result-emissions/", {"granularity": "year"}, headers={"HX-Request": "true"})["ETag"]
+
+        assert len({month_etag, year_etag, fragment_etag}) == 3
+
+    def test_error_responses_have_no_etag(self, client, minimal_system_data):
+        _setup_session(client, minimal_system_data)
+
+        response = client.get("/model_builder/result-emissions/", {"granularity": "quarter"})
+
+        assert response.status_code == 400
+        assert not response.has_header("ETag")
+
+    def test_exception_modal_has_no_etag(self, client, minimal_system_data, monkeypatch):
+        _setup_session(client, minimal_system_data)
+        _render_modal_without_template(monkeypatch)
+
+        def failing_emissions(request):
+            raise ValueError("Emissions unavailable")
+
+        monkeypatch.setattr("model_builder.adapters.views.views._active_system_emissions", failing_emissions)
+        response = client.get("/model_builder/result-chart/", headers={"HX-Request": "true"})
+
+        assert response.status_code == 200
+        assert response["HX-Reswap"] == "none"
+        assert not response.has_header("ETag")
+
+    def test_exception_modal_rendered_inside_a_conditional_view_loses_its_etag(
+            self, rf, minimal_system_data, monkeypatch):
+        _render_modal_without_template(monkeypatch)
+        request = rf.get("/model_builder/source-table/")
+        request.session = DictSession()
+        SessionSystemRepository(request.session).save_data(minimal_system_data)
+
+        @conditional_on_model_version()
+        @render_exception_modal_if_error
+        def failing_view(request):
+            raise ValueError("Rendering failed")
+
+        response = failing_view(request)
+
+        assert response.status_code == 200
+        assert not response.has_header("ETag")
+
+    def test_slot_without_version_stamp_gets_no_etag(self, rf):
+        request = rf.get("/model_builder/source-table/")
+        request.session = DictSession()
+
+        assert model_version_etag(request, 0) is None
@@ -2,7 +2,7 @@
 
 Covers:
 1. sankey_form(): card_id uniqueness, chip list filtering, default pre-selections
-2. sankey_diagram(): response structure, title, column header labels, parameter mapping
+2. sankey_diagram(): response structure, title, column header labels, parameter mapping, rendering cache
 """
 import json
 import re
@@ -13,6 +13,7 @@ from efootprint.constants.units import u
 from efootprint.core.lifecycle_phases import LifeCyclePhases
 
 from model_builder.adapters.repositories import SessionSystemRepository
+from model_builder.adapters.repositories.workspace_index import WorkspaceIndex
 from model_builder.adapters.views.sankey_views import (
     _build_sankey_payload, _expand_skipped_columns, DEFAULT_ACTIVE_COLUMNS,
 )
@@ -152,6 +153,26 @@ class TestSankeyCards:
         assert response.status_code == 200
         assert response.content.decode().count('class="sankey-card"') == 1
 
+    def test_default_card_id_is_stable_for_a_version_and_changes_with_it(self, client, minimal_system_data):
+        def save_model():
+            # Persist the version stamp in the session index, as the session middleware would.
+            session = client.session
+            SessionSystemRepository(session).save_data(minimal_system_data)
+            session.save()
+
+        def default_card_id():
+            response = client.get("/model_builder/sankey-cards/")
+            assert response.has_header("ETag")
+            return re.search(r'name="card_id" value="([0-9a-f]{8})"', response.content.decode()).group(1)
+
+        save_model()
+        first_id = default_card_id()
+        # A 304 replays the rendering of the version: a fresh rendering must show the same id.
+        assert default_card_id() == first_id
+
+        save_model()
+        assert default_card_id() != first_id
+
     def test_restores_saved_cards_with_saved_settings(self, client, minimal_system_data):
         system_data = {
             **minimal_system_data,
@@ -608,3 +629,80 @@ class TestExpandSkippedColumns:
 
     def test_expand_empty_returns_empty(self):
         assert _expand_skipped_columns([]) == []
+
+
+@pytest.mark.django_db
+class TestSankeyDiagramSaves:
+
+    def test_rendering_a_saved_card_unchanged_keeps_the_model_version(self, sankey_client, default_post):
+        sankey_client.post("/model_builder/sankey-diagram/", default_post)
+        version = WorkspaceIndex(sankey_client.session).slot_version(0)
+
+        sankey_client.post("/model_builder/sankey-diagram/", default_post)
+        assert WorkspaceIndex(sankey_client.session).slot_version(0) == version
+
+        sankey_client.post("/model_builder/sankey-diagram/", {**default_post, "node_label_max_length": "20"})
+        assert WorkspaceIndex(sankey_client.session).slot_version(0) != version
+
+
+@pytest.mark.django_db
+class TestSankeyRenderingCache:
+
+    def test_re_rendering_a_saved_card_skips_hydration_and_computation(self, sankey_client, default_post):
+        first_response = sankey_client.post("/model_builder/sankey-diagram/", default_post)
+
+        with patch("model_builder.adapters.views.sankey_views.ModelWeb",
+                   side_effect=AssertionError("a cached rendering should not hydrate the model")), \
+                patch("model_builder.adapters.views.sankey_views.ImpactRepartitionSankey",
+                      side_effect=AssertionError("a cached rendering should not be recomputed")):
+            second_response = sankey_client.post("/model_builder/sankey-diagram/", default_post)
+
+        assert second_response.status_code == 200
+        assert second_response.content == first_response.content
+
+    def test_re_rendering_a_saved_card_reads_its_settings_without_the_payload(self, sankey_client, default_post):
+        first_response = sankey_client.post("/model_builder/sankey-diagram/", default_post)
+
+        with patch.object(SessionSystemRepository, "get_system_data_with_source",
+                          side_effect=AssertionError("the card settings should come from the metadata record")):
+            second_response = sankey_client.post("/model_builder/sankey-diagram/", default_post)
+
+        assert second_response.content == first_response.content
+
+    def test_other_cards_with_the_same_settings_share_the_rendering(self, sankey_client, default_post):
+        sankey_client.post("/model_builder/sankey-diagram/", default_post)
+
+        with patch("model_builder.adapters.views.sankey_views.ImpactRepartitionSankey",
+                   side_effect=AssertionError("a cached rendering should not be recomputed")):
+            response = sankey_client.post("/model_builder/sankey-diagram/", {**default_post, "card_id": "2"})
+
+        assert 'id="sankey-diagram-area-2"' in response.content.decode()
+
+    @pytest.mark.parametrize("changed_setting", [
+        {"lifecycle_phase_filter": "Usage"},
+        {"aggregation_threshold_percent": "2.0"},
+        {"active_columns": ["0", "phase"]},
+        {"excluded_types": ["Device"]},
+        {"node_label_max_length": "20"},
+    ])
+    def test_changed_settings_are_recomputed(self, sankey_client, default_post, changed_setting):
+        sankey_client.post("/model_builder/sankey-diagram/", default_post)
+
+        with patch("model_builder.adapters.views.sankey_views.ImpactRepartitionSankey") as mock_cls:
+            _make_sankey_mock(mock_cls)
+            sankey_client.post("/model_builder/sankey-diagram/", {**default_post, **changed_setting})
+
+        mock_cls.assert_called_once()
+
+    def test_a_new_model_version_is_recomputed(self, sankey_client, default_post):
+        sankey_client.post("/model_builder/sankey-diagram/", default_post)
+        session = sankey_client.session
+        repository = SessionSystemRepository(session)
+        repository.save_data(repository.get_system_data())
+        session.save()
+
+        with patch("model_builder.adapters.views.sankey_views.ImpactRepartitionSankey") as mock_cls:
+            _make_sankey_mock(mock_cls)
+            sankey_client.post("/model_builder/sankey-diagram/", default_post)
+
+        mock_cls.assert_called_once()
@@ -3,6 +3,7 @@ from io import BytesIO
 from unittest.mock import patch
 
 import pytest
+from django.http import HttpResponse
 
 from model_builder.adapters.repositories import SessionSystemRepository
 
@@ -50,3 +51,19 @@ class TestUploadJsonInterfaceConfigPersistence:
         assert response.status_code == 302
         saved_data = SessionSystemRepository(client.session).get_system_data()
         assert saved_data["interface_config"] == {"sankey_diagrams": [{"id": "cafebabe"}]}
+
+
+@pytest.mark.django_db
+class TestUploadJsonLimits:
+    def test_file_over_the_size_limit_is_rejected_without_import(self, client, minimal_system_data, settings):
+        settings.MAX_UPLOAD_SIZE_MB = 0.001
+
+        with patch("model_builder.adapters.views.views.ProgressiveImportService.import_system") as import_mock, \
+                patch("model_builder.adapters.views.views.render", return_value=HttpResponse()) as render_mock:
+            client.post(
+                "/model_builder/upload-json/",
+                {"import-json-input": _json_upload_file(minimal_system_data)},
+            )
+
+        import_mock.assert_not_called()
+        assert "too large to be imported" in render_mock.call_args.kwargs["context"]["import_error_message"]
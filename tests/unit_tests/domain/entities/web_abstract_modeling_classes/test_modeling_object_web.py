@@ -519,14 +519,11 @@ class TestModelingObjectWeb:
         )
         stub_model.self_delete = MagicMock()
         model_web = MagicMock()
-        model_web.response_objs = {"Stub": {"obj1": stub_model}}
-        model_web.flat_efootprint_objs_dict = {"obj1": stub_model}
         wrapper = ModelingObjectWeb(stub_model, model_web)
 
         wrapper.self_delete()
 
-        assert "obj1" not in model_web.response_objs["Stub"]
-        assert "obj1" not in model_web.flat_efootprint_objs_dict
+        model_web.remove_efootprint_object_from_object_dicts.assert_called_once_with("Stub", "obj1")
         stub_model.self_delete.assert_called_once()
         child_delete.self_delete.assert_called_once()
         child_keep.self_delete.assert_not_called()
@@ -0,0 +1,110 @@
+"""Tests for the per-object JSON fragments behind ModelWeb.to_json / persist_to_cache."""
+from unittest.mock import patch
+
+import orjson
+from efootprint.abstract_modeling_classes.source_objects import SourceValue
+from efootprint.constants.units import u
+
+from e_footprint_interface.json_payload_utils import json_digest
+from model_builder.domain.entities.web_core.json_fragment_cache import JsonFragmentCache
+
+
+def _fresh_serialization(model_web, save_calculated_attributes):
+    return {
+        efootprint_obj.id: efootprint_obj.to_json(save_calculated_attributes=save_calculated_attributes)
+        for efootprint_obj in model_web.flat_efootprint_objs_dict.values()}
+
+
+def _serialized_objects(document):
+    return {object_id: object_json for key, block in document.items() if key not in ("efootprint_version", "Sources")
+            for object_id, object_json in block.items()}
+
+
+def test_unchanged_model_is_not_reserialized(minimal_model_web):
+    first = minimal_model_web.to_json(save_calculated_attributes=True)
+    nb_reserialized = minimal_model_web.json_fragments.nb_reserialized
+
+    second = minimal_model_web.to_json(save_calculated_attributes=True)
+
+    assert minimal_model_web.json_fragments.nb_reserialized == nb_reserialized
+    assert second == first
+
+
+def test_edit_only_reserializes_the_recomputed_objects(minimal_model_web):
+    minimal_model_web.to_json(save_calculated_attributes=True)
+    nb_reserialized = minimal_model_web.json_fragments.nb_reserialized
+    job = next(iter(minimal_model_web.response_objs["Job"].values()))
+
+    job.data_transferred = SourceValue(3 * u.MB)
+
+    for save_calculated_attributes in (True, False):
+        document = minimal_model_web.to_json(save_calculated_attributes=save_calculated_attributes)
+        assert _serialized_objects(document) == _fresh_serialization(minimal_model_web, save_calculated_attributes)
+    nb_objects_reserialized = minimal_model_web.json_fragments.nb_reserialized - nb_reserialized
+    assert 0 < nb_objects_reserialized < len(minimal_model_web.flat_efootprint_objs_dict)
+
+
+def test_in_place_metadata_edit_is_detected(minimal_model_web):
+    cache = JsonFragmentCache()
+    server = next(iter(minimal_model_web.response_objs["Server"].values()))
+    cache.fragment_of(server)
+
+    server.power.comment = "Measured on site"
+
+    assert cache.fragment_of(server).without_calculated_attributes["power"]["comment"] == "Measured on site"
+    assert cache.nb_reserialized == 2
+
+
+def test_fragments_of_removed_objects_are_dropped(minimal_model_web):
+    minimal_model_web.to_json(save_calculated_attributes=False)
+    storage = next(iter(minimal_model_web.response_objs["Storage"].values()))
+
+    minimal_model_web.remove_efootprint_object_from_object_dicts("Storage", storage.id)
+    minimal_model_web.to_json(save_calculated_attributes=False)
+
+    assert len(minimal_model_web.json_fragments) == len(minimal_model_web.flat_efootprint_objs_dict)
+
+
+def test_single_pass_serialization_encodes_both_documents(minimal_model_web):
+    serialized_system = minimal_model_web.serialize()
+
+    assert serialized_system.with_calculated_attributes_json == orjson.dumps(
+        serialized_system.with_calculated_attributes)
+    assert serialized_system.without_calculated_attributes_json == orjson.dumps(
+        serialized_system.without_calculated_attributes)
+    assert _serialized_objects(serialized_system.without_calculated_attributes) == _fresh_serialization(
+        minimal_model_web, save_calculated_attributes=False)
+
+
+def test_persist_hands_the_encodings_to_the_repository(minimal_model_web):
+    with patch.object(minimal_model_web.repository, "save_data") as save_data_mock:
+        minimal_model_web.persist_to_cache()
+
+    saved_data, = save_data_mock.call_args.args
+    saved_data_without_calculated_attributes = save_data_mock.call_args.kwargs["data_without_calculated_attributes"]
+    assert save_data_mock.call_args.kwargs["encoded_data"] == orjson.dumps(saved_data)
+    assert save_data_mock.call_args.kwargs["encoded_data_without_calculated_attributes"] == orjson.dumps(
+        saved_data_without_calculated_attributes)
+    encoded_objects = save_data_mock.call_args.kwargs["encoded_objects_without_calculated_attributes"]
+    for object_id, object_json in _serialized_objects(saved_data_without_calculated_attributes).items():
+        assert encoded_objects[object_id].object_json is object_json
+        assert encoded_objects[object_id].encoded == orjson.dumps(object_json)
+        assert encoded_objects[object_id].digest == json_digest(orjson.dumps(object_json))
+
+
+def test_hourly_timeseries_are_stored_as_compressed_buffers(minimal_model_web):
+    def timeseries_in(node):
+        if isinstance(node, dict):
+            if "unit" in node and ("values" in node or "compressed_values" in node):
+                yield node
+            for value in node.values():
+                yield from timeseries_in(value)
+        elif isinstance(node, list):
+            for value in node:
+                yield from timeseries_in(value)
+
+    timeseries = list(timeseries_in(minimal_model_web.serialize().with_calculated_attributes))
+
+    assert timeseries
+    assert all("values" not in timeseries_json and isinstance(timeseries_json["compressed_values"], str)
+               for timeseries_json in timeseries)
@@ -4,13 +4,16 @@ from types import SimpleNamespace
 
 import ciso8601
 import numpy as np
+import pytest
 import pytz
 from efootprint.abstract_modeling_classes.explainable_hourly_quantities import ExplainableHourlyQuantities
 from efootprint.abstract_modeling_classes.empty_explainable_object import EmptyExplainableObject
 from efootprint.constants.units import u
 from pint import Quantity
 
+from model_builder.domain.all_efootprint_classes import ABSTRACT_EFOOTPRINT_MODELING_CLASSES, MODELING_OBJECT_CLASSES_DICT
 from model_builder.domain.entities.web_core.model_web import ModelWeb
+from model_builder.domain.reference_data import DEFAULT_NETWORKS
 
 
 class TestModelWeb(unittest.TestCase):
@@ -216,3 +219,83 @@ class TestGetEfootprintObjectsFromEfootprintType:
         resolved = model_web.get_efootprint_object_from_efootprint_id(frances[0].id, "Country")
         assert resolved.id == existing_france.id
         assert set(model_web.flat_efootprint_objs_dict) == before
+
+    def test_catalog_defaults_are_built_once_and_shared_across_model_webs(self):
+        first_networks = self._model_web_with_france().get_efootprint_objects_from_efootprint_type("Network")
+        second_networks = self._model_web_with_france().get_efootprint_objects_from_efootprint_type("Network")
+
+        catalog_ids = set(DEFAULT_NETWORKS)
+        first_defaults = [network for network in first_networks if network.id in catalog_ids]
+        second_defaults = [network for network in second_networks if network.id in catalog_ids]
+        assert [network.id for network in first_defaults] == list(DEFAULT_NETWORKS)
+        assert all(first is second for first, second in zip(first_defaults, second_defaults))
+
+    def test_selecting_a_catalog_default_materializes_a_fresh_object(self):
+        model_web = self._model_web_with_france()
+        network_id = next(iter(DEFAULT_NETWORKS))
+        pooled_network = next(
+            network for network in model_web.get_efootprint_objects_from_efootprint_type("Network")
+            if network.id == network_id)
+
+        resolved = model_web.get_efootprint_object_from_efootprint_id(network_id, "Network")
+
+        assert resolved is not pooled_network
+        assert model_web.flat_efootprint_objs_dict[network_id] is resolved
+        assert pooled_network.modeling_obj_containers == []
+
+    def test_abstract_base_lists_every_concrete_subclass_in_canvas_order(self):
+        model_web = self._model_web_with_france()
+
+        objects_by_type = [
+            model_web.get_efootprint_objects_from_efootprint_type(type_name) for type_name in ("ServerBase", "JobBase")]
+
+        for type_name, objects in zip(("ServerBase", "JobBase"), objects_by_type):
+            expected = [obj for class_key, objs in model_web.response_objs.items()
+                        if issubclass(MODELING_OBJECT_CLASSES_DICT[class_key],
+                                      ABSTRACT_EFOOTPRINT_MODELING_CLASSES[type_name])
+                        for obj in objs.values()]
+            assert objects == expected
+        assert [obj.name for obj in objects_by_type[0]] == ["Server"]
+        assert [obj.name for obj in objects_by_type[1]] == ["Job"]
+
+    def test_index_follows_object_additions_and_removals(self):
+        from efootprint.core.hardware.gpu_server import GPUServer
+        from efootprint.core.hardware.storage import Storage
+
+        model_web = self._model_web_with_france()
+        assert "GPUServer" not in model_web.response_objs
+        gpu_server = GPUServer.from_defaults("GPU server", storage=Storage.from_defaults("GPU storage"))
+
+        model_web.add_new_efootprint_object_to_system(gpu_server)
+
+        assert gpu_server in model_web.get_efootprint_objects_from_efootprint_type("ServerBase")
+        assert gpu_server in model_web.get_efootprint_objects_from_efootprint_type("GPUServer")
+
+        model_web.remove_efootprint_object_from_object_dicts("GPUServer", gpu_server.id)
+
+        assert gpu_server not in model_web.get_efootprint_objects_from_efootprint_type("ServerBase")
+        assert gpu_server.id not in model_web.flat_efootprint_objs_dict
+
+    def test_unknown_type_is_rejected(self):
+        model_web = self._model_web_with_france()
+
+        with pytest.raises(ValueError):
+            model_web.get_efootprint_objects_from_efootprint_type("NotAnEfootprintClass")
+
+
+class TestPersistedSystemEmissions:
+    def test_persist_stores_the_daily_emissions_of_a_complete_model(self, minimal_model_web):
+        minimal_model_web.persist_to_cache()
+
+        stored_emissions = minimal_model_web.repository.get_system_emissions()
+        assert stored_emissions is not None
+        assert stored_emissions["dates"]
+        assert stored_emissions == minimal_model_web.system_emissions
+
+    def test_persist_of_an_incomplete_model_stores_no_emissions(self, default_system_repository):
+        model_web = ModelWeb(default_system_repository)
+
+        model_web.persist_to_cache()
+
+        assert not model_web.has_results
+        assert default_system_repository.get_system_emissions() is None
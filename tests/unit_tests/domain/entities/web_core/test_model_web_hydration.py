@@ -0,0 +1,85 @@
+"""Tests for the trusted calculated-attribute hydration mode of ModelWeb."""
+from unittest.mock import patch
+
+import pytest
+from efootprint import __version__ as efootprint_version
+from efootprint.api_utils.json_to_system import json_to_system
+from efootprint.api_utils.system_to_json import system_to_json
+
+from e_footprint_interface import __version__ as interface_version
+from model_builder.adapters.repositories import InMemorySystemRepository
+from model_builder.domain.entities.web_core.model_web import ModelWeb
+
+JSON_TO_SYSTEM_PATH = "model_builder.domain.entities.web_core.model_web.json_to_system"
+# Same major versions, so the version upgrade handlers stay out of the way: only the stamps are stale.
+STALE_EFOOTPRINT_VERSION = f"{efootprint_version.split('.')[0]}.0.0-stale"
+STALE_INTERFACE_VERSION = f"{interface_version.split('.')[0]}.0.0-stale"
+
+
+@pytest.fixture
+def system_data_with_calculated_attributes(minimal_system):
+    system_data = system_to_json(minimal_system, save_calculated_attributes=True)
+    system_data["efootprint_interface_version"] = interface_version
+    return system_data
+
+
+def _hydrated_payload(repository):
+    with patch(JSON_TO_SYSTEM_PATH, side_effect=json_to_system) as json_to_system_spy:
+        model_web = ModelWeb(repository)
+    return model_web, json_to_system_spy.call_args.args[0]
+
+
+def test_payload_written_by_running_code_keeps_its_calculated_attributes(system_data_with_calculated_attributes):
+    repository = InMemorySystemRepository(initial_data=system_data_with_calculated_attributes)
+
+    with patch.object(ModelWeb, "persist_to_cache") as persist_mock:
+        _, hydrated_payload = _hydrated_payload(repository)
+
+    job_json = next(iter(hydrated_payload["Job"].values()))
+    assert "hourly_avg_occurrences_across_usage_patterns" in job_json
+    persist_mock.assert_not_called()
+
+
+@pytest.mark.parametrize("version_key, stale_version", [
+    ("efootprint_version", STALE_EFOOTPRINT_VERSION), ("efootprint_interface_version", STALE_INTERFACE_VERSION)])
+def test_stale_payload_is_recomputed_and_persisted(system_data_with_calculated_attributes, version_key, stale_version):
+    system_data_with_calculated_attributes[version_key] = stale_version
+    repository = InMemorySystemRepository(initial_data=system_data_with_calculated_attributes)
+
+    model_web, hydrated_payload = _hydrated_payload(repository)
+
+    job_json = next(iter(hydrated_payload["Job"].values()))
+    assert "hourly_avg_occurrences_across_usage_patterns" not in job_json
+    assert model_web.system.total_footprint is not None
+    stored_data = repository.get_system_data()
+    assert stored_data["efootprint_version"] == efootprint_version
+    assert stored_data["efootprint_interface_version"] == interface_version
+    assert "hourly_avg_occurrences_across_usage_patterns" in next(iter(stored_data["Job"].values()))
+
+
+def test_stripped_payload_matches_the_serialization_without_calculated_attributes(
+        minimal_system, system_data_with_calculated_attributes):
+    stripped_data, nb_dropped = ModelWeb._without_calculated_attributes(system_data_with_calculated_attributes)
+    system_data_without_calculated_attributes = system_to_json(minimal_system, save_calculated_attributes=False)
+
+    assert nb_dropped > 0
+    for class_key in ("Job", "Server", "UsagePattern", "System"):
+        assert stripped_data[class_key] == system_data_without_calculated_attributes[class_key]
+
+
+def test_stripping_leaves_the_stored_payload_untouched(system_data_with_calculated_attributes):
+    stripped_data, _ = ModelWeb._without_calculated_attributes(system_data_with_calculated_attributes)
+
+    assert "hourly_avg_occurrences_across_usage_patterns" in next(
+        iter(system_data_with_calculated_attributes["Job"].values()))
+    assert stripped_data["efootprint_version"] == system_data_with_calculated_attributes["efootprint_version"]
+
+
+def test_provided_payload_is_trusted(system_data_with_calculated_attributes):
+    system_data_with_calculated_attributes.pop("efootprint_interface_version")
+
+    with patch(JSON_TO_SYSTEM_PATH, side_effect=json_to_system) as json_to_system_spy:
+        ModelWeb(InMemorySystemRepository(), system_data_with_calculated_attributes)
+
+    job_json = next(iter(json_to_system_spy.call_args.args[0]["Job"].values()))
+    assert "hourly_avg_occurrences_across_usage_patterns" in job_json
@@ -61,3 +61,53 @@ class TestModelWebUtils:
         result = model_web_utils.to_rounded_daily_values(arr, rounding_depth=1)
 
         assert result == expected
+
+    def test_build_hourly_matrix_sums_rows_at_their_offsets_in_the_target_unit(self):
+        """Each row sums its quantities, offset from the global start, converted and padded to whole days."""
+        start = datetime(2025, 1, 1, tzinfo=pytz.utc)
+        in_kg = ExplainableHourlyQuantities(np.array([1000, 2000], dtype=np.float32) * u.kg, start_date=start,
+                                            label="kg")
+        in_tonnes = ExplainableHourlyQuantities(np.array([1, 1], dtype=np.float32) * u.tonne,
+                                                start_date=start + timedelta(hours=1), label="t")
+
+        matrix = model_web_utils.build_hourly_matrix([[in_kg, in_tonnes], [], [in_tonnes]], start, 3, u.tonne)
+
+        assert matrix.shape == (3, 24)
+        np.testing.assert_allclose(matrix[:, :4], [[1, 3, 1, 0], [0, 0, 0, 0], [0, 1, 1, 0]])
+        assert not matrix[:, 4:].any()
+
+    def test_to_rounded_daily_sums_aggregates_every_row_by_day(self):
+        hourly_matrix = np.array([[1, 3] * 24, [0.25] * 48], dtype=np.float32)
+
+        daily = model_web_utils.to_rounded_daily_sums(hourly_matrix, rounding_depth=1)
+
+        np.testing.assert_array_equal(daily, [[48, 48], [6, 6]])
+
+    @pytest.mark.parametrize(
+        "granularity,expected_labels,expected_sums",
+        [
+            ("day", ["2024-12-30", "2024-12-31", "2025-01-01", "2025-01-02"], [[1, 2, 3, 4]]),
+            # 2024-12-30 is a Monday: the four days fall in one week.
+            ("week", ["2024-12-30"], [[10]]),
+            ("month", ["2024-12", "2025-01"], [[3, 7]]),
+            ("year", ["2024", "2025"], [[3, 7]]),
+        ],
+    )
+    def test_rollup_daily_values_sums_days_into_periods(self, granularity, expected_labels, expected_sums):
+        daily_matrix = np.array([[1, 2, 3, 4]], dtype=np.float64)
+
+        labels, sums = model_web_utils.rollup_daily_values("2024-12-30", daily_matrix, granularity)
+
+        assert labels == expected_labels
+        np.testing.assert_array_equal(sums, expected_sums)
+
+    def test_rollup_daily_values_starts_weeks_on_mondays(self):
+        # From Saturday 2025-01-04 to Tuesday 2025-01-14.
+        labels, sums = model_web_utils.rollup_daily_values("2025-01-04", np.ones((2, 11)), "week")
+
+        assert labels == ["2024-12-30", "2025-01-06", "2025-01-13"]
+        np.testing.assert_array_equal(sums, [[2, 7, 2], [2, 7, 2]])
+
+    def test_rollup_daily_values_rejects_unknown_granularities(self):
+        with pytest.raises(ValueError):
+            model_web_utils.rollup_daily_values("2025-01-01", np.ones((1, 3)), "quarter")
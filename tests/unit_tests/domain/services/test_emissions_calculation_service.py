@@ -0,0 +1,32 @@
+"""Unit tests for the server-side rollups of daily emissions."""
+import pytest
+
+from model_builder.domain.services import EmissionsCalculationService
+
+DAILY_EMISSIONS = {
+    "dates": ["2025-01-30", "2025-01-31", "2025-02-01"],
+    "values": {"Devices_energy": [1.0, 2.0, 3.0], "Network_energy": [0.5, 0.5, 0.5]},
+    "display_unit": "t",
+}
+
+
+def test_rollup_sums_every_series_into_the_requested_periods():
+    rollup = EmissionsCalculationService().rollup(DAILY_EMISSIONS, "month")
+
+    assert rollup == {
+        "granularity": "month",
+        "labels": ["2025-01", "2025-02"],
+        "values": {"Devices_energy": [3.0, 3.0], "Network_energy": [1.0, 0.5]},
+        "display_unit": "t",
+    }
+
+
+@pytest.mark.parametrize("granularity", EmissionsCalculationService.ROLLUP_GRANULARITIES)
+def test_rollup_of_a_model_without_hourly_emissions_is_empty(granularity):
+    empty_emissions = {"dates": [], "values": {key: [] for key in EmissionsCalculationService.EMPTY_VALUE_KEYS},
+                       "display_unit": "kg"}
+
+    rollup = EmissionsCalculationService().rollup(empty_emissions, granularity)
+
+    assert rollup["labels"] == []
+    assert all(values == [] for values in rollup["values"].values())
@@ -0,0 +1,55 @@
+"""Tests for JsonUploadParser: chunked reading within the size limit and the JSON object-count limit."""
+import json
+
+import pytest
+
+from model_builder.domain.exceptions import UploadLimitExceeded
+from model_builder.domain.services import JsonUploadParser
+
+MB = 1024 * 1024
+
+
+def _chunks(document, chunk_size=16):
+    content = json.dumps(document).encode("utf-8")
+    return [content[start:start + chunk_size] for start in range(0, len(content), chunk_size)]
+
+
+def test_parses_chunks_into_plain_dicts():
+    document = {"System": {"uuid-system": {"name": "System", "usage_patterns": ["uuid-up"]}}}
+
+    assert JsonUploadParser(max_size_mb=1, max_json_objects=10).parse(_chunks(document)) == document
+
+
+def test_declared_size_over_the_limit_is_rejected_before_reading():
+    def chunks():
+        raise AssertionError("read despite the declared size")
+        yield b""
+
+    with pytest.raises(UploadLimitExceeded):
+        JsonUploadParser(max_size_mb=1, max_json_objects=10).parse(chunks(), declared_size_bytes=2 * MB)
+
+
+def test_reading_stops_once_the_size_limit_is_crossed():
+    nb_chunks_read = 0
+
+    def chunks():
+        nonlocal nb_chunks_read
+        for _ in range(100):
+            nb_chunks_read += 1
+            yield b" " * (MB // 4)
+
+    with pytest.raises(UploadLimitExceeded):
+        JsonUploadParser(max_size_mb=1, max_json_objects=10).parse(chunks())
+    assert nb_chunks_read == 5
+
+
+def test_parsing_stops_once_the_object_limit_is_crossed():
+    document = {"Job": {f"uuid-{index}": {"name": f"Job {index}"} for index in range(20)}}
+
+    with pytest.raises(UploadLimitExceeded, match="number of JSON objects"):
+        JsonUploadParser(max_size_mb=1, max_json_objects=10).parse(_chunks(document))
+
+
+def test_invalid_json_raises_value_error():
+    with pytest.raises(ValueError):
+        JsonUploadParser(max_size_mb=1, max_json_objects=10).parse([b'{"System": '])
@@ -1,12 +1,20 @@
 from copy import deepcopy
+from datetime import datetime
+from unittest.mock import patch
 
+import numpy as np
+import pytest
+from efootprint.abstract_modeling_classes.explainable_hourly_quantities import ExplainableHourlyQuantities
 from efootprint.abstract_modeling_classes.source_objects import SourceObject
 from efootprint.api_utils.json_to_system import json_to_system
 from efootprint.api_utils.system_to_json import system_to_json
 from efootprint.builders.external_apis.ecologits.ecologits_external_api import EcoLogitsGenAIExternalAPI
+from efootprint.constants.units import u
 
+from e_footprint_interface.json_payload_utils import compute_json_size
 from model_builder.domain.all_efootprint_classes import MODELING_OBJECT_CLASSES_DICT
-from model_builder.domain.services.progressive_import_service import ProgressiveImportService
+from model_builder.domain.exceptions import PayloadSizeLimitExceeded
+from model_builder.domain.services.progressive_import_service import PayloadSizeEstimator, ProgressiveImportService
 
 
 def _merge_input_fragment(target: dict, fragment: dict) -> None:
@@ -66,3 +74,66 @@ def test_import_system_serializes_orphan_fragment_sources_with_system_to_json(mi
 
     _, flat_obj_dict, _ = json_to_system(imported, efootprint_classes_dict=MODELING_OBJECT_CLASSES_DICT)
     assert external_api_id in flat_obj_dict
+
+
+def test_import_system_encodes_the_payload_once(minimal_system_data):
+    with patch("model_builder.domain.services.progressive_import_service.compute_json_size",
+               wraps=compute_json_size) as compute_json_size_mock:
+        ProgressiveImportService(max_payload_size_mb=30).import_system(deepcopy(minimal_system_data))
+
+    compute_json_size_mock.assert_called_once()
+
+
+def test_estimate_lower_bound_over_the_limit_fails_fast(minimal_system_data):
+    estimator = PayloadSizeEstimator()
+    with patch.object(estimator, "estimate_bytes", return_value=10 * 1024 * 1024), \
+            patch("model_builder.domain.services.progressive_import_service.system_to_json") as system_to_json_mock:
+        with pytest.raises(PayloadSizeLimitExceeded):
+            ProgressiveImportService(max_payload_size_mb=1, size_estimator=estimator).import_system(
+                deepcopy(minimal_system_data))
+
+    system_to_json_mock.assert_not_called()
+
+
+def test_estimate_within_its_error_bound_does_not_reject_a_model_under_the_limit(minimal_system_data):
+    imported = ProgressiveImportService(max_payload_size_mb=30).import_system(deepcopy(minimal_system_data))
+    _, flat_obj_dict, _ = json_to_system(imported, efootprint_classes_dict=MODELING_OBJECT_CLASSES_DICT)
+    estimator = PayloadSizeEstimator()
+    estimated_bytes = sum(estimator.estimate_bytes(efootprint_object) for efootprint_object in flat_obj_dict.values())
+    actual_bytes = compute_json_size(imported).size_bytes
+
+    assert estimator.lower_bound_bytes(estimated_bytes) <= actual_bytes
+    assert actual_bytes <= estimator.upper_bound_bytes(estimated_bytes) + compute_json_size(minimal_system_data).size_bytes
+
+
+def test_estimate_that_cannot_rule_out_the_limit_falls_back_to_exact_measurement(minimal_system_data):
+    estimator = PayloadSizeEstimator()
+    limit_bytes = 1024 * 1024
+    ambiguous_estimate = limit_bytes / (estimator.LOWER_ERROR_BOUND + estimator.UPPER_ERROR_BOUND) * 2
+    with patch.object(estimator, "estimate_bytes", return_value=ambiguous_estimate):
+        imported = ProgressiveImportService(max_payload_size_mb=1, size_estimator=estimator).import_system(
+            deepcopy(minimal_system_data))
+
+    assert compute_json_size(imported).size_mb < 1
+
+
+def test_exact_measurement_over_the_limit_fails_before_the_final_serialization(minimal_system_data):
+    estimator = PayloadSizeEstimator()
+    with patch.object(estimator, "estimate_bytes", return_value=0.0), \
+            patch.object(estimator, "upper_bound_bytes", return_value=float("inf")), \
+            patch("model_builder.domain.services.progressive_import_service.system_to_json") as system_to_json_mock:
+        with pytest.raises(PayloadSizeLimitExceeded):
+            ProgressiveImportService(max_payload_size_mb=0.001, size_estimator=estimator).import_system(
+                deepcopy(minimal_system_data))
+
+    system_to_json_mock.assert_not_called()
+
+
+def test_flat_timeseries_count_a_single_value_change():
+    flat = ExplainableHourlyQuantities(
+        np.full(8760, 2.0, dtype=np.float32) * u.W, start_date=datetime(2025, 1, 1), label="flat")
+    varying = ExplainableHourlyQuantities(
+        np.arange(8760, dtype=np.float32) * u.W, start_date=datetime(2025, 1, 1), label="varying")
+
+    assert PayloadSizeEstimator.nb_value_changes(flat) == 1
+    assert PayloadSizeEstimator.nb_value_changes(varying) == 8760
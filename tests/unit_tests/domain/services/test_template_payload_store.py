@@ -0,0 +1,106 @@
+"""Unit tests for the per-process store of computed template payloads."""
+from copy import deepcopy
+from unittest.mock import patch
+
+import orjson
+import pytest
+from efootprint.api_utils.json_to_system import json_to_system
+
+from model_builder.domain.all_efootprint_classes import MODELING_OBJECT_CLASSES_DICT
+from model_builder.domain.services import ProgressiveImportService, SCRATCH_ID, TemplatePayloadStore
+
+
+@pytest.fixture
+def store(minimal_system_data):
+    def load_template(template_id):
+        if template_id != "minimal":
+            raise KeyError(template_id)
+        return deepcopy(minimal_system_data)
+
+    return TemplatePayloadStore(max_payload_size_mb=30, load_template=load_template)
+
+
+def _system_id(system_data):
+    return next(iter(system_data["System"]))
+
+
+def test_each_template_is_computed_once(store):
+    with patch.object(ProgressiveImportService, "import_system", autospec=True,
+                      side_effect=ProgressiveImportService.import_system) as import_system_mock:
+        store.get("minimal")
+        store.get("minimal")
+
+    import_system_mock.assert_called_once()
+
+
+def test_every_load_gets_a_fresh_system_id_and_an_otherwise_identical_document(store, minimal_system_data):
+    first, second = store.get("minimal"), store.get("minimal")
+    template_system_id = _system_id(minimal_system_data)
+
+    assert len({template_system_id, _system_id(first), _system_id(second)}) == 3
+    assert template_system_id.encode() not in orjson.dumps(first)
+    assert orjson.dumps(first).replace(_system_id(first).encode(), _system_id(second).encode()) == orjson.dumps(
+        second)
+
+
+def test_only_the_system_key_id_and_references_to_it_are_re_ided(minimal_system_data):
+    template_system_id = _system_id(minimal_system_data)
+    template_data = deepcopy(minimal_system_data)
+    # A name that spells the system id, and its quoted form, is content: re-iding must leave it alone.
+    server_json = next(iter(template_data["Server"].values()))
+    server_json["name"] = f"{template_system_id} ({template_system_id!r}, 'total_footprint')"
+    store = TemplatePayloadStore(max_payload_size_mb=30, load_template=lambda _template_id: deepcopy(template_data))
+
+    served = store.get("minimal")
+    fresh_system_id = _system_id(served)
+    computed = orjson.loads(store._encoded_payload("minimal")[0])
+
+    assert next(iter(served["Server"].values()))["name"] == server_json["name"]
+    reference_paths = store._encoded_payload("minimal")[3]
+    assert reference_paths
+    for reference_path in reference_paths:
+        references = computed
+        for key in reference_path[:-1]:
+            references = references[key]
+        references[reference_path[-1]] = references[reference_path[-1]].replace(template_system_id, fresh_system_id)
+    computed["System"] = {fresh_system_id: {**computed["System"][template_system_id], "id": fresh_system_id}}
+    assert served == computed
+
+
+def test_served_documents_hydrate_with_the_fresh_system_id(store):
+    system_data = store.get("minimal")
+
+    response_objs, flat_efootprint_objs_dict, _ = json_to_system(
+        system_data, launch_system_computations=True, efootprint_classes_dict=MODELING_OBJECT_CLASSES_DICT)
+
+    system = next(iter(response_objs["System"].values()))
+    assert system.id == _system_id(system_data)
+    assert system.total_footprint is not None
+    assert all(system in efootprint_object.systems for efootprint_object in flat_efootprint_objs_dict.values()
+               if hasattr(efootprint_object, "systems") and efootprint_object is not system)
+
+
+def test_served_documents_are_independent_copies(store):
+    store.get("minimal")["System"].clear()
+
+    assert store.get("minimal")["System"]
+
+
+def test_unknown_template_raises_key_error(store):
+    with pytest.raises(KeyError):
+        store.get("not-a-template")
+
+
+def test_warm_skips_templates_that_fail_to_compute(store):
+    store.warm(["minimal", "not-a-template"])
+
+    assert len(store) == 1
+
+
+def test_scratch_baseline_is_served_from_the_store():
+    store = TemplatePayloadStore(max_payload_size_mb=30)
+
+    scratch = store.get(SCRATCH_ID)
+
+    assert next(iter(scratch["System"].values()))["name"] == "My system"
+    assert _system_id(scratch) != "uuid-system-1"
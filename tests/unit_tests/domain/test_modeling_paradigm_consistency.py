@@ -17,11 +17,10 @@ def test_edge_class_names_all_resolve_to_an_efootprint_class():
     """Every name in EDGE_EFOOTPRINT_CLASS_NAMES resolves to a concrete or abstract efootprint class.
 
     `ModelWeb.has_edge_objects` iterates the set unconditionally and calls
-    `get_efootprint_objects_from_efootprint_type(name)`, which crashes on
-    `issubclass(..., None)` for names absent from both class dicts. Keeping the set
-    resolvable is what makes the iteration loud-on-typo. Abstract entries (e.g.
-    `EdgeComponent`) are allowed because the helper accepts them and resolves all
-    concrete subclasses via `issubclass`.
+    `get_efootprint_objects_from_efootprint_type(name)`, which raises ValueError
+    for names absent from both class dicts. Keeping the set resolvable is what makes the
+    iteration loud-on-typo. Abstract entries (e.g. `EdgeComponent`) are allowed because
+    the helper accepts them and resolves all concrete subclasses.
     """
     known = set(MODELING_OBJECT_CLASSES_DICT) | set(ABSTRACT_EFOOTPRINT_MODELING_CLASSES)
     missing = EDGE_EFOOTPRINT_CLASS_NAMES - known
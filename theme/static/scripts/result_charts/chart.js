@@ -37,26 +37,40 @@ export function createDatasetConfig(hardwareType, chartValues, chartType) {
 }
 
 /**
- * Build chart data from emissions data
+ * Fetch the emissions summed server-side at a temporal granularity, once per result panel render
+ * @param {string} granularity - Temporal granularity ('day', 'week', 'month' or 'year')
+ * @returns {Promise<Object>} Rollup with period labels, per hardware type values and display unit
+ */
+export function fetchEmissionsRollup(granularity) {
+    const rollups = window.emissions.rollups;
+    if (!rollups[granularity]) {
+        const url = `${window.emissions.rollup_url}?granularity=${encodeURIComponent(granularity)}`;
+        rollups[granularity] = fetch(url).then((response) => {
+            if (!response.ok) {
+                delete rollups[granularity];
+                throw new Error(`Could not load ${granularity} emissions (HTTP ${response.status})`);
+            }
+            return response.json();
+        });
+    }
+    return rollups[granularity];
+}
+
+/**
+ * Build chart data from an emissions rollup
  * @param {string} chartType - Chart type ('line' or 'bar')
- * @param {string} granularity - Temporal granularity ('month' or 'year')
+ * @param {Object} rollup - Emissions rollup (see fetchEmissionsRollup)
  * @returns {Object} Chart.js data object
  */
-export function buildChartData(chartType, granularity) {
+export function buildChartData(chartType, rollup) {
     const datasets = [];
 
-    if (!window.emissions.dates.length) {
+    if (!rollup.labels.length) {
         return { labels: [], datasets };
     }
 
-    for (const hardwareType of Object.keys(window.emissions.values)) {
-        let values = Object.values(
-            sumDailyValuesByDisplayGranularity(
-                window.emissions.dates,
-                window.emissions.values[hardwareType],
-                granularity
-            )
-        );
+    for (const hardwareType of Object.keys(rollup.values)) {
+        let values = rollup.values[hardwareType];
 
         // Apply cumulative sum for line charts
         if (chartType === "line") {
@@ -66,9 +80,7 @@ export function buildChartData(chartType, granularity) {
         datasets.push(createDatasetConfig(hardwareType, values, chartType));
     }
 
-    const labels = generateTimeIndexLabels(window.emissions.dates[0], granularity, datasets[0]?.data.length || 0);
-
-    return { labels, datasets };
+    return { labels: rollup.labels, datasets };
 }
 
 /**
@@ -127,7 +139,9 @@ export function destroyExistingChart(chartType) {
  * @param {string} chartType - Chart type ('line' or 'bar')
  * @param {string} granularity - Temporal granularity ('month' or 'year')
  */
-export function drawResultChart(chartType, granularity) {
+export async function drawResultChart(chartType, granularity) {
+    const rollup = await fetchEmissionsRollup(granularity);
+
     destroyExistingChart(chartType);
 
     const canvas = document.getElementById(`${chartType}Chart`);
@@ -135,7 +149,7 @@ export function drawResultChart(chartType, granularity) {
 
     ensureLegendContainer(canvas, chartType);
 
-    const chartData = buildChartData(chartType, granularity);
+    const chartData = buildChartData(chartType, rollup);
     const chartOptions = configureChartOptions(granularity);
 
     const chart = new Chart(canvas.getContext("2d"), {
@@ -159,7 +173,7 @@ export function drawResultChart(chartType, granularity) {
 export function drawBarResultChart() {
     const granularitySelect = document.getElementById("results_temporal_granularity");
     const granularity = granularitySelect?.value || "year";
-    drawResultChart("bar", granularity);
+    return drawResultChart("bar", granularity);
 }
 
 /**
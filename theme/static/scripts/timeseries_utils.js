@@ -31,27 +31,9 @@ function cumulativeSumFromArray(input){
     return valueToCopy;
 }
 
-function generateTimeIndexLabels(startDate, granularity, nbValues){
-    startDate = luxon.DateTime.fromFormat(startDate, "yyyy-MM-dd",{zone: "utc"});
-    let labels = [];
-    let dateLooper;
-    let label;
-    for(let nbValuesSinceStartDate = 0; nbValuesSinceStartDate < nbValues; nbValuesSinceStartDate++){
-        dateLooper = startDate.plus({[granularity]: nbValuesSinceStartDate});
-        if(granularity === "month"){
-            label = `${dateLooper.year}-${String(dateLooper.month).padStart(2, "0")}`;
-        }else{
-            label = `${dateLooper.year}`;
-        }
-        labels.push(label);
-    }
-    return labels;
-}
-
 if (typeof module !== "undefined" && module.exports) {
     module.exports = {
         sumDailyValuesByDisplayGranularity,
-        cumulativeSumFromArray,
-        generateTimeIndexLabels
+        cumulativeSumFromArray
     };
 }